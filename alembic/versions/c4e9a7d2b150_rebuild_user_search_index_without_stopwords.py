@@ -0,0 +1,46 @@
+"""rebuild user search index without stopwords
+
+Revision ID: c4e9a7d2b150
+Revises: f81a5d3c7e62
+Create Date: 2026-10-19 16:05:12.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e9a7d2b150'
+down_revision: Union[str, None] = 'f81a5d3c7e62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The ngram parser drops every token containing a stopword ("a", "i", ...), so bigrams like
+    # "ma" and "ia" in "maria" were never indexed. InnoDB records the stopword setting in effect
+    # when an index is created, so rebuild the index with stopwords off for this session.
+    op.execute("SET SESSION innodb_ft_enable_stopword = 0")
+    op.drop_index('ft_user_search', table_name='user')
+    op.create_index(
+        'ft_user_search',
+        'user',
+        ['firstName', 'lastName', 'email', 'phoneNumber'],
+        unique=False,
+        mysql_prefix='FULLTEXT',
+        mysql_with_parser='ngram',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ft_user_search', table_name='user')
+    op.create_index(
+        'ft_user_search',
+        'user',
+        ['firstName', 'lastName', 'email', 'phoneNumber'],
+        unique=False,
+        mysql_prefix='FULLTEXT',
+        mysql_with_parser='ngram',
+    )
@@ -0,0 +1,34 @@
+"""add fulltext user search index
+
+Revision ID: f81a5d3c7e62
+Revises: e6b4d2a8c310
+Create Date: 2026-10-19 14:41:52.660187
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f81a5d3c7e62'
+down_revision: Union[str, None] = 'e6b4d2a8c310'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # n-gram parser so partial names, emails and phone numbers match (ngram_token_size defaults to 2)
+    op.create_index(
+        'ft_user_search',
+        'user',
+        ['firstName', 'lastName', 'email', 'phoneNumber'],
+        unique=False,
+        mysql_prefix='FULLTEXT',
+        mysql_with_parser='ngram',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ft_user_search', table_name='user')
@@ -0,0 +1,199 @@
+'''
+Throughput benchmark for login, token refresh, registration and booking against local stand-ins.
+
+Starts the fake Keycloak (benchmarks/fake_keycloak.py) in a subprocess and the
+fake SMTP sink (benchmarks/fake_smtp.py) in-process, points the API at them through
+its regular settings (KEYCLOAK_SERVER_URL, MAIL_SERVER, MAIL_PORT, DATABASE_URL),
+then drives the real FastAPI app in-process with concurrent clients and reports
+requests per second and latency percentiles for each flow.
+
+Uses a throwaway SQLite database unless --database-url is given. SQLite
+serializes writes, so use MySQL when the registration and booking numbers matter.
+
+Usage: python benchmarks/auth_throughput_benchmark.py [--clients 20] [--seconds 5]
+           [--keycloak-latency-ms 20] [--smtp-latency-ms 50] [--database-url mysql+aiomysql://...]
+'''
+import argparse
+import asyncio
+import datetime
+import itertools
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, "..", "src"))
+
+from fake_smtp import FakeSMTPServer
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fake_keycloak(port: int, seed_users: int, latency_ms: float) -> subprocess.Popen:
+    env = {**os.environ, "FAKE_KEYCLOAK_LATENCY_MS": str(latency_ms)}
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BENCHMARK_DIR, "fake_keycloak.py"), "--port", str(port), "--seed-users", str(seed_users)],
+        env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Fake Keycloak did not start")
+
+
+async def seed_database() -> dict:
+    from core.db import async_session_manager
+    from modules.user.models import Barber, Base, Schedule, Service, TimeSlot, User
+
+    async with async_session_manager.connect() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+
+    async with async_session_manager.session() as session:
+        barber_user = User(kc_id="barber", firstName="Bench", lastName="Barber", email="barber@example.com", password="x", phoneNumber="9000000000")
+        client = User(kc_id="client", firstName="Bench", lastName="Client", email="client@example.com", password="x", phoneNumber="9000000001")
+        session.add_all([barber_user, client])
+        await session.flush()
+        barber = Barber(user_id=barber_user.user_id)
+        service = Service(name="Haircut", duration=30, price=25.0, category="Hair", description="Cut", popularity_score=1)
+        session.add_all([barber, service])
+        await session.flush()
+        schedule = Schedule(barber_id=barber.barber_id, date=datetime.date.today())
+        session.add(schedule)
+        await session.flush()
+        slot = TimeSlot(schedule_id=schedule.schedule_id, start_time=datetime.time(9), end_time=datetime.time(9, 30))
+        session.add(slot)
+        await session.flush()
+        ids = {
+            "user_id": client.user_id,
+            "barber_id": barber.barber_id,
+            "service_id": service.service_id,
+            "slot_id": slot.slot_id,
+        }
+        await session.commit()
+        return ids
+
+
+async def drive(client, clients: int, seconds: float, make_request) -> dict:
+    latencies = []
+    statuses = Counter()
+
+    async def worker(deadline: float):
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await make_request()
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(start + seconds) for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0.0,
+        "statuses": dict(statuses),
+    }
+
+
+async def run(args) -> None:
+    import httpx
+    from main import app
+    from core.resilience import dependencies
+
+    smtp = FakeSMTPServer(latency_ms=args.smtp_latency_ms)
+    await smtp.start(port=int(os.environ["MAIL_PORT"]))
+    ids = await seed_database()
+
+    seeded = itertools.cycle(range(args.seed_users))
+    registrations = itertools.count()
+
+    def login():
+        return client.post("/api/v1/auth/login", data={"username": f"user{next(seeded)}@example.com", "password": "password"})
+
+    refresh_token = None
+
+    def refresh():
+        return client.post("/api/v1/auth/refresh", data={"refresh_token": refresh_token})
+
+    def register():
+        n = next(registrations)
+        return client.post("/api/v1/users", json={
+            "firstName": "Bench", "lastName": f"User{n}", "email": f"bench{n}@example.com",
+            "phoneNumber": f"{n:010d}", "password": "password",
+        })
+
+    def book():
+        return client.post("/api/v1/appointments", json={
+            "user_id": ids["user_id"], "barber_id": ids["barber_id"], "status": "pending",
+            "time_slot": [ids["slot_id"]], "service_id": [ids["service_id"]],
+        })
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=60) as client:
+        refresh_token = (await login()).json()["refresh_token"]
+        for name, make_request in (("login", login), ("refresh", refresh), ("registration", register), ("booking", book)):
+            result = await drive(client, args.clients, args.seconds, make_request)
+            print(
+                f"{name:>12}: {result['requests_per_second']:8.1f} req/s  "
+                f"p50 {result['p50_ms']:7.1f} ms  p99 {result['p99_ms']:7.1f} ms  statuses {result['statuses']}"
+            )
+
+    print(f"emails accepted by the fake SMTP server: {smtp.messages}")
+    for name, dependency in dependencies.items():
+        print(f"{name}: {dependency.stats()}")
+    await smtp.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--seed-users", type=int, default=1000)
+    parser.add_argument("--keycloak-latency-ms", type=float, default=0.0)
+    parser.add_argument("--smtp-latency-ms", type=float, default=0.0)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    keycloak_port = free_port()
+    database_dir = tempfile.TemporaryDirectory()
+    # Settings are read when the app is imported, so the environment has to be ready first
+    os.environ.update({
+        "KEYCLOAK_SERVER_URL": f"http://127.0.0.1:{keycloak_port}",
+        "MAIL_SERVER": "127.0.0.1",
+        "MAIL_PORT": str(free_port()),
+        "MAIL_TLS": "false",
+        "MAIL_SSL": "false",
+        "MYSQL_ECHO": "false",
+        "DATABASE_URL": args.database_url or f"sqlite+aiosqlite:///{database_dir.name}/benchmark.db",
+        # Every simulated client shares one IP, measure the flows rather than the rate limiter
+        "RATE_LIMIT_WINDOW": "0",
+    })
+
+    keycloak = start_fake_keycloak(keycloak_port, args.seed_users, args.keycloak_latency_ms)
+    try:
+        asyncio.run(run(args))
+    finally:
+        keycloak.terminate()
+        keycloak.wait()
+        database_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+'''
+Walks the Keycloak and SMTP circuit breakers through a full outage against local stand-ins.
+
+Starts the fake Keycloak (benchmarks/fake_keycloak.py) in a subprocess and the
+fake SMTP sink (benchmarks/fake_smtp.py) in-process, makes both stall so calls
+time out, and checks each step of the breaker's cycle:
+
+- calls that time out open the circuit after CIRCUIT_FAILURE_THRESHOLD of them
+- concurrent calls beyond the bulkhead are rejected instead of queued
+- an open circuit fails fast with 503 and Retry-After, without calling the dependency,
+  also through the login and email endpoints
+- after CIRCUIT_RESET_TIMEOUT one trial call goes through (half-open), a failing
+  trial re-opens the circuit and a successful one closes it
+
+Keycloak is driven through `Dependency.call_sync` from worker threads, the path the
+signing key refresh uses, and through the login endpoint. SMTP is driven through
+`EmailOperations.send_email` and the email endpoint. Each step reports how long
+its calls took, so a timeout can be compared with a fast failure. Any step that
+does not behave fails the run.
+
+Usage: python benchmarks/circuit_breaker_benchmark.py [--timeout 0.5] [--reset-timeout 1]
+           [--failure-threshold 3] [--max-concurrency 4]
+'''
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import urllib.request
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, "..", "src"))
+
+from auth_throughput_benchmark import free_port, start_fake_keycloak
+from fake_smtp import FakeSMTPServer
+
+
+def set_keycloak_faults(port: int, **faults) -> dict:
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/_control",
+        data=json.dumps(faults).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)
+
+
+def keycloak_requests(port: int) -> int:
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/_control") as response:
+        return json.load(response)["requests"]
+
+
+def report(step: str, started: float, outcomes: list[str]):
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"{step:<48} {elapsed:8.1f} ms  {', '.join(outcomes)}")
+
+
+def check(condition: bool, message: str):
+    if not condition:
+        raise AssertionError(message)
+
+
+# Outcome of one call, the reason for a DependencyUnavailable
+async def outcome(call) -> str:
+    from core.resilience import DependencyUnavailable
+
+    try:
+        await call()
+        return "ok"
+    except DependencyUnavailable as e:
+        check(e.status_code == 503, f"expected 503, got {e.status_code}")
+        return e.reason
+    except Exception as e:
+        return f"error: {type(e).__name__}"
+
+
+async def keycloak_cycle(args, port: int):
+    import httpx
+    from main import app
+    from auth.service import AuthService, keycloak_dependency
+    from core.resilience import CLOSED, HALF_OPEN, OPEN
+
+    timed_out = f"no response within {args.timeout:g}s"
+
+    # call_sync runs in the calling thread, like SigningKeys.get in the thread pool
+    def fetch_certs():
+        return asyncio.to_thread(keycloak_dependency.call_sync, AuthService.keycloak_openid.certs)
+
+    print("Keycloak (call_sync from worker threads, login endpoint)")
+    started = time.perf_counter()
+    result = await outcome(fetch_certs)
+    report("healthy call", started, [result])
+    check(result == "ok" and keycloak_dependency.breaker.state == CLOSED, "healthy call failed")
+
+    set_keycloak_faults(port, stall_rate=1)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(outcome(fetch_certs) for _ in range(args.max_concurrency + 2)))
+    report(f"{len(results)} concurrent calls, Keycloak stalled", started, results)
+    check(results.count("too many concurrent calls") == 2, "the bulkhead let extra calls through")
+    check(results.count(timed_out) == args.max_concurrency, "stalled calls did not time out")
+    check(keycloak_dependency.breaker.state == OPEN, "timeouts did not open the circuit")
+
+    sent = keycloak_requests(port)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        started = time.perf_counter()
+        response = await client.post("/api/v1/auth/login", data={"username": "user0@example.com", "password": "password"})
+        report("login while open", started, [f"{response.status_code} Retry-After {response.headers.get('retry-after')}"])
+        check(response.status_code == 503 and "retry-after" in response.headers, "login did not fail fast")
+    started = time.perf_counter()
+    result = await outcome(fetch_certs)
+    report("call_sync while open", started, [result])
+    check(result == "circuit open", "call_sync did not fail fast")
+    check(keycloak_requests(port) == sent, "an open circuit still called Keycloak")
+
+    await asyncio.sleep(args.reset_timeout)
+    started = time.perf_counter()
+    result = await outcome(fetch_certs)
+    report("trial call after reset timeout, still stalled", started, [result])
+    check(result == timed_out and keycloak_dependency.breaker.state == OPEN, "a failed trial did not re-open the circuit")
+
+    set_keycloak_faults(port, stall_rate=0)
+    await asyncio.sleep(args.reset_timeout)
+    started = time.perf_counter()
+    result = await outcome(fetch_certs)
+    report("trial call after reset timeout, recovered", started, [result])
+    check(result == "ok" and keycloak_dependency.breaker.state == CLOSED, "a successful trial did not close the circuit")
+
+    stats = keycloak_dependency.stats()
+    print(f"stats: {stats}\n")
+    check(stats["in_flight"] == 0, "a bulkhead slot leaked")
+    check(stats["transitions"][HALF_OPEN] == 2 and stats["transitions"][OPEN] == 2, "unexpected transitions")
+
+
+async def smtp_cycle(args, smtp: FakeSMTPServer):
+    import httpx
+    from main import app
+    from operations.email_operations import email_operations, smtp_dependency
+    from core.resilience import CLOSED, OPEN
+
+    timed_out = f"no response within {args.timeout:g}s"
+
+    def send():
+        return email_operations.send_email("client@example.com", "Reminder", "<p>See you soon</p>")
+
+    print("SMTP (call_async from send_email, email endpoint)")
+    smtp.stall_rate = 1
+    started = time.perf_counter()
+    results = [await outcome(send) for _ in range(args.failure_threshold)]
+    report(f"{len(results)} sends, SMTP stalled", started, results)
+    check(results == [timed_out] * args.failure_threshold, "stalled sends did not time out")
+    check(smtp_dependency.breaker.state == OPEN, "timeouts did not open the circuit")
+
+    stalled = smtp.stalled
+    started = time.perf_counter()
+    result = await outcome(send)
+    report("send while open", started, [result])
+    check(result == "circuit open" and smtp.stalled == stalled, "send did not fail fast")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        login = await client.post("/api/v1/auth/login", data={"username": "user0@example.com", "password": "password"})
+        check(login.status_code == 200, f"login failed with {login.status_code}")
+        started = time.perf_counter()
+        response = await client.post(
+            "/api/v1/email/send",
+            json={"email": "client@example.com", "subject": "Reminder", "body": "<p>See you soon</p>"},
+            headers={"Authorization": f"Bearer {login.json()['access_token']}"},
+        )
+        report("POST /api/v1/email/send while open", started, [f"{response.status_code} Retry-After {response.headers.get('retry-after')}"])
+        check(response.status_code == 503 and "retry-after" in response.headers, "the email endpoint did not fail fast")
+
+    smtp.stall_rate = 0
+    await asyncio.sleep(args.reset_timeout)
+    started = time.perf_counter()
+    result = await outcome(send)
+    report("trial send after reset timeout, recovered", started, [result])
+    check(result == "ok" and smtp_dependency.breaker.state == CLOSED, "a successful trial did not close the circuit")
+    print(f"stats: {smtp_dependency.stats()}")
+
+
+async def run(args, keycloak_port: int):
+    smtp = FakeSMTPServer()
+    await smtp.start(port=int(os.environ["MAIL_PORT"]))
+    try:
+        await keycloak_cycle(args, keycloak_port)
+        await smtp_cycle(args, smtp)
+    finally:
+        await smtp.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--timeout", type=float, default=0.5)
+    parser.add_argument("--reset-timeout", type=float, default=1.0)
+    parser.add_argument("--failure-threshold", type=int, default=3)
+    parser.add_argument("--max-concurrency", type=int, default=4)
+    args = parser.parse_args()
+    if args.failure_threshold > args.max_concurrency:
+        parser.error("--failure-threshold must not exceed --max-concurrency")
+
+    keycloak_port = free_port()
+    database_dir = tempfile.TemporaryDirectory()
+    # Settings are read when the app is imported, so the environment has to be ready first
+    os.environ.update({
+        "KEYCLOAK_SERVER_URL": f"http://127.0.0.1:{keycloak_port}",
+        "KEYCLOAK_TIMEOUT": str(args.timeout),
+        "KEYCLOAK_MAX_CONCURRENCY": str(args.max_concurrency),
+        "SMTP_TIMEOUT": str(args.timeout),
+        "CIRCUIT_FAILURE_THRESHOLD": str(args.failure_threshold),
+        "CIRCUIT_RESET_TIMEOUT": str(args.reset_timeout),
+        "MAIL_SERVER": "127.0.0.1",
+        "MAIL_PORT": str(free_port()),
+        "MAIL_FROM": "api@example.com",
+        "MAIL_TLS": "false",
+        "MAIL_SSL": "false",
+        "MYSQL_ECHO": "false",
+        "DATABASE_URL": f"sqlite+aiosqlite:///{database_dir.name}/benchmark.db",
+        "RATE_LIMIT_WINDOW": "0",
+    })
+
+    keycloak = start_fake_keycloak(keycloak_port, seed_users=1, latency_ms=0)
+    try:
+        asyncio.run(run(args, keycloak_port))
+    finally:
+        keycloak.terminate()
+        keycloak.wait()
+        database_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+'''
+Memory and time of a full message history export.
+
+Seeds a database with messages and exports all of them three ways, reporting
+wall time and peak Python memory (tracemalloc, measured in a separate pass)
+for each:
+
+  paged ORM     limit=100 pages of Message objects, the way clients export
+                through the regular endpoints (one request per page)
+  full ORM      a single select(Message) loading every object at once
+  export stream ExportOperations.stream (operations/export_operations.py),
+                rows through a server-side cursor encoded as NDJSON batches
+
+Defaults to a throwaway SQLite database, pass --database-url to run against MySQL.
+
+Usage: python benchmarks/export_benchmark.py [--messages 100000] [--database-url URL]
+'''
+import argparse
+import asyncio
+import datetime
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+PAGE_SIZE = 100
+
+
+async def seed_database(messages: int):
+    from core.db import async_session_manager
+    from modules.user.models import Base, Message, Thread, User
+
+    async with async_session_manager.connect() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+        await connection.execute(User.__table__.insert(), [
+            {
+                "user_id": i, "kc_id": f"kc-{i}", "firstName": "Test", "lastName": f"User{i}",
+                "email": f"user{i}@example.com", "password": "", "phoneNumber": f"{5550000000 + i}",
+            }
+            for i in (1, 2)
+        ])
+        await connection.execute(Thread.__table__.insert(), [{"thread_id": 1, "sendingUser": 1, "receivingUser": 2}])
+        sent = datetime.datetime(2025, 1, 1)
+        for start in range(0, messages, 10000):
+            await connection.execute(Message.__table__.insert(), [
+                {
+                    "thread_id": 1, "sender_id": 1 + i % 2, "hasActiveMessage": False,
+                    "text": "Can I move my appointment to a little later in the afternoon?",
+                    "timeStamp": sent + datetime.timedelta(minutes=i),
+                }
+                for i in range(start, min(start + 10000, messages))
+            ])
+
+
+async def paged_orm() -> int:
+    from sqlalchemy import select
+    from core.db import async_session_manager
+    from modules.message_schema import MessageResponse
+    from modules.user.models import Message
+
+    exported, page = 0, 0
+    while True:
+        # A fresh session per page, like separate requests
+        async with async_session_manager.session() as session:
+            result = await session.execute(
+                select(Message).order_by(Message.message_id).limit(PAGE_SIZE).offset(page * PAGE_SIZE)
+            )
+            rows = [MessageResponse.model_validate(message).model_dump_json() for message in result.scalars().all()]
+        if not rows:
+            return exported
+        exported += len(rows)
+        page += 1
+
+
+async def full_orm() -> int:
+    from sqlalchemy import select
+    from core.db import async_session_manager
+    from modules.message_schema import MessageResponse
+    from modules.user.models import Message
+
+    async with async_session_manager.session() as session:
+        result = await session.execute(select(Message).order_by(Message.message_id))
+        messages = result.scalars().all()
+        body = "\n".join(MessageResponse.model_validate(message).model_dump_json() for message in messages)
+    return body.count("\n") + 1
+
+
+async def export_stream() -> int:
+    from operations.export_operations import ExportFormat, ExportOperations
+
+    export_ops = ExportOperations()
+    exported = 0
+    async for chunk in export_ops.stream(export_ops.messages_query(), ExportFormat.ndjson):
+        exported += chunk.count(b"\n")
+    return exported
+
+
+async def run(args):
+    await seed_database(args.messages)
+    for name, fn in (("paged ORM", paged_orm), ("full ORM", full_orm), ("export stream", export_stream)):
+        start = time.perf_counter()
+        exported = await fn()
+        elapsed = time.perf_counter() - start
+        # Second pass for memory, tracing slows the export down too much to time it
+        tracemalloc.start()
+        await fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name:>14}: {exported} rows  {elapsed:6.2f} s  peak {peak / 2**20:7.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    database_dir = tempfile.TemporaryDirectory()
+    # Settings are read when core.db is imported, so the environment has to be ready first
+    os.environ["MYSQL_ECHO"] = "false"
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite+aiosqlite:///{database_dir.name}/export.db"
+    try:
+        asyncio.run(run(args))
+    finally:
+        database_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
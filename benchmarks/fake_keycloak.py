@@ -0,0 +1,312 @@
+'''
+In-memory stand-in for the parts of Keycloak the API talks to, for load tests and
+benchmarks that must run offline.
+
+Serves the realm's JWKS and token endpoint (password, refresh_token and
+client_credentials grants, RS256 tokens shaped like Keycloak's), and the admin
+endpoints used by AuthService: create, look up, update and delete users, reset
+passwords, read realm roles and add or remove realm role mappings.
+
+Latency, errors and stalls (requests that are never answered, so the client times
+out) can be injected on every endpoint, from the environment
+(FAKE_KEYCLOAK_LATENCY_MS, FAKE_KEYCLOAK_ERROR_RATE, FAKE_KEYCLOAK_STALL_RATE) or at
+runtime:
+
+    curl -X POST localhost:8081/_control -H 'Content-Type: application/json' \
+        -d '{"latency_ms": 250, "error_rate": 0.1, "stall_rate": 0.05}'
+
+Point the API at it with KEYCLOAK_SERVER_URL=http://127.0.0.1:8081. The realm name,
+client and admin credentials are not checked beyond the admin password.
+
+Usage: python benchmarks/fake_keycloak.py [--port 8081] [--seed-users 1000]
+'''
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, Form, Request, Response
+from fastapi.responses import JSONResponse
+from jwcrypto import jwk, jwt
+
+ACCESS_TOKEN_LIFESPAN = 300
+REFRESH_TOKEN_LIFESPAN = 1800
+REALM_ROLES = ("admin", "barber", "default-roles-barbershop")
+
+# Password of the seeded users user0@example.com ... userN@example.com
+SEED_PASSWORD = "password"
+
+
+class FakeRealm:
+
+    def __init__(self, latency_ms: float = 0.0, error_rate: float = 0.0, stall_rate: float = 0.0):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.stall_rate = stall_rate
+        self.key = jwk.JWK.generate(kty="RSA", size=2048, kid=uuid.uuid4().hex)
+        self.users: dict[str, dict] = {}
+        self.ids_by_username: dict[str, str] = {}
+        self.roles = {name: {"id": uuid.uuid4().hex, "name": name, "composite": False} for name in REALM_ROLES}
+        self.requests = 0
+
+    def add_user(self, representation: dict, password: Optional[str] = None, roles=()) -> Optional[str]:
+        username = representation["username"].lower()
+        if username in self.ids_by_username:
+            return None
+        user_id = str(uuid.uuid4())
+        credentials = representation.get("credentials") or []
+        self.users[user_id] = {
+            "id": user_id,
+            "username": username,
+            "email": representation.get("email"),
+            "firstName": representation.get("firstName"),
+            "lastName": representation.get("lastName"),
+            "enabled": representation.get("enabled", True),
+            "password": password if password is not None else (credentials[0]["value"] if credentials else None),
+            "roles": {"default-roles-barbershop", *roles},
+        }
+        self.ids_by_username[username] = user_id
+        return user_id
+
+    def public_user(self, user: dict) -> dict:
+        return {key: value for key, value in user.items() if key not in ("password", "roles")}
+
+    def tokens(self, user: dict, issuer: str) -> dict:
+        now = int(time.time())
+        claims = {
+            "iat": now,
+            "iss": issuer,
+            "sub": user["id"],
+            "typ": "Bearer",
+            "azp": "barbershop-api-client",
+            "preferred_username": user["username"],
+            "email": user["email"],
+            "given_name": user["firstName"],
+            "family_name": user["lastName"],
+            "name": f"{user['firstName']} {user['lastName']}",
+            "realm_access": {"roles": sorted(user["roles"])},
+        }
+        access_token = self._sign({**claims, "exp": now + ACCESS_TOKEN_LIFESPAN, "jti": uuid.uuid4().hex})
+        refresh_token = self._sign({
+            "iat": now, "iss": issuer, "sub": user["id"], "typ": "Refresh",
+            "exp": now + REFRESH_TOKEN_LIFESPAN, "jti": uuid.uuid4().hex,
+        })
+        return {
+            "access_token": access_token,
+            "expires_in": ACCESS_TOKEN_LIFESPAN,
+            "refresh_token": refresh_token,
+            "refresh_expires_in": REFRESH_TOKEN_LIFESPAN,
+            "token_type": "Bearer",
+            "not-before-policy": 0,
+            "session_state": uuid.uuid4().hex,
+            "scope": "profile email",
+        }
+
+    def refresh_subject(self, token: str) -> Optional[str]:
+        try:
+            claims = json.loads(jwt.JWT(jwt=token, key=self.key).claims)
+        except Exception:
+            return None
+        if claims.get("typ") != "Refresh":
+            return None
+        return claims["sub"]
+
+    def _sign(self, claims: dict) -> str:
+        token = jwt.JWT(header={"alg": "RS256", "typ": "JWT", "kid": self.key.key_id}, claims=claims)
+        token.make_signed_token(self.key)
+        return token.serialize()
+
+
+def create_app(realm: FakeRealm) -> FastAPI:
+    app = FastAPI(title="Fake Keycloak")
+    app.state.realm = realm
+
+    def invalid_grant(description: str) -> JSONResponse:
+        return JSONResponse({"error": "invalid_grant", "error_description": description}, status_code=401)
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        if request.url.path.startswith("/_control"):
+            return await call_next(request)
+        realm.requests += 1
+        if realm.stall_rate > 0 and random.random() < realm.stall_rate:
+            # Hold the request without answering until the client gives up
+            while not await request.is_disconnected():
+                await asyncio.sleep(0.1)
+            return Response(status_code=504)
+        if realm.latency_ms > 0:
+            await asyncio.sleep(realm.latency_ms / 1000)
+        if realm.error_rate > 0 and random.random() < realm.error_rate:
+            return JSONResponse({"error": "injected failure"}, status_code=503)
+        return await call_next(request)
+
+    @app.get("/_control")
+    async def get_control():
+        return {
+            "latency_ms": realm.latency_ms,
+            "error_rate": realm.error_rate,
+            "stall_rate": realm.stall_rate,
+            "users": len(realm.users),
+            "requests": realm.requests,
+        }
+
+    @app.post("/_control")
+    async def set_control(request: Request):
+        body = await request.json()
+        realm.latency_ms = float(body.get("latency_ms", realm.latency_ms))
+        realm.error_rate = float(body.get("error_rate", realm.error_rate))
+        realm.stall_rate = float(body.get("stall_rate", realm.stall_rate))
+        return await get_control()
+
+    @app.get("/realms/{realm_name}/protocol/openid-connect/certs")
+    async def certs(realm_name: str):
+        return {"keys": [{**json.loads(realm.key.export_public()), "use": "sig", "alg": "RS256"}]}
+
+    @app.post("/realms/{realm_name}/protocol/openid-connect/token")
+    async def token(
+        request: Request,
+        realm_name: str,
+        grant_type: str = Form(...),
+        username: Optional[str] = Form(None),
+        password: Optional[str] = Form(None),
+        refresh_token: Optional[str] = Form(None),
+    ):
+        issuer = f"{str(request.base_url).rstrip('/')}/realms/{realm_name}"
+        if grant_type == "password":
+            user_id = realm.ids_by_username.get((username or "").lower())
+            user = realm.users.get(user_id)
+            if user is None or not user["enabled"] or user["password"] != password:
+                return invalid_grant("Invalid user credentials")
+        elif grant_type == "refresh_token":
+            user = realm.users.get(realm.refresh_subject(refresh_token or ""))
+            if user is None:
+                return invalid_grant("Invalid refresh token")
+        elif grant_type == "client_credentials":
+            user = realm.users[realm.ids_by_username["admin"]]
+        else:
+            return JSONResponse({"error": "unsupported_grant_type"}, status_code=400)
+        return realm.tokens(user, issuer)
+
+    @app.post("/admin/realms/{realm_name}/users")
+    async def create_user(request: Request, realm_name: str):
+        user_id = realm.add_user(await request.json())
+        if user_id is None:
+            return JSONResponse({"errorMessage": "User exists with same username"}, status_code=409)
+        location = f"{str(request.base_url).rstrip('/')}/admin/realms/{realm_name}/users/{user_id}"
+        return Response(status_code=201, headers={"Location": location})
+
+    @app.get("/admin/realms/{realm_name}/users")
+    async def get_users(realm_name: str, username: Optional[str] = None, max: int = 100, first: int = 0):
+        if username is not None:
+            user_id = realm.ids_by_username.get(username.lower())
+            return [realm.public_user(realm.users[user_id])] if user_id else []
+        users = list(realm.users.values())[first:first + max]
+        return [realm.public_user(user) for user in users]
+
+    @app.get("/admin/realms/{realm_name}/users/count")
+    async def count_users(realm_name: str):
+        return len(realm.users)
+
+    @app.get("/admin/realms/{realm_name}/users/{user_id}")
+    async def get_user(realm_name: str, user_id: str):
+        user = realm.users.get(user_id)
+        if user is None:
+            return JSONResponse({"error": "User not found"}, status_code=404)
+        return realm.public_user(user)
+
+    @app.put("/admin/realms/{realm_name}/users/{user_id}")
+    async def update_user(request: Request, realm_name: str, user_id: str):
+        user = realm.users.get(user_id)
+        if user is None:
+            return JSONResponse({"error": "User not found"}, status_code=404)
+        payload = await request.json()
+        if "username" in payload and payload["username"].lower() != user["username"]:
+            del realm.ids_by_username[user["username"]]
+            user["username"] = payload["username"].lower()
+            realm.ids_by_username[user["username"]] = user_id
+        for key in ("email", "firstName", "lastName", "enabled"):
+            if key in payload:
+                user[key] = payload[key]
+        return Response(status_code=204)
+
+    @app.delete("/admin/realms/{realm_name}/users/{user_id}")
+    async def delete_user(realm_name: str, user_id: str):
+        user = realm.users.pop(user_id, None)
+        if user is None:
+            return JSONResponse({"error": "User not found"}, status_code=404)
+        del realm.ids_by_username[user["username"]]
+        return Response(status_code=204)
+
+    @app.put("/admin/realms/{realm_name}/users/{user_id}/reset-password")
+    async def reset_password(request: Request, realm_name: str, user_id: str):
+        user = realm.users.get(user_id)
+        if user is None:
+            return JSONResponse({"error": "User not found"}, status_code=404)
+        user["password"] = (await request.json())["value"]
+        return Response(status_code=204)
+
+    @app.get("/admin/realms/{realm_name}/roles/{role_name}")
+    async def get_realm_role(realm_name: str, role_name: str):
+        role = realm.roles.get(role_name)
+        if role is None:
+            return JSONResponse({"error": "Could not find role"}, status_code=404)
+        return role
+
+    @app.post("/admin/realms/{realm_name}/users/{user_id}/role-mappings/realm")
+    async def add_realm_roles(request: Request, realm_name: str, user_id: str):
+        user = realm.users.get(user_id)
+        if user is None:
+            return JSONResponse({"error": "User not found"}, status_code=404)
+        user["roles"].update(role["name"] for role in await request.json())
+        return Response(status_code=204)
+
+    @app.delete("/admin/realms/{realm_name}/users/{user_id}/role-mappings/realm")
+    async def delete_realm_roles(request: Request, realm_name: str, user_id: str):
+        user = realm.users.get(user_id)
+        if user is None:
+            return JSONResponse({"error": "User not found"}, status_code=404)
+        user["roles"].difference_update(role["name"] for role in await request.json())
+        return Response(status_code=204)
+
+    return app
+
+
+def build_realm(seed_users: int, admin_username: str, admin_password: str) -> FakeRealm:
+    realm = FakeRealm(
+        latency_ms=float(os.getenv("FAKE_KEYCLOAK_LATENCY_MS", "0")),
+        error_rate=float(os.getenv("FAKE_KEYCLOAK_ERROR_RATE", "0")),
+        stall_rate=float(os.getenv("FAKE_KEYCLOAK_STALL_RATE", "0")),
+    )
+    realm.add_user(
+        {"username": admin_username, "email": "admin@example.com", "firstName": "Admin", "lastName": "User"},
+        password=admin_password,
+        roles=("admin", "barber"),
+    )
+    for i in range(seed_users):
+        realm.add_user(
+            {"username": f"user{i}@example.com", "email": f"user{i}@example.com", "firstName": "Seed", "lastName": f"User{i}"},
+            password=SEED_PASSWORD,
+        )
+    return realm
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--seed-users", type=int, default=1000)
+    parser.add_argument("--admin-username", default=os.getenv("KEYCLOAK_ADMIN_USERNAME", "admin"))
+    parser.add_argument("--admin-password", default=os.getenv("KEYCLOAK_ADMIN_PASSWORD", "admin"))
+    args = parser.parse_args()
+
+    realm = build_realm(args.seed_users, args.admin_username, args.admin_password)
+    uvicorn.run(create_app(realm), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+'''
+SMTP sink for load tests and benchmarks that must run offline.
+
+Speaks just enough SMTP for fastapi-mail (EHLO/HELO, AUTH PLAIN and LOGIN, MAIL,
+RCPT, DATA, RSET, NOOP, QUIT) over plain TCP. Every credential is accepted.
+Accepted messages are counted and dropped. Latency can be added to each
+message, a share of messages can be rejected with a temporary 451 error and a
+share can stall (never answered, so the client times out), from the command line
+or the environment (FAKE_SMTP_LATENCY_MS, FAKE_SMTP_ERROR_RATE,
+FAKE_SMTP_STALL_RATE). In-process, change the server's `latency_ms`, `error_rate`
+and `stall_rate` attributes at any time.
+
+Point the API at it with MAIL_SERVER=127.0.0.1, MAIL_PORT=8025, MAIL_TLS=false and
+MAIL_SSL=false.
+
+Usage: python benchmarks/fake_smtp.py [--port 8025] [--latency-ms 50] [--error-rate 0.05]
+           [--stall-rate 0.01]
+'''
+import argparse
+import asyncio
+import os
+import random
+
+
+class FakeSMTPServer:
+
+    def __init__(self, latency_ms: float = 0.0, error_rate: float = 0.0, stall_rate: float = 0.0):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.stall_rate = stall_rate
+        self.messages = 0
+        self.rejected = 0
+        self.stalled = 0
+        self._server: asyncio.AbstractServer | None = None
+        self._connections: dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8025) -> int:
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            # Hang up on stalled clients, their handlers would wait for them forever
+            for writer in self._connections.values():
+                writer.close()
+            await asyncio.gather(*self._connections)
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        async def reply(*lines: str):
+            for line in lines:
+                writer.write(line.encode() + b"\r\n")
+            await writer.drain()
+
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            await reply("220 fake-smtp ESMTP ready")
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command, _, argument = line.decode(errors="replace").strip().partition(" ")
+                command = command.upper()
+
+                if command == "EHLO":
+                    await reply("250-fake-smtp", "250-AUTH PLAIN LOGIN", "250-8BITMIME", "250 SIZE 10485760")
+                elif command == "HELO":
+                    await reply("250 fake-smtp")
+                elif command == "AUTH":
+                    mechanism, _, initial = argument.partition(" ")
+                    if mechanism.upper() == "PLAIN":
+                        if not initial:
+                            await reply("334 ")
+                            await reader.readline()
+                    elif mechanism.upper() == "LOGIN":
+                        if not initial:
+                            await reply("334 VXNlcm5hbWU6")
+                            await reader.readline()
+                        await reply("334 UGFzc3dvcmQ6")
+                        await reader.readline()
+                    else:
+                        await reply("504 Unrecognized authentication type")
+                        continue
+                    await reply("235 Authentication successful")
+                elif command in ("MAIL", "RCPT", "RSET", "NOOP"):
+                    await reply("250 OK")
+                elif command == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    while True:
+                        data = await reader.readline()
+                        if not data or data in (b".\r\n", b".\n"):
+                            break
+                    if self.stall_rate > 0 and random.random() < self.stall_rate:
+                        # Hold the connection without answering until the client gives up
+                        self.stalled += 1
+                        await reader.read()
+                        break
+                    if self.latency_ms > 0:
+                        await asyncio.sleep(self.latency_ms / 1000)
+                    if self.error_rate > 0 and random.random() < self.error_rate:
+                        self.rejected += 1
+                        await reply("451 Injected temporary failure")
+                    else:
+                        self.messages += 1
+                        await reply("250 OK queued")
+                elif command == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        except ConnectionError:
+            pass
+        finally:
+            del self._connections[task]
+            writer.close()
+
+
+async def serve(host: str, port: int, latency_ms: float, error_rate: float, stall_rate: float):
+    server = FakeSMTPServer(latency_ms, error_rate, stall_rate)
+    port = await server.start(host, port)
+    print(f"Fake SMTP listening on {host}:{port}")
+    try:
+        while True:
+            await asyncio.sleep(10)
+            print(f"messages={server.messages} rejected={server.rejected} stalled={server.stalled}")
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--latency-ms", type=float, default=float(os.getenv("FAKE_SMTP_LATENCY_MS", "0")))
+    parser.add_argument("--error-rate", type=float, default=float(os.getenv("FAKE_SMTP_ERROR_RATE", "0")))
+    parser.add_argument("--stall-rate", type=float, default=float(os.getenv("FAKE_SMTP_STALL_RATE", "0")))
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.latency_ms, args.error_rate, args.stall_rate))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+'''
+Per-row cost of the list endpoints, ORM entities compared with the Core read path.
+
+Seeds a database with barbers, schedules with time slots and booked appointments,
+then loads the same page through both paths:
+
+  ORM    select(Model) with the response's load profile from
+         operations/load_profiles.py, then to_response_schema() per row
+  Core   operations/list_queries.py, plain column rows mapped straight into
+         the response schemas
+
+and reports CPU time per row and peak Python memory (tracemalloc, separate pass)
+per page. The JSON of both paths is compared first, so the numbers are for
+identical responses.
+
+Defaults to a throwaway SQLite database, pass --database-url to run against MySQL.
+
+Usage: python benchmarks/list_read_benchmark.py [--barbers 10] [--days 30] [--slots 16] [--limit 100]
+'''
+import argparse
+import asyncio
+import datetime
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+
+async def seed_database(barbers: int, days: int, slots: int):
+    from core.db import async_session_manager
+    from modules.user.models import (
+        Appointment, Appointment_TimeSlot, AppointmentService, AppointmentStatus,
+        Barber, Base, Schedule, Service, TimeSlot, User,
+    )
+
+    async with async_session_manager.connect() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+
+        def user(user_id: int) -> dict:
+            return {
+                "user_id": user_id, "kc_id": f"kc-{user_id}", "firstName": "Bench", "lastName": f"User{user_id}",
+                "email": f"user{user_id}@example.com", "password": "", "phoneNumber": f"{9000000000 + user_id}",
+            }
+
+        # User 1 books every appointment, users 2.. are the barbers
+        await connection.execute(User.__table__.insert(), [user(i) for i in range(1, barbers + 2)])
+        await connection.execute(Barber.__table__.insert(), [
+            {"barber_id": i, "user_id": i + 1} for i in range(1, barbers + 1)
+        ])
+        await connection.execute(Service.__table__.insert(), [
+            {"service_id": i, "name": f"Service {i}", "duration": 30, "price": 19.99 + i, "category": "Hair",
+             "description": "Cut", "popularity_score": i}
+            for i in range(1, 4)
+        ])
+
+        start = datetime.date(2025, 1, 1)
+        schedules, time_slots, appointments, appointment_slots, appointment_services = [], [], [], [], []
+        for barber_id in range(1, barbers + 1):
+            for day in range(days):
+                schedule_id = len(schedules) + 1
+                date = start + datetime.timedelta(days=day)
+                schedules.append({"schedule_id": schedule_id, "barber_id": barber_id, "date": date, "is_working": True})
+                for j in range(slots):
+                    slot_id = len(time_slots) + 1
+                    minutes = 9 * 60 + 30 * j
+                    booked = j % 4 == 0
+                    time_slots.append({
+                        "slot_id": slot_id, "schedule_id": schedule_id, "is_available": not booked, "is_booked": booked,
+                        "start_time": datetime.time(minutes // 60, minutes % 60),
+                        "end_time": datetime.time((minutes + 30) // 60, (minutes + 30) % 60),
+                    })
+                    if booked:
+                        appointment_id = len(appointments) + 1
+                        appointments.append({
+                            "appointment_id": appointment_id, "appointment_date": date, "user_id": 1,
+                            "barber_id": barber_id, "status": AppointmentStatus.confirmed,
+                        })
+                        appointment_slots.append({"appointment_id": appointment_id, "slot_id": slot_id})
+                        appointment_services.append({"appointment_id": appointment_id, "service_id": 1 + j % 3})
+
+        for table, rows in (
+            (Schedule.__table__, schedules),
+            (TimeSlot.__table__, time_slots),
+            (Appointment.__table__, appointments),
+            (Appointment_TimeSlot.__table__, appointment_slots),
+            (AppointmentService.__table__, appointment_services),
+        ):
+            await connection.execute(table.insert(), rows)
+
+
+def listings(limit: int) -> list:
+    from sqlalchemy import select
+    from modules.appointment_schema import AppointmentResponse
+    from modules.schedule_schema import ScheduleResponse
+    from modules.user.barber_schema import BarberResponse
+    from modules.user.models import Appointment, Barber, Schedule
+    from operations import list_queries, load_profiles
+
+    def orm(model, profile):
+        async def load(db):
+            result = await db.execute(
+                select(model).options(*profile).order_by(*model.__table__.primary_key).limit(limit)
+            )
+            return [row.to_response_schema() for row in result.scalars().all()]
+        return load
+
+    def core(load_rows, model):
+        async def load(db):
+            return await load_rows(db, select().order_by(*model.__table__.primary_key).limit(limit))
+        return load
+
+    return [
+        ("barbers", List[BarberResponse], orm(Barber, load_profiles.BARBER_RESPONSE), core(list_queries.list_barbers, Barber)),
+        ("schedules", List[ScheduleResponse], orm(Schedule, load_profiles.SCHEDULE_RESPONSE), core(list_queries.list_schedules, Schedule)),
+        ("appointments", List[AppointmentResponse], orm(Appointment, load_profiles.APPOINTMENT_RESPONSE), core(list_queries.list_appointments, Appointment)),
+    ]
+
+
+async def measure(load, repeat: int) -> tuple:
+    from core.db import async_session_manager
+
+    rows = 0
+    cpu = time.process_time()
+    for _ in range(repeat):
+        # A fresh session per page, like separate requests
+        async with async_session_manager.session() as db:
+            rows += len(await load(db))
+    cpu = time.process_time() - cpu
+
+    tracemalloc.start()
+    async with async_session_manager.session() as db:
+        await load(db)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu / rows, peak
+
+
+async def run(args):
+    from pydantic import TypeAdapter
+    from core.db import async_session_manager
+
+    await seed_database(args.barbers, args.days, args.slots)
+    for name, annotation, orm_load, core_load in listings(args.limit):
+        adapter = TypeAdapter(annotation)
+        async with async_session_manager.session() as db:
+            orm_json = adapter.dump_json(await orm_load(db))
+        async with async_session_manager.session() as db:
+            core_json = adapter.dump_json(await core_load(db))
+        if orm_json != core_json:
+            raise SystemExit(f"{name}: ORM and Core responses differ")
+
+        print(f"{name} (page of {args.limit})")
+        for path, load in (("ORM", orm_load), ("Core", core_load)):
+            per_row, peak = await measure(load, args.repeat)
+            print(f"  {path:>5}: {per_row * 1e6:8.1f} us CPU/row  peak {peak / 1024:8.0f} KiB/page")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--barbers", type=int, default=10)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--slots", type=int, default=16)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    database_dir = tempfile.TemporaryDirectory()
+    # Settings are read when core.db is imported, so the environment has to be ready first
+    os.environ["MYSQL_ECHO"] = "false"
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite+aiosqlite:///{database_dir.name}/lists.db"
+    try:
+        asyncio.run(run(args))
+    finally:
+        database_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
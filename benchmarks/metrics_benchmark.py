@@ -0,0 +1,172 @@
+'''
+Collection overhead of core/metrics.py.
+
+Measures, per request or statement, what the metrics add to:
+
+  request    a small FastAPI route called straight through ASGI, with and
+             without MetricsMiddleware (no network, so the difference is not
+             hidden in socket time)
+  statement  SELECT 1 on an in-memory SQLite engine, with and without the
+             statement timers (METRICS_DB_TIMINGS), the cheapest statement
+             there is, so the worst case in relative terms
+
+Those end-to-end differences are within run-to-run noise on a busy machine, so
+the hooks are also timed in isolation: the middleware around an ASGI app that
+does nothing, and the statement timer around an execute that does nothing.
+Finally, the time to render a scrape once the registry holds --routes route templates.
+Each case is run in alternating rounds and the fastest round is reported, which
+keeps scheduler noise out of a difference of a few microseconds.
+
+Usage: python benchmarks/metrics_benchmark.py [--requests 5000] [--statements 5000] [--rounds 15] [--routes 60]
+'''
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from core.metrics import (
+    MetricsMiddleware,
+    http_request_seconds,
+    http_requests_total,
+    registry,
+    timed_execution,
+)
+from core.statement_hooks import hook_statement_execution
+
+
+def build_app(with_metrics: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/v1/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"item_id": item_id, "name": "Haircut"}
+
+    if with_metrics:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def call_requests(app: FastAPI, count: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for i in range(count):
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": f"/api/v1/items/{i % 100}", "raw_path": b"", "root_path": "",
+            "query_string": b"", "headers": [], "client": ("127.0.0.1", 1234), "server": ("test", 80),
+        }
+        await app(scope, receive, send)
+    return (time.perf_counter() - started) / count
+
+
+async def run_statements(engine, count: int) -> float:
+    async with engine.connect() as connection:
+        started = time.perf_counter()
+        for _ in range(count):
+            await connection.execute(text("SELECT 1"))
+        return (time.perf_counter() - started) / count
+
+
+# Cost of the middleware and the statement timer themselves, per call
+async def measure_hooks(count: int) -> tuple:
+    async def empty_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+
+    async def send(message):
+        pass
+
+    middleware = MetricsMiddleware(empty_app)
+    scope = {"type": "http", "method": "GET", "path": "/api/v1/items/1"}
+    timings = []
+    for app in (empty_app, middleware):
+        started = time.perf_counter()
+        for _ in range(count):
+            await app(scope, None, send)
+        timings.append((time.perf_counter() - started) / count)
+
+    def execute(cursor, statement, parameters, context):
+        pass
+
+    timed = timed_execution(execute)
+    for run in (execute, timed):
+        started = time.perf_counter()
+        for _ in range(count):
+            run(None, "SELECT 1", (), None)
+        timings.append((time.perf_counter() - started) / count)
+    return timings[1] - timings[0], timings[3] - timings[2]
+
+
+# Fastest time per operation of each case, running the cases in alternating rounds
+async def compare(cases: dict, rounds: int) -> dict:
+    timings = {name: [] for name in cases}
+    for _ in range(rounds):
+        for name, run in cases.items():
+            timings[name].append(await run())
+    return {name: min(values) for name, values in timings.items()}
+
+
+async def run(args):
+    plain_app, metrics_app = build_app(False), build_app(True)
+    # Warm up the routers and the first histogram series
+    await call_requests(plain_app, 100)
+    await call_requests(metrics_app, 100)
+    request_times = await compare({
+        "without": lambda: call_requests(plain_app, args.requests),
+        "with": lambda: call_requests(metrics_app, args.requests),
+    }, args.rounds)
+
+    plain_engine = create_async_engine("sqlite+aiosqlite://")
+    metrics_engine = create_async_engine("sqlite+aiosqlite://")
+    hook_statement_execution(metrics_engine, [timed_execution])
+    statement_times = await compare({
+        "without": lambda: run_statements(plain_engine, args.statements),
+        "with": lambda: run_statements(metrics_engine, args.statements),
+    }, args.rounds)
+    await plain_engine.dispose()
+    await metrics_engine.dispose()
+
+    for name, times in (("request", request_times), ("statement", statement_times)):
+        overhead = times["with"] - times["without"]
+        print(
+            f"{name:>9}: {times['without'] * 1e6:7.1f} us without, {times['with'] * 1e6:7.1f} us with metrics "
+            f"({overhead * 1e6:+.1f} us, {overhead / times['without']:+.1%})"
+        )
+
+    hook_costs = [await measure_hooks(args.requests) for _ in range(args.rounds)]
+    middleware_cost, timer_cost = (min(costs) for costs in zip(*hook_costs))
+    print(f"    hooks: {middleware_cost * 1e6:7.2f} us per request, {timer_cost * 1e6:.2f} us per statement")
+
+    # Fill the registry like a long-running worker: every route with a few statuses
+    for i in range(args.routes):
+        for status in (200, 400, 404, 500):
+            http_request_seconds.observe(0.01, "GET", f"/api/v1/route{i}/{{id}}")
+            http_requests_total.inc("GET", f"/api/v1/route{i}/{{id}}", status)
+    started = time.perf_counter()
+    body = registry.render()
+    print(f"   scrape: {(time.perf_counter() - started) * 1e3:7.2f} ms for {len(body) / 1024:.0f} KiB ({args.routes} routes)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--statements", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=15)
+    parser.add_argument("--routes", type=int, default=60)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+'''
+Overhead of core/profiling.py.
+
+  off       ProfilingMiddleware around an ASGI app that does nothing, for requests
+            that do not ask for a profile: the cost every request pays
+  rolling   a CPU-bound workload (building response models) with the rolling
+            sampler running at --rolling-interval, against the same workload
+            without it
+  profiled  the same workload in a task followed by a request profiler sampling
+            every --interval, as a profiled request would
+
+Each case is run in alternating rounds and the fastest round is reported.
+
+Usage: python benchmarks/profiler_benchmark.py [--requests 20000] [--models 20000] [--rounds 7]
+       [--interval 0.001] [--rolling-interval 0.01]
+'''
+import argparse
+import asyncio
+import datetime
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.profiling import ProfileStore, ProfilingMiddleware, StackSampler
+from modules.time_slot_schema import TimeSlotChildResponse
+
+
+async def call_middleware(count: int) -> float:
+    async def empty_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+
+    async def send(message):
+        pass
+
+    middleware = ProfilingMiddleware(empty_app, ProfileStore("profiles", 0), 0.001)
+    scope = {
+        "type": "http", "method": "GET", "path": "/api/v1/schedules", "query_string": b"limit=100",
+        "headers": [(b"host", b"test"), (b"accept", b"application/json"), (b"authorization", b"Bearer x")],
+    }
+    timings = []
+    for app in (empty_app, middleware):
+        started = time.perf_counter()
+        for _ in range(count):
+            await app(scope, None, send)
+        timings.append((time.perf_counter() - started) / count)
+    return timings[1] - timings[0]
+
+
+# The kind of work a schedule listing does per time slot
+def build_models(count: int) -> float:
+    started = time.perf_counter()
+    for i in range(count):
+        TimeSlotChildResponse.model_validate({
+            "slot_id": i, "start_time": datetime.time(9), "end_time": datetime.time(9, 30),
+            "is_available": True, "is_booked": False,
+        })
+    return time.perf_counter() - started
+
+
+async def build_models_sampled(count: int, interval: float, follow_task: bool) -> float:
+    async def work():
+        return build_models(count)
+
+    task = asyncio.ensure_future(work())
+    sampler = StackSampler(
+        threading.get_ident(), interval, asyncio.get_running_loop(), task if follow_task else None
+    )
+    sampler.start()
+    try:
+        return await task
+    finally:
+        sampler.stop()
+
+
+async def run(args):
+    middleware_costs = [await call_middleware(args.requests) for _ in range(args.rounds)]
+    print(f"      off: {min(middleware_costs) * 1e6:7.2f} us per request")
+
+    build_models(1000)
+    timings = {"without": [], "rolling": [], "profiled": []}
+    for _ in range(args.rounds):
+        timings["without"].append(build_models(args.models))
+        timings["rolling"].append(await build_models_sampled(args.models, args.rolling_interval, False))
+        timings["profiled"].append(await build_models_sampled(args.models, args.interval, True))
+    fastest = {name: min(values) for name, values in timings.items()}
+    print(f"  without: {fastest['without'] * 1e3:7.1f} ms for {args.models} models")
+    for name, interval in (("rolling", args.rolling_interval), ("profiled", args.interval)):
+        slowdown = fastest[name] / fastest["without"] - 1
+        print(f"{name:>9}: {fastest[name] * 1e3:7.1f} ms sampling every {interval * 1e3:g} ms ({slowdown:+.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--models", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--interval", type=float, default=0.001)
+    parser.add_argument("--rolling-interval", type=float, default=0.01)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
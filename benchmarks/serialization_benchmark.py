@@ -0,0 +1,145 @@
+'''
+Serialization cost of the large list endpoints.
+
+Builds the payloads of the two heaviest listings, schedules with their time
+slots and threads with their messages, and reports the time per request spent
+turning the handler's return value into JSON bytes on each rendering path:
+
+  fastapi default   validate against response_model again, then pydantic dump_json
+  orjson response   validate again, dump to Python objects, then orjson.dumps
+                    (what FastAPI does when ORJSONResponse is the response class)
+  stdlib json       jsonable_encoder then json.dumps
+  SchemaResponse    pydantic dump_json only (core/responses.py)
+
+Usage: python benchmarks/serialization_benchmark.py [--schedules 100] [--slots 16] [--threads 50] [--messages 50]
+'''
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from core.responses import SchemaResponse
+from modules.message_schema import MessageResponse
+from modules.schedule_schema import ScheduleResponse
+from modules.thread_schema import ThreadResponse
+from modules.time_slot_schema import TimeSlotChildResponse
+from modules.user.barber_schema import BarberResponse
+from modules.user.user_schema import UserBase
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def build_schedules(count: int, slots: int) -> List[ScheduleResponse]:
+    barber = BarberResponse(
+        barber_id=1,
+        user=UserBase(firstName="Sam", lastName="Barber", email="sam@example.com", phoneNumber="5555550100"),
+    )
+    start = datetime.datetime(2025, 1, 1, 9, 0)
+    return [
+        ScheduleResponse(
+            schedule_id=i,
+            barber_id=1,
+            date=datetime.date(2025, 1, 1) + datetime.timedelta(days=i),
+            is_working=True,
+            barber=barber,
+            time_slots=[
+                TimeSlotChildResponse(
+                    slot_id=i * slots + j,
+                    start_time=(start + datetime.timedelta(minutes=30 * j)).time(),
+                    end_time=(start + datetime.timedelta(minutes=30 * (j + 1))).time(),
+                    is_available=j % 3 != 0,
+                    is_booked=j % 3 == 0,
+                )
+                for j in range(slots)
+            ],
+        )
+        for i in range(count)
+    ]
+
+
+def build_threads(count: int, messages: int) -> List[ThreadResponse]:
+    sent = datetime.datetime(2025, 1, 1, 9, 0)
+    return [
+        ThreadResponse(
+            thread_id=i,
+            sendingUser=1,
+            receivingUser=i + 2,
+            messages=[
+                MessageResponse(
+                    message_id=i * messages + j,
+                    thread_id=i,
+                    hasActiveMessage=j == messages - 1,
+                    text="Can I move my appointment to a little later in the afternoon?",
+                    sender_id=1 if j % 2 else i + 2,
+                    timeStamp=sent + datetime.timedelta(minutes=j),
+                )
+                for j in range(messages)
+            ],
+        )
+        for i in range(count)
+    ]
+
+
+def render_paths(annotation) -> dict:
+    adapter = TypeAdapter(annotation)
+
+    def fastapi_default(value):
+        return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+    def orjson_response(value):
+        return orjson.dumps(adapter.dump_python(adapter.validate_python(value, from_attributes=True), mode="json"))
+
+    def stdlib_json(value):
+        return json.dumps(jsonable_encoder(value)).encode()
+
+    def schema_response(value):
+        return SchemaResponse(value, annotation).body
+
+    paths = {"fastapi default": fastapi_default, "stdlib json": stdlib_json, "SchemaResponse": schema_response}
+    if orjson is not None:
+        paths["orjson response"] = orjson_response
+    return paths
+
+
+def time_per_call(fn, value, min_seconds: float = 1.0) -> float:
+    fn(value)
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_seconds:
+        fn(value)
+        calls += 1
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--schedules", type=int, default=100)
+    parser.add_argument("--slots", type=int, default=16)
+    parser.add_argument("--threads", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=50)
+    args = parser.parse_args()
+
+    payloads = [
+        (f"{args.schedules} schedules x {args.slots} slots", List[ScheduleResponse], build_schedules(args.schedules, args.slots)),
+        (f"{args.threads} threads x {args.messages} messages", List[ThreadResponse], build_threads(args.threads, args.messages)),
+    ]
+    for label, annotation, value in payloads:
+        size = len(SchemaResponse(value, annotation).body)
+        print(f"{label} ({size / 1024:.0f} KiB)")
+        for name, fn in render_paths(annotation).items():
+            print(f"  {name:>16}: {time_per_call(fn, value) * 1e6:9.0f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+'''
+Startup time and throughput of the development and production server modes.
+
+Launches the API the way scripts/start.sh does in each APP_MODE and measures the
+time until /healthz first answers, then the requests per second and latency of
+/healthz under concurrent keep-alive clients. Development mode is timed
+without its `pip install` and `alembic upgrade head` steps, which only add to
+its startup time.
+
+/healthz does no database work, so the numbers isolate the server
+configuration: one auto-reloading process on the asyncio loop compared with
+several workers on uvloop and httptools.
+
+Usage: python benchmarks/server_mode_benchmark.py [--workers 4] [--clients 64] [--seconds 5]
+'''
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_command(mode: str, port: int, workers: int) -> list[str]:
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)]
+    if mode == "production":
+        return command + [
+            "--workers", str(workers),
+            "--loop", "uvloop",
+            "--http", "httptools",
+            "--timeout-keep-alive", "5",
+            "--backlog", "2048",
+            "--no-access-log",
+        ]
+    return command + ["--reload"]
+
+
+def wait_until_ready(url: str, timeout: float = 60) -> float:
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            if httpx.get(url, timeout=0.5).status_code == 200:
+                return time.perf_counter() - start
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.02)
+    raise RuntimeError(f"Server at {url} did not become ready")
+
+
+async def load(url: str, clients: int, seconds: float) -> dict:
+    latencies = []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        async def worker(deadline: float):
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                await client.get(url)
+                latencies.append(time.perf_counter() - started)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(start + seconds) for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def run_mode(mode: str, workers: int, clients: int, seconds: float) -> dict:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/healthz"
+    process = subprocess.Popen(
+        server_command(mode, port, workers),
+        cwd=SRC_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    try:
+        startup = wait_until_ready(url)
+        result = asyncio.run(load(url, clients, seconds))
+        result["startup_seconds"] = startup
+        return result
+    finally:
+        # Stop the reloader or worker manager together with its children
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    for mode in ("development", "production"):
+        result = run_mode(mode, args.workers, args.clients, args.seconds)
+        print(
+            f"{mode:>12}: startup {result['startup_seconds']:5.2f} s  "
+            f"{result['requests_per_second']:8.1f} req/s  "
+            f"p50 {result['p50_ms']:6.2f} ms  p99 {result['p99_ms']:6.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
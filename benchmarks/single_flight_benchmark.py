@@ -0,0 +1,73 @@
+'''
+Thundering-herd benchmark for the single-flight read layer (core/single_flight.py).
+
+Simulates many clients repeatedly requesting the same listing while a fake
+query with a fixed latency stands in for MySQL, and reports how many queries
+per second reach the database with and without request coalescing.
+
+Usage: python benchmarks/single_flight_benchmark.py [--clients 500] [--seconds 5] [--query-ms 20]
+'''
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.single_flight import SingleFlight
+
+
+async def run(clients: int, seconds: float, query_ms: float, coalesce: bool) -> dict:
+    flight = SingleFlight()
+    queries = 0
+    requests = 0
+
+    async def fake_query():
+        nonlocal queries
+        queries += 1
+        await asyncio.sleep(query_ms / 1000)
+        return ["service"] * 10
+
+    async def client(deadline: float):
+        nonlocal requests
+        while time.perf_counter() < deadline:
+            if coalesce:
+                await flight.do(("services", 1, 10), fake_query)
+            else:
+                await fake_query()
+            requests += 1
+
+    start = time.perf_counter()
+    deadline = start + seconds
+    await asyncio.gather(*(client(deadline) for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests_per_second": requests / elapsed,
+        "db_queries_per_second": queries / elapsed,
+        "stats": flight.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--query-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    for coalesce in (False, True):
+        result = asyncio.run(run(args.clients, args.seconds, args.query_ms, coalesce))
+        label = "single-flight" if coalesce else "uncoalesced"
+        print(
+            f"{label:>14}: {result['requests_per_second']:10.0f} req/s  "
+            f"{result['db_queries_per_second']:10.0f} DB queries/s"
+        )
+        if coalesce:
+            for key, stats in result["stats"].items():
+                print(f"{'':>16}{key}: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+'''
+Benchmark for the in-process user typeahead index (core/prefix_index.py).
+
+Builds the index for a synthetic customer base using the same key normalization
+as UserTypeaheadIndex, then reports build time, memory (tracked allocations and
+the index's own budget accounting) and lookup latency percentiles for random
+name, email and phone prefixes.
+
+Usage: python benchmarks/typeahead_benchmark.py [--users 500000] [--lookups 20000]
+'''
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.prefix_index import PrefixIndex
+
+FIRST_NAMES = ["james", "maria", "john", "linda", "michael", "sarah", "david", "emma", "daniel", "olivia",
+               "carlos", "aisha", "wei", "fatima", "ivan", "yuki", "noah", "sofia", "liam", "chloe"]
+
+
+def keys_for(user) -> list[str]:
+    # Mirrors UserTypeaheadIndex.keys_for without importing application settings
+    first_name = " ".join(user.firstName.casefold().split())
+    last_name = " ".join(user.lastName.casefold().split())
+    return [f"{first_name} {last_name}", last_name, user.email.casefold(), user.phoneNumber]
+
+
+def synthetic_users(count: int, rng: random.Random):
+    for user_id in range(1, count + 1):
+        first_name = rng.choice(FIRST_NAMES).title()
+        last_name = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 10))).title()
+        yield SimpleNamespace(
+            user_id=user_id,
+            firstName=first_name,
+            lastName=last_name,
+            email=f"{first_name}.{last_name}{user_id}@example.com".lower(),
+            phoneNumber=f"{rng.randint(2000000000, 9999999999)}",
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--max-mb", type=int, default=256)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    users = list(synthetic_users(args.users, rng))
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    index = PrefixIndex(args.max_mb * 1024 * 1024)
+    index.build([(key, user.user_id) for user in users for key in keys_for(user)])
+    build_seconds = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"users:           {args.users}")
+    print(f"entries:         {len(index)}")
+    print(f"build time:      {build_seconds:.2f} s")
+    print(f"index budget:    {index.size_bytes / 1024 / 1024:.1f} MB (accounted)")
+    print(f"traced memory:   {current / 1024 / 1024:.1f} MB retained, {peak / 1024 / 1024:.1f} MB peak during build")
+
+    samples = []
+    for user in rng.sample(users, min(args.lookups, len(users))):
+        key = rng.choice(keys_for(user))
+        prefix = key[: rng.randint(2, min(len(key), 8))]
+        start = time.perf_counter()
+        index.search(prefix, limit=10)
+        samples.append((time.perf_counter() - start) * 1_000_000)
+
+    samples.sort()
+    print(f"lookup p50:      {statistics.median(samples):.1f} us")
+    print(f"lookup p99:      {samples[int(len(samples) * 0.99) - 1]:.1f} us")
+    print(f"lookup max:      {samples[-1]:.1f} us")
+
+    start = time.perf_counter()
+    for user in users[:1000]:
+        index.remove(user.user_id, keys_for(user))
+        index.add(user.user_id, keys_for(user))
+    print(f"update (remove+add): {(time.perf_counter() - start) * 1000 / 1000:.2f} ms per user")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+# One-shot migration job, run once per deploy before starting the production servers
+export PYTHONPATH=/app
+
+alembic upgrade head
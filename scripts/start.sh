@@ -1,9 +1,38 @@
-pip install -r requirements.txt
+# APP_MODE=development (default): install requirements, migrate and run a single
+# auto-reloading server, for the docker compose setup that mounts the source tree.
+# APP_MODE=production: dependencies are baked into the image and migrations run as a
+# separate one-shot job (scripts/migrate.sh), so only the server is started here.
+APP_MODE=${APP_MODE:-development}
 
 export PYTHONPATH=/app
 
+if [ "$APP_MODE" = "production" ]; then
+    # Workers share their metrics through this directory, so /metrics covers all of them
+    export METRICS_DIR="${METRICS_DIR:-/tmp/barbershop-metrics}"
+
+    # Request logging stays on unless ACCESS_LOG=false
+    if [ "${ACCESS_LOG:-true}" = "false" ]; then
+        ACCESS_LOG_FLAG=--no-access-log
+    else
+        ACCESS_LOG_FLAG=--access-log
+    fi
+
+    cd src
+
+    exec uvicorn main:app --host 0.0.0.0 --port 8000 \
+        --workers "${WEB_CONCURRENCY:-$(nproc)}" \
+        --loop uvloop \
+        --http httptools \
+        --timeout-keep-alive "${KEEP_ALIVE_TIMEOUT:-5}" \
+        --backlog "${BACKLOG:-2048}" \
+        --forwarded-allow-ips "${FORWARDED_ALLOW_IPS:-127.0.0.1}" \
+        "$ACCESS_LOG_FLAG"
+fi
+
+pip install -r requirements.txt
+
 alembic upgrade head
 
 cd src
 
-uvicorn main:app --host 0.0.0.0 --port 8000 --reload
\ No newline at end of file
+uvicorn main:app --host 0.0.0.0 --port 8000 --reload
@@ -1,4 +1,6 @@
-from fastapi import Depends, HTTPException, status, Form
+import time
+
+from fastapi import HTTPException, Request, Security, status, Form
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from auth.models import TokenResponse, UserInfo
 from auth.service import AuthService
@@ -12,7 +14,7 @@ class AuthController:
     Controller for handling authentication logic.
     """
 
-    def login(username: str = Form(...), password: str = Form(...)) -> TokenResponse:
+    async def login(username: str = Form(...), password: str = Form(...)) -> TokenResponse:
         """
         Authenticate user and return access token.
 
@@ -24,27 +26,49 @@ class AuthController:
             HTTPException: If the authentication fails (wrong credentials).
 
         Returns:
-            TokenResponse: Contains the access token upon successful authentication.
+            TokenResponse: Contains the access and refresh tokens upon successful authentication.
         """
         # Authenticate the user using the AuthService
-        access_token = AuthService.authenticate_user(username, password)
+        token = await AuthService.authenticate_user(username, password)
 
-        if not access_token:
+        if not token or not token.get("access_token"):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid username or password",
             )
 
-        return TokenResponse(access_token=access_token)
+        return TokenResponse.from_keycloak(token)
+
+    async def refresh(refresh_token: str = Form(...)) -> TokenResponse:
+        """
+        Exchange a refresh token for a new access token.
+
+        Args:
+            refresh_token (str): The refresh token returned by login or a previous refresh.
+
+        Raises:
+            HTTPException: If the refresh token is invalid or expired.
+
+        Returns:
+            TokenResponse: Contains the new access and refresh tokens.
+        """
+        token = await AuthService.refresh_token(refresh_token)
+        return TokenResponse.from_keycloak(token)
 
-    def protected_endpoint(
-        credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
-        required_role: str = None  # Optional parameter to enforce role-based access
+    def get_principal(
+        request: Request,
+        credentials: HTTPAuthorizationCredentials = Security(bearer_scheme),
     ) -> UserInfo:
         """
-        Access a protected resource that requires valid token authentication.
+        Request-scoped principal: verify the bearer token at most once per request.
+
+        FastAPI caches a dependency's result for the rest of the request, and the verified
+        user is also kept on `request.state.principal`, so every route, role check and
+        operation sees the same UserInfo without decoding the token again. The time spent
+        verifying is recorded on `request.state.auth_seconds`.
 
         Args:
+            request (Request): The incoming request.
             credentials (HTTPAuthorizationCredentials): Bearer token provided via HTTP Authorization header.
 
         Raises:
@@ -53,11 +77,16 @@ class AuthController:
         Returns:
             UserInfo: Information about the authenticated user.
         """
-        # Extract the bearer token from the provided credentials
-        token = credentials.credentials
+        principal = getattr(request.state, "principal", None)
+        if principal is not None:
+            return principal
 
-        # Verify the token and get user information
-        user_info = AuthService.verify_token(token)
+        started = time.perf_counter()
+        try:
+            # Verify the token and get user information
+            user_info = AuthService.verify_token(credentials.credentials)
+        finally:
+            request.state.auth_seconds = time.perf_counter() - started
 
         if not user_info:
             raise HTTPException(
@@ -66,13 +95,32 @@ class AuthController:
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        # If a role is required, enforce role-based access
-        if required_role and required_role not in user_info.roles:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"***Access denied. Requires '{required_role}'.",
-        )
+        request.state.principal = user_info
         return user_info
-    
 
-    
\ No newline at end of file
+    def require_user(required_role: str = None):
+        """
+        Build a Security dependency that authenticates the request, and optionally enforces a role.
+
+        Declared ahead of DBSessionDep in a route, it rejects missing, invalid or expired tokens
+        before a database session is created for the request. All role dependencies share
+        get_principal, so the token is verified once however many of them a request uses.
+
+        Args:
+            required_role (str): Optional realm role the user must have.
+
+        Returns:
+            Callable: Dependency returning the authenticated user's UserInfo.
+        """
+        def authenticated_user(
+            user_info: UserInfo = Security(AuthController.get_principal),
+        ) -> UserInfo:
+            # If a role is required, enforce role-based access
+            if required_role and not user_info.has_role(required_role):
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail=f"***Access denied. Requires '{required_role}'.",
+                )
+            return user_info
+
+        return authenticated_user
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, List, Dict
+from pydantic import BaseModel, PrivateAttr
+from typing import Optional, List
 
 class TokenRequest(BaseModel):
     username: str
@@ -9,6 +9,18 @@ class TokenRequest(BaseModel):
 class TokenResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    expires_in: Optional[int] = None
+    refresh_token: Optional[str] = None
+    refresh_expires_in: Optional[int] = None
+
+    @classmethod
+    def from_keycloak(cls, token: dict) -> "TokenResponse":
+        return cls(
+            access_token=token["access_token"],
+            expires_in=token.get("expires_in"),
+            refresh_token=token.get("refresh_token"),
+            refresh_expires_in=token.get("refresh_expires_in"),
+        )
 
 
 class UserInfo(BaseModel):
@@ -18,5 +30,13 @@ class UserInfo(BaseModel):
     first_name: str
     last_name: str
     roles: List
+    _role_set: frozenset = PrivateAttr(default=frozenset())
+
+    def model_post_init(self, __context):
+        self._role_set = frozenset(self.roles)
+
+    # Role checks are set lookups against the roles captured when the token was verified
+    def has_role(self, role: str) -> bool:
+        return role in self._role_set
 
 
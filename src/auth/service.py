@@ -1,15 +1,110 @@
+import base64
+import json
+import threading
 import time
+from typing import Optional
 
-from fastapi import HTTPException, status, Security
-from keycloak.exceptions import KeycloakAuthenticationError
+import httpx
+from fastapi import HTTPException, status
+from jwcrypto import jwk
+from keycloak.exceptions import KeycloakAuthenticationError, KeycloakConnectionError, KeycloakGetError
+from core.cache import TTLCache
 from core.config import settings
+from core.resilience import Dependency, DependencyUnavailable
+from core.tracing import traced
 from auth.models import UserInfo
 from keycloak import KeycloakOpenID, KeycloakOpenIDConnection, KeycloakAdmin
 from modules.user.user_schema import UserCreate, UserUpdate
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 
-bearer_scheme = HTTPBearer()
+# Minimum seconds between key set refetches triggered by an unknown key id
+MIN_REFRESH_INTERVAL = 10
+
+
+'''
+Cached copy of the realm's token signing keys (JWKS).
+decode_token downloads the certs on every call unless it is given a key, so the
+key set is kept for `ttl` seconds and refetched early when a token is signed
+with a key id we have not seen yet (Keycloak key rotation).
+'''
+class SigningKeys:
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.fetched_at: Optional[float] = None
+        self._keys: Optional[jwk.JWKSet] = None
+        self._lock = threading.Lock()
+
+    # Seconds since the key set was last downloaded, None if it never was
+    def age(self) -> Optional[float]:
+        if self.fetched_at is None:
+            return None
+        return time.monotonic() - self.fetched_at
+
+    def get(self, openid: KeycloakOpenID, kid: Optional[str] = None) -> jwk.JWKSet:
+        keys = self._keys
+        if keys is None or self._is_stale(keys, kid):
+            with self._lock:
+                # Another thread may have refreshed the keys while we waited for the lock
+                if self._keys is not keys and self._keys is not None:
+                    return self._keys
+                try:
+                    certs = keycloak_dependency.call_sync(openid.certs)
+                except Exception:
+                    # Keep verifying with the keys we have while Keycloak is unreachable
+                    if keys is None:
+                        raise
+                    return keys
+                keys = jwk.JWKSet()
+                for cert in certs["keys"]:
+                    keys.add(jwk.JWK(**cert))
+                self._keys = keys
+                self.fetched_at = time.monotonic()
+        return keys
+
+    def _is_stale(self, keys: jwk.JWKSet, kid: Optional[str]) -> bool:
+        age = self.age()
+        if age >= self.ttl:
+            return True
+        return kid is not None and age >= MIN_REFRESH_INTERVAL and keys.get_key(kid) is None
+
+
+# Key id from the token header, without verifying anything yet
+def token_key_id(token: str) -> Optional[str]:
+    try:
+        header = token.split(".", 1)[0]
+        return json.loads(base64.urlsafe_b64decode(header + "=" * (-len(header) % 4))).get("kid")
+    except (ValueError, AttributeError):
+        return None
+
+
+# Errors Keycloak returns for a bad request (wrong password, unknown user) say nothing about its health
+def is_keycloak_failure(e: BaseException) -> bool:
+    code = getattr(e, "response_code", None)
+    return not (code is not None and 400 <= code < 500)
+
+
+keycloak_dependency = Dependency(
+    "Keycloak",
+    timeout=settings.get_config()["keycloak_timeout"],
+    max_concurrency=settings.get_config()["keycloak_max_concurrency"],
+    failure_threshold=settings.get_config()["circuit_failure_threshold"],
+    reset_timeout=settings.get_config()["circuit_reset_timeout"],
+    is_failure=is_keycloak_failure,
+)
+
+signing_keys = SigningKeys(settings.get_config()["keycloak_jwks_ttl"])
+
+# Pooled async client for token endpoint calls that do not need the blocking Keycloak client
+keycloak_http = httpx.AsyncClient(
+    base_url=settings.get_config()["keycloak_server_url"].rstrip("/"),
+    timeout=settings.get_config()["keycloak_timeout"],
+    limits=httpx.Limits(max_connections=settings.get_config()["keycloak_max_concurrency"]),
+)
+
+# Realm role representations by role name, they only change when an admin edits the realm
+realm_role_cache = TTLCache(settings.get_config()["keycloak_role_cache_ttl"], max_size=256)
+
 
 class AuthService:
 
@@ -19,6 +114,7 @@ class AuthService:
         realm_name=settings.get_config()["keycloak_realm"],
         client_id=settings.get_config()["keycloak_api_client_id"],
         client_secret_key=settings.get_config()["keycloak_api_secret"],
+        timeout=settings.get_config()["keycloak_timeout"],
     )
 
     # Keycloak Admin (For User Management)
@@ -30,29 +126,67 @@ class AuthService:
         client_id=settings.get_config()["keycloak_api_client_id"],
         client_secret_key=settings.get_config()["keycloak_api_secret"],
         verify=True,
+        timeout=settings.get_config()["keycloak_timeout"],
     )
     keycloak_admin = KeycloakAdmin(connection=keycloak_admin_connection)
 
-    # Checks username and password against Keycloak DB and return JWT
-    def authenticate_user(username: str, password: str) -> str:
+    # Checks username and password against Keycloak DB and return the token response
+    @traced("AuthService.authenticate_user")
+    async def authenticate_user(username: str, password: str) -> dict:
         """
-        Authenticate the user using Keycloak and return an access token.
+        Authenticate the user using Keycloak and return the access and refresh tokens.
         """
         try:
-            token = AuthService.keycloak_openid.token(username, password)
-            return token["access_token"]
+            return await keycloak_dependency.call(AuthService.keycloak_openid.token, username, password)
         except KeycloakAuthenticationError as e:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid username or password",
             )
+        except KeycloakConnectionError:
+            raise DependencyUnavailable("Keycloak", "connection failed")
+
+    # Exchanges a refresh token for new tokens, without the password grant's hash check
+    @traced("AuthService.refresh_token")
+    async def refresh_token(refresh_token: str) -> dict:
+        """
+        Get new access and refresh tokens from Keycloak using a refresh token.
+        """
+        async def post_refresh_grant() -> httpx.Response:
+            response = await keycloak_http.post(
+                f"/realms/{settings.get_config()['keycloak_realm']}/protocol/openid-connect/token",
+                data={
+                    "grant_type": "refresh_token",
+                    "refresh_token": refresh_token,
+                    "client_id": settings.get_config()["keycloak_api_client_id"],
+                    "client_secret": settings.get_config()["keycloak_api_secret"],
+                },
+            )
+            # Only server errors count against the circuit breaker
+            if response.status_code >= 500:
+                response.raise_for_status()
+            return response
+
+        try:
+            response = await keycloak_dependency.call_async(post_refresh_grant)
+        except (httpx.TransportError, httpx.HTTPStatusError):
+            raise DependencyUnavailable("Keycloak", "token refresh failed")
+
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired refresh token",
+            )
+        return response.json()
 
     # Verifies token against Keycloak and UserInfo model and returns user info
+    @traced("AuthService.verify_token")
     def verify_token(token: str) -> UserInfo:
         try:
             token_info = AuthService.keycloak_openid.decode_token(
                 token,
                 validate=True,
+                key=signing_keys.get(AuthService.keycloak_openid, token_key_id(token)),
             )
             # Check if the token is expired
             if token_info["exp"] < int(time.time()):
@@ -76,6 +210,8 @@ class AuthService:
             )
 
             return this_user
+        except DependencyUnavailable:
+            raise
         except Exception:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -83,7 +219,8 @@ class AuthService:
             )
 
     # Register a new user in Keycloak
-    def register_kc_user(user: UserCreate):
+    @traced("AuthService.register_kc_user")
+    async def register_kc_user(user: UserCreate):
         """
         Register a new user in Keycloak.
         """
@@ -101,8 +238,10 @@ class AuthService:
         }
 
         try:
-            kc_user_id = AuthService.keycloak_admin.create_user(user_representation)
+            kc_user_id = await keycloak_dependency.call(AuthService.keycloak_admin.create_user, user_representation)
             return kc_user_id
+        except DependencyUnavailable:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=400, detail=f"Error creating user: {str(e)}"
@@ -110,7 +249,18 @@ class AuthService:
 
             
 
-    def update_kc_user(user: UserUpdate):
+    # Keycloak ID of a user, uses the ID stored with the user and only looks it up by email when missing
+    @traced("AuthService.get_kc_user_id")
+    async def get_kc_user_id(user) -> str:
+        if user.kc_id:
+            return user.kc_id
+        user_id = await keycloak_dependency.call(AuthService.keycloak_admin.get_user_id, username=user.email)
+        if not user_id:
+            raise HTTPException(status_code=404, detail="Keycloak user not found")
+        return user_id
+
+    @traced("AuthService.update_kc_user")
+    async def update_kc_user(user: UserUpdate):
 
         user_representation = {
             "username": user.email,
@@ -120,17 +270,21 @@ class AuthService:
         }
 
         try:
-            user_id = AuthService.keycloak_admin.get_user_id(username=user.email)
-            AuthService.keycloak_admin.update_user(
+            user_id = await AuthService.get_kc_user_id(user)
+            await keycloak_dependency.call(
+                AuthService.keycloak_admin.update_user,
                 user_id=user_id, payload=user_representation
             )
             return {"message": "User updated successfully"}
+        except DependencyUnavailable:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=500, detail=f"Error updating user: {str(e)}"
             )
         
-    def update_kc_user_password(kc_id: str, new_password: str):
+    @traced("AuthService.update_kc_user_password")
+    async def update_kc_user_password(kc_id: str, new_password: str):
         """
         Update the password of a user in Keycloak.
         Args:
@@ -138,69 +292,84 @@ class AuthService:
             new_password (str): The new password to set for the user.
         """
         try:
-            AuthService.keycloak_admin.set_user_password(
+            await keycloak_dependency.call(
+                AuthService.keycloak_admin.set_user_password,
                 user_id=kc_id, password=new_password, temporary=False
             )
             return {"message": "Password updated successfully"}
+        except DependencyUnavailable:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=500, detail=f"Error updating password: {str(e)}"
             )
 
-    def delete_kc_user(user_email):
+    @traced("AuthService.delete_kc_user")
+    async def delete_kc_user(user):
         try:
-            user_id = AuthService.keycloak_admin.get_user_id(username=user_email)
-            AuthService.keycloak_admin.delete_user(user_id=user_id)
+            user_id = await AuthService.get_kc_user_id(user)
+            await keycloak_dependency.call(AuthService.keycloak_admin.delete_user, user_id=user_id)
             return {"message": "User deleted successfully"}
+        except DependencyUnavailable:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=500, detail=f"Error deleting user: {str(e)}"
             )
 
-    def get_current_user(
-        credentials: HTTPAuthorizationCredentials = Security(bearer_scheme),
-    ) -> UserInfo:
-        """Extract and verify the token to retrieve user info."""
-        token = credentials.credentials
-        user_info = AuthService.verify_token(token)
-
-        if not user_info:
-            raise HTTPException(status_code=401, detail="Invalid or expired token")
+    @traced("AuthService.get_realm_role")
+    async def get_realm_role(role_name: str) -> dict:
+        """
+        Get a realm role representation, cached for KEYCLOAK_ROLE_CACHE_TTL seconds.
+        """
+        role_object = realm_role_cache.get(role_name)
+        if role_object is None:
+            try:
+                role_object = await keycloak_dependency.call(AuthService.keycloak_admin.get_realm_role, role_name)
+            except KeycloakGetError as e:
+                if e.response_code == 404:
+                    raise HTTPException(
+                        status_code=404, detail=f"Role '{role_name}' not found"
+                    )
+                raise
+            realm_role_cache.set(role_name, role_object)
+        return role_object
 
-        return user_info
-    
-    def add_role_to_user(user_id: str, role_name: str):
+    @traced("AuthService.add_role_to_user")
+    async def add_role_to_user(user_id: str, role_name: str):
         """
         Add a role to a user in Keycloak.
         """
         try:
-            # Check if the role exists
-            roles = AuthService.keycloak_admin.get_realm_roles()
-            role_object = next(
-                (role for role in roles if role["name"] == role_name), None
-            )
-            if not role_object:
-                raise HTTPException(
-                    status_code=404, detail=f"Role '{role_name}' not found"
-                )
+            role_object = await AuthService.get_realm_role(role_name)
             # Assign the role to the user
-            AuthService.keycloak_admin.assign_realm_roles(
+            await keycloak_dependency.call(
+                AuthService.keycloak_admin.assign_realm_roles,
                 user_id=user_id, roles=[role_object]
             )
             
             return {"message": "Role added successfully"}
+        except DependencyUnavailable:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=500, detail=f"Error adding role to user: {str(e)}"
             )
         
-    def remove_role_from_user(user_id: str, role_name: str):
+    @traced("AuthService.remove_role_from_user")
+    async def remove_role_from_user(user_id: str, role_name: str):
         """
         Remove a role from a user in Keycloak.
         """
         try:
-            AuthService.keycloak_admin.delete_realm_roles_of_user(user_id=user_id, roles=[role_name])
+            role_object = await AuthService.get_realm_role(role_name)
+            await keycloak_dependency.call(
+                AuthService.keycloak_admin.delete_realm_roles_of_user,
+                user_id=user_id, roles=[role_object]
+            )
             return {"message": "Role removed successfully"}
+        except DependencyUnavailable:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=500, detail=f"Error removing role from user: {str(e)}"
@@ -61,6 +61,43 @@ class BaseSettings(TypedDict):
     mail_tls: bool
     mail_ssl: bool
     use_credentials: bool
+    service_catalog_check_interval: float
+    principal_cache_ttl: float
+    user_typeahead_index: bool
+    user_typeahead_max_mb: int
+    user_typeahead_rebuild_interval: float
+    keycloak_jwks_ttl: float
+    keycloak_role_cache_ttl: float
+    keycloak_timeout: float
+    keycloak_max_concurrency: int
+    smtp_timeout: float
+    smtp_max_concurrency: int
+    circuit_failure_threshold: int
+    circuit_reset_timeout: float
+    rate_limit_window: float
+    login_rate_limit_per_ip: int
+    login_rate_limit_per_account: int
+    registration_rate_limit_per_ip: int
+    registration_rate_limit_per_account: int
+    metrics_enabled: bool
+    metrics_db_timings: bool
+    metrics_dir: str
+    metrics_write_interval: float
+    tracing_enabled: bool
+    tracing_sample_ratio: float
+    tracing_exporter: str
+    tracing_file: str
+    profiling_enabled: bool
+    profile_interval: float
+    profile_dir: str
+    profile_keep: int
+    profile_sampler_interval: float
+    profile_sampler_window: float
+    db_pool_size: int
+    db_max_overflow: int
+    readiness_db_timeout: float
+    readiness_min_pool_headroom: int
+    readiness_max_loop_lag: float
 
 class Settings:
     def __init__(self):
@@ -99,6 +136,44 @@ class Settings:
             "mail_tls": self.check_boolean(os.getenv("MAIL_TLS")),
             "mail_ssl": self.check_boolean(os.getenv("MAIL_SSL")),
             "use_credentials": self.check_boolean(os.getenv("USE_CREDENTIALS")),
+            # Optional settings
+            "service_catalog_check_interval": float(os.getenv("SERVICE_CATALOG_CHECK_INTERVAL", "1.0")),
+            "principal_cache_ttl": float(os.getenv("PRINCIPAL_CACHE_TTL", "30")),
+            "user_typeahead_index": self.check_boolean(os.getenv("USER_TYPEAHEAD_INDEX", "false")),
+            "user_typeahead_max_mb": int(os.getenv("USER_TYPEAHEAD_MAX_MB", "256")),
+            "user_typeahead_rebuild_interval": float(os.getenv("USER_TYPEAHEAD_REBUILD_INTERVAL", "300")),
+            "keycloak_jwks_ttl": float(os.getenv("KEYCLOAK_JWKS_TTL", "300")),
+            "keycloak_role_cache_ttl": float(os.getenv("KEYCLOAK_ROLE_CACHE_TTL", "300")),
+            "keycloak_timeout": float(os.getenv("KEYCLOAK_TIMEOUT", "5")),
+            "keycloak_max_concurrency": int(os.getenv("KEYCLOAK_MAX_CONCURRENCY", "16")),
+            "smtp_timeout": float(os.getenv("SMTP_TIMEOUT", "10")),
+            "smtp_max_concurrency": int(os.getenv("SMTP_MAX_CONCURRENCY", "4")),
+            "circuit_failure_threshold": int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")),
+            "circuit_reset_timeout": float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30")),
+            "rate_limit_window": float(os.getenv("RATE_LIMIT_WINDOW", "60")),
+            "login_rate_limit_per_ip": int(os.getenv("LOGIN_RATE_LIMIT_PER_IP", "30")),
+            "login_rate_limit_per_account": int(os.getenv("LOGIN_RATE_LIMIT_PER_ACCOUNT", "5")),
+            "registration_rate_limit_per_ip": int(os.getenv("REGISTRATION_RATE_LIMIT_PER_IP", "10")),
+            "registration_rate_limit_per_account": int(os.getenv("REGISTRATION_RATE_LIMIT_PER_ACCOUNT", "3")),
+            "metrics_enabled": self.check_boolean(os.getenv("METRICS_ENABLED", "true")),
+            "metrics_db_timings": self.check_boolean(os.getenv("METRICS_DB_TIMINGS", "true")),
+            "metrics_dir": os.getenv("METRICS_DIR", ""),
+            "metrics_write_interval": float(os.getenv("METRICS_WRITE_INTERVAL", "5")),
+            "tracing_enabled": self.check_boolean(os.getenv("TRACING_ENABLED", "false")),
+            "tracing_sample_ratio": float(os.getenv("TRACING_SAMPLE_RATIO", "1.0")),
+            "tracing_exporter": os.getenv("TRACING_EXPORTER", "otlp"),
+            "tracing_file": os.getenv("TRACING_FILE", "traces.jsonl"),
+            "profiling_enabled": self.check_boolean(os.getenv("PROFILING_ENABLED", "false")),
+            "profile_interval": float(os.getenv("PROFILE_INTERVAL", "0.001")),
+            "profile_dir": os.getenv("PROFILE_DIR", "profiles"),
+            "profile_keep": int(os.getenv("PROFILE_KEEP", "100")),
+            "profile_sampler_interval": float(os.getenv("PROFILE_SAMPLER_INTERVAL", "0")),
+            "profile_sampler_window": float(os.getenv("PROFILE_SAMPLER_WINDOW", "60")),
+            "db_pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+            "db_max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+            "readiness_db_timeout": float(os.getenv("READINESS_DB_TIMEOUT", "1")),
+            "readiness_min_pool_headroom": int(os.getenv("READINESS_MIN_POOL_HEADROOM", "1")),
+            "readiness_max_loop_lag": float(os.getenv("READINESS_MAX_LOOP_LAG", "0.25")),
         }
     
     def get_mail_config(self) -> ConnectionConfig:
@@ -118,6 +193,9 @@ class Settings:
         return value.lower() == "true"
     
     def get_database_url(self) -> str:
+        # Optional override, e.g. an SQLite database for offline benchmarks
+        if os.getenv("DATABASE_URL"):
+            return os.getenv("DATABASE_URL")
         return f"mysql+aiomysql://{os.getenv('MYSQL_USER')}:{os.getenv('MYSQL_PASSWORD')}@{os.getenv('MYSQL_HOST')}:{os.getenv('MYSQL_PORT')}/{os.getenv('MYSQL_DB')}"
     
 
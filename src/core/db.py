@@ -3,6 +3,9 @@ from typing import Any, AsyncIterator, Iterator
 
 
 from core.config import settings
+from core.metrics import instrument_engine, timed_execution
+from core.statement_hooks import hook_statement_execution
+from core.tracing import traced_execution
 from sqlalchemy.ext.asyncio import (
     AsyncConnection,
     AsyncSession,
@@ -16,9 +19,9 @@ from sqlalchemy.orm import Session, sessionmaker
 
 
 class AsyncDatabaseSessionManager:
-    def __init__(self, host: str, engine_kwargs: dict[str, Any] = {}):
+    def __init__(self, host: str, engine_kwargs: dict[str, Any] = {}, session_kwargs: dict[str, Any] = {}):
         self._engine = create_async_engine(host, **engine_kwargs)
-        self._sessionmaker = async_sessionmaker(autocommit=False, bind=self._engine)
+        self._sessionmaker = async_sessionmaker(autocommit=False, bind=self._engine, **session_kwargs)
 
     async def close(self):
         if self._engine is None:
@@ -45,6 +48,8 @@ class AsyncDatabaseSessionManager:
         if self._sessionmaker is None:
             raise Exception("DatabaseSessionManager is not initialized")
 
+        # AsyncSession only checks a connection out of the pool on its first query,
+        # so requests rejected before touching the database never hold a connection
         session = self._sessionmaker()
         try:
             yield session
@@ -55,10 +60,31 @@ class AsyncDatabaseSessionManager:
             await session.close()
 
 
+# Objects keep their loaded state after commit, so a write can return what it just
+# wrote without refreshing it. Server-generated columns are fetched at flush time
+# (eager_defaults on the model) instead.
 async_session_manager = AsyncDatabaseSessionManager(
-    settings.get_database_url(), {"echo": settings.get_config()["mysql_echo"]}
+    settings.get_database_url(),
+    {
+        "echo": settings.get_config()["mysql_echo"],
+        "pool_size": settings.get_config()["db_pool_size"],
+        "max_overflow": settings.get_config()["db_max_overflow"],
+    },
+    {"expire_on_commit": False},
 )
 
+# Pool usage for /metrics, and the statement spans and timings that are turned on
+if settings.get_config()["metrics_enabled"]:
+    instrument_engine(async_session_manager._engine)
+hook_statement_execution(async_session_manager._engine, [
+    wrapper
+    for wrapper, enabled in (
+        (traced_execution, settings.get_config()["tracing_enabled"]),
+        (timed_execution, settings.get_config()["metrics_enabled"] and settings.get_config()["metrics_db_timings"]),
+    )
+    if enabled
+])
+
 
 async def get_async_db_session():
     async with async_session_manager.session() as session:
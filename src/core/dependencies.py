@@ -1,7 +1,15 @@
 from typing import Annotated
 
+from auth.controller import AuthController
+from auth.models import UserInfo
 from core.db import get_async_db_session
-from fastapi import Depends
+from fastapi import Depends, Security
 from sqlalchemy.ext.asyncio import AsyncSession
 
-DBSessionDep = Annotated[AsyncSession, Depends(get_async_db_session)]
\ No newline at end of file
+DBSessionDep = Annotated[AsyncSession, Depends(get_async_db_session)]
+
+# Authentication dependencies. Declare them before DBSessionDep so unauthorized
+# requests are rejected before a database session is created.
+CurrentUserDep = Annotated[UserInfo, Security(AuthController.require_user())]
+BarberUserDep = Annotated[UserInfo, Security(AuthController.require_user("barber"))]
+AdminUserDep = Annotated[UserInfo, Security(AuthController.require_user("admin"))]
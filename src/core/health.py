@@ -0,0 +1,133 @@
+import asyncio
+import time
+from typing import Any, Optional
+
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+from auth.service import AuthService, signing_keys
+from core.config import settings
+from core.db import async_session_manager
+from core.resilience import dependencies
+from operations.user_operations import user_typeahead_index
+
+'''
+Readiness checks behind /readyz. Each check reports its numbers and whether the
+worker can serve traffic, so a load balancer drains a saturated worker before its
+requests start timing out. Only conditions local to the worker fail readiness: a
+Keycloak outage shows in every worker's circuit state, draining all of them would
+only turn slow answers into no answers.
+'''
+
+
+def milliseconds(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+# Time for the event loop to come back to this task, how far behind it is on callbacks and I/O
+async def check_event_loop() -> dict[str, Any]:
+    started = time.perf_counter()
+    await asyncio.sleep(0)
+    lag = time.perf_counter() - started
+    return {
+        "ok": lag <= settings.get_config()["readiness_max_loop_lag"],
+        "lag_ms": milliseconds(lag),
+        "tasks": len(asyncio.all_tasks()),
+    }
+
+
+# Connections in use against the pool's size plus overflow
+def check_pool() -> dict[str, Any]:
+    pool = async_session_manager._engine.sync_engine.pool
+    if not hasattr(pool, "checkedout"):
+        # Pools without a fixed size (SQLite in memory, NullPool) never run out
+        return {"ok": True}
+    capacity = pool.size() + settings.get_config()["db_max_overflow"]
+    headroom = capacity - pool.checkedout()
+    return {
+        "ok": headroom >= settings.get_config()["readiness_min_pool_headroom"],
+        "checked_out": pool.checkedout(),
+        "capacity": capacity,
+        "headroom": headroom,
+    }
+
+
+# SELECT 1 including the wait for a pooled connection, bounded by READINESS_DB_TIMEOUT
+async def check_database() -> dict[str, Any]:
+    started = time.perf_counter()
+    try:
+        async with asyncio.timeout(settings.get_config()["readiness_db_timeout"]):
+            async with async_session_manager._engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+    except TimeoutError:
+        return {"ok": False, "latency_ms": milliseconds(time.perf_counter() - started), "error": "timed out"}
+    except Exception as e:
+        return {"ok": False, "latency_ms": milliseconds(time.perf_counter() - started), "error": type(e).__name__}
+    return {"ok": True, "latency_ms": milliseconds(time.perf_counter() - started)}
+
+
+# Signing keys tokens are verified with. A stale key set is refetched here, so a worker
+# that has verified no token yet has its keys before traffic arrives. While Keycloak is
+# unreachable the old keys keep working, only having no keys at all fails the check.
+async def check_signing_keys() -> dict[str, Any]:
+    error = None
+    age = signing_keys.age()
+    if age is None or age >= signing_keys.ttl:
+        try:
+            await run_in_threadpool(signing_keys.get, AuthService.keycloak_openid)
+        except Exception as e:
+            error = type(e).__name__
+        age = signing_keys.age()
+    result = {
+        "ok": age is not None,
+        "age_seconds": None if age is None else round(age, 1),
+        "fresh": age is not None and age < signing_keys.ttl,
+    }
+    if error is not None:
+        result["error"] = error
+    return result
+
+
+# Bulkhead occupancy and circuit state of each external dependency, a full bulkhead
+# rejects every further call from this worker
+def check_dependencies() -> dict[str, Any]:
+    checks = {}
+    for name, dependency in dependencies.items():
+        stats = dependency.stats()
+        checks[name] = {
+            "ok": stats["in_flight"] < dependency.max_concurrency,
+            "in_flight": stats["in_flight"],
+            "max_concurrency": dependency.max_concurrency,
+            "circuit": stats["state"],
+        }
+    return checks
+
+
+# How far the periodic typeahead rebuild is behind schedule. Search falls back to
+# FULLTEXT without the index, so this never fails readiness.
+def check_typeahead_index() -> dict[str, Any]:
+    if not user_typeahead_index.enabled:
+        return {"ok": True, "enabled": False}
+    age = user_typeahead_index.age()
+    result = {"ok": True, "enabled": True, "ready": user_typeahead_index.ready, "age_seconds": None if age is None else round(age, 1)}
+    if age is not None and user_typeahead_index.rebuild_interval > 0:
+        result["rebuild_lag_seconds"] = round(max(0.0, age - user_typeahead_index.rebuild_interval), 1)
+    return result
+
+
+async def readiness() -> dict[str, Any]:
+    # First, before the other checks add their own work to the loop
+    event_loop = await check_event_loop()
+    pool = check_pool()
+    database, jwks = await asyncio.gather(check_database(), check_signing_keys())
+    checks = {
+        "database": database,
+        "pool": pool,
+        "jwks": jwks,
+        "event_loop": event_loop,
+        "dependencies": check_dependencies(),
+        "typeahead_index": check_typeahead_index(),
+    }
+    ready = all(check["ok"] for check in (database, pool, jwks, event_loop)) and all(
+        check["ok"] for check in checks["dependencies"].values()
+    )
+    return {"ready": ready, "checks": checks}
@@ -0,0 +1,388 @@
+import asyncio
+import bisect
+import os
+import time
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from core.statement_hooks import statement_kind
+
+# Latency buckets in seconds, from a cached lookup up to a dependency timing out
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in zip(names, values)) + "}"
+
+
+# Render one metric family from (label values, value) samples
+def render_family(name: str, kind: str, documentation: str, label_names: tuple, samples: Iterable[tuple]) -> Iterator[str]:
+    yield f"# HELP {name} {documentation}"
+    yield f"# TYPE {name} {kind}"
+    for label_values, value in samples:
+        yield f"{name}{format_labels(label_names, label_values)} {value}"
+
+
+class MetricsRegistry:
+    '''
+    Every metric of the process, rendered in the Prometheus text format by /metrics.
+    Metrics record into plain dicts and lists as requests run, collectors are called
+    at scrape time for values that already live elsewhere (pool usage, circuit
+    breakers, rate limiters), so the request path never pays for them.
+    Updates are not locked: the event loop is single threaded and the rare update
+    from a worker thread can at worst lose one increment.
+    '''
+
+    def __init__(self):
+        self._metrics: list = []
+        self._collectors: list[Callable[[], Iterable[str]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+
+    def register_collector(self, collector: Callable[[], Iterable[str]]):
+        self._collectors.append(collector)
+
+    def lines(self) -> list[str]:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return lines
+
+    def render(self) -> bytes:
+        return "\n".join(self.lines() + [""]).encode()
+
+
+registry = MetricsRegistry()
+
+
+class Counter:
+
+    def __init__(self, name: str, documentation: str, label_names: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._values: dict[tuple, float] = {}
+        registry.register(self)
+
+    def inc(self, *label_values, amount: float = 1):
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def collect(self) -> Iterator[str]:
+        return render_family(self.name, "counter", self.documentation, self.label_names, self._values.items())
+
+
+class Gauge:
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self.value = 0
+        registry.register(self)
+
+    def inc(self):
+        self.value += 1
+
+    def dec(self):
+        self.value -= 1
+
+    def collect(self) -> Iterator[str]:
+        return render_family(self.name, "gauge", self.documentation, (), [((), self.value)])
+
+
+class Histogram:
+    '''
+    Latency histogram per label set. Each series keeps one count per bucket plus
+    the running sum, so an observation is a bisect and two increments. Counts are
+    made cumulative only when rendered.
+    '''
+
+    def __init__(self, name: str, documentation: str, label_names: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [count per bucket..., count above the last bucket, sum]
+        self._series: dict[tuple, list] = {}
+        registry.register(self)
+
+    def observe(self, value: float, *label_values):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def collect(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        bucket_names = self.label_names + ("le",)
+        for label_values, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                yield f"{self.name}_bucket{format_labels(bucket_names, label_values + (bound,))} {cumulative}"
+            labels = format_labels(self.label_names, label_values)
+            yield f"{self.name}_sum{labels} {series[-1]}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+http_request_seconds = Histogram(
+    "http_request_duration_seconds", "Time spent handling a request, by route template", ("method", "route")
+)
+http_requests_total = Counter("http_requests_total", "Responses sent, by route template and status", ("method", "route", "status"))
+http_requests_in_progress = Gauge("http_requests_in_progress", "Requests being handled")
+auth_verification_seconds = Histogram("auth_token_verification_seconds", "Time spent verifying a bearer token")
+db_query_seconds = Histogram("db_query_duration_seconds", "Time spent executing a statement", ("statement",))
+db_query_errors_total = Counter("db_query_errors_total", "Statements that raised a database error", ("statement",))
+dependency_call_seconds = Histogram(
+    "dependency_call_duration_seconds", "Time spent calling an external dependency", ("dependency", "outcome")
+)
+
+
+class MetricsMiddleware:
+    '''
+    Records the latency and status of every HTTP request, labelled with the route
+    template ("/api/v1/users/{user_id}") rather than the raw path so the number of
+    series stays bounded. Requests that matched no route share the "unmatched"
+    label. Also picks up the token verification time get_principal leaves on
+    `request.state.auth_seconds`.
+    Plain ASGI instead of BaseHTTPMiddleware, which would run every request through
+    an extra task and memory stream.
+    '''
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_progress.dec()
+            # The router stores the matched route on the scope it was handed
+            route = getattr(scope.get("route"), "path", "unmatched")
+            http_request_seconds.observe(elapsed, scope["method"], route)
+            http_requests_total.inc(scope["method"], route, status_code)
+            auth_seconds = scope.get("state", {}).get("auth_seconds")
+            if auth_seconds is not None:
+                auth_verification_seconds.observe(auth_seconds)
+
+
+# Statement wrapper for core/statement_hooks.py that times the DBAPI call
+def timed_execution(execute: Callable[..., Any]) -> Callable[..., Any]:
+    def run_timed(cursor, statement, *args):
+        started = time.perf_counter()
+        try:
+            execute(cursor, statement, *args)
+        except Exception:
+            db_query_errors_total.inc(statement_kind(statement))
+            raise
+        finally:
+            db_query_seconds.observe(time.perf_counter() - started, statement_kind(statement))
+    return run_timed
+
+
+# Report the engine's pool usage at scrape time
+def instrument_engine(engine: Any):
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    def collect_pool() -> Iterator[str]:
+        pool = sync_engine.pool
+        # Only queue pools have a fixed size and overflow
+        for name, method, documentation in (
+            ("db_pool_size", "size", "Connections the pool keeps open"),
+            ("db_pool_checked_out", "checkedout", "Connections currently checked out of the pool"),
+            ("db_pool_overflow", "overflow", "Connections open beyond the pool size, negative while the pool is filling"),
+        ):
+            if hasattr(pool, method):
+                yield from render_family(name, "gauge", documentation, (), [((), getattr(pool, method)())])
+
+    registry.register_collector(collect_pool)
+
+
+# Counters and states kept by the resilience, rate limit and single-flight layers
+def collect_runtime_stats() -> Iterator[str]:
+    from core.rate_limit import rate_limiters
+    from core.resilience import CLOSED, HALF_OPEN, OPEN, dependencies
+    from core.single_flight import read_flight
+
+    stats = {name: dependency.stats() for name, dependency in dependencies.items()}
+    labels = ("dependency",)
+    yield from render_family(
+        "dependency_in_flight", "gauge", "Calls to a dependency currently in flight (bulkhead occupancy)",
+        labels, [((name,), s["in_flight"]) for name, s in stats.items()],
+    )
+    for field, documentation in (
+        ("calls", "Calls made to a dependency"),
+        ("failures", "Calls that counted against the circuit breaker"),
+        ("timeouts", "Calls that timed out"),
+        ("rejected", "Calls rejected by an open circuit or a full bulkhead"),
+    ):
+        yield from render_family(
+            f"dependency_{field}_total", "counter", documentation, labels, [((name,), s[field]) for name, s in stats.items()]
+        )
+    yield from render_family(
+        "dependency_circuit_state", "gauge", "1 for the state each dependency's circuit breaker is in",
+        ("dependency", "state"),
+        [((name, state), int(s["state"] == state)) for name, s in stats.items() for state in (CLOSED, OPEN, HALF_OPEN)],
+    )
+
+    limiter_stats = {name: limiter.stats() for name, limiter in rate_limiters.items()}
+    for field in ("allowed", "rejected"):
+        yield from render_family(
+            f"rate_limit_{field}_total", "counter", f"Attempts {field} by a rate limiter", ("limiter",),
+            [((name,), s[field]) for name, s in limiter_stats.items()],
+        )
+
+    # Keys are "operation:page:limit", summed per operation so pagination does not add series.
+    # Least recently used keys are dropped from the stats, which reads as a counter reset.
+    flight_stats: dict[str, dict[str, int]] = {}
+    for key, s in read_flight.stats().items():
+        totals = flight_stats.setdefault(key.split(":", 1)[0], {"calls": 0, "executions": 0, "shared": 0})
+        for field in totals:
+            totals[field] += s[field]
+    for field, documentation in (
+        ("calls", "Coalescable reads requested"),
+        ("executions", "Coalescable reads that ran a query"),
+        ("shared", "Coalescable reads served by another request's query"),
+    ):
+        yield from render_family(
+            f"single_flight_{field}_total", "counter", documentation, ("operation",),
+            [((operation,), totals[field]) for operation, totals in flight_stats.items()],
+        )
+
+    # Request handlers and background workers (e.g. the typeahead rebuild) alive on the event loop
+    yield from render_family("event_loop_tasks", "gauge", "Tasks scheduled on the event loop", (), [((), len(asyncio.all_tasks()))])
+
+
+registry.register_collector(collect_runtime_stats)
+
+
+# Add a worker="<pid>" label to every sample line, metric names contain neither "{" nor spaces
+def label_worker(lines: Iterable[str], pid: int) -> Iterator[str]:
+    label = f'worker="{pid}"'
+    for line in lines:
+        if line.startswith("#"):
+            yield line
+            continue
+        name_end = min(index for index in (line.find("{"), line.find(" ")) if index >= 0)
+        if line[name_end] == "{":
+            yield f"{line[:name_end + 1]}{label},{line[name_end + 1:]}"
+        else:
+            yield f"{line[:name_end]}{{{label}}}{line[name_end:]}"
+
+
+# Merge the lines of several workers, each family's HELP and TYPE once followed by every worker's samples
+def merge_families(sources: Iterable[Iterable[str]]) -> list[str]:
+    families: dict[str, list[str]] = {}
+    for lines in sources:
+        family = None
+        header = False
+        for line in lines:
+            if line.startswith("# HELP "):
+                name = line.split(" ", 3)[2]
+                family = families.get(name)
+                if family is None:
+                    family = families[name] = [line]
+                    header = True
+                else:
+                    header = False
+            elif line.startswith("# TYPE "):
+                if header:
+                    family.append(line)
+            elif family is not None:
+                family.append(line)
+    return [line for family in families.values() for line in family]
+
+
+class WorkerMetrics:
+    '''
+    Lets one scrape of /metrics report every worker of a host. Each worker writes its
+    samples, labelled worker="<pid>", to `directory` every `interval` seconds, and the
+    worker that answers the scrape merges the other workers' latest files with its own
+    live samples. Sum over the worker label for host totals. Files not rewritten for
+    three intervals belong to workers that are gone and are skipped.
+    '''
+
+    def __init__(self, directory: str, interval: float):
+        self.directory = directory
+        self.interval = interval
+        self.enabled = bool(directory)
+        self._task: Optional[asyncio.Task] = None
+
+    # Start writing this worker's samples, call from the event loop
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._task = asyncio.create_task(self._write_periodically())
+
+    def stop(self):
+        self._task.cancel()
+        try:
+            os.remove(self._path(os.getpid()))
+        except FileNotFoundError:
+            pass
+
+    def render(self) -> bytes:
+        sources = [label_worker(registry.lines(), os.getpid()), *self._read_others()]
+        return "\n".join(merge_families(sources) + [""]).encode()
+
+    # Write then rename, so a scrape never reads half a file
+    def write(self, text: str):
+        path = self._path(os.getpid())
+        with open(path + ".tmp", "w") as file:
+            file.write(text)
+        os.replace(path + ".tmp", path)
+
+    async def _write_periodically(self):
+        while True:
+            # Samples are read on the event loop, only the file is written in a thread
+            await asyncio.to_thread(self.write, "\n".join(label_worker(registry.lines(), os.getpid())))
+            await asyncio.sleep(self.interval)
+
+    def _read_others(self) -> Iterator[list[str]]:
+        pid = os.getpid()
+        cutoff = time.time() - 3 * self.interval
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            name, extension = os.path.splitext(entry.name)
+            if extension != ".prom" or not name.isdigit() or int(name) == pid:
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    continue
+                with open(entry.path) as file:
+                    yield file.read().splitlines()
+            except FileNotFoundError:
+                # The worker exited between listing and reading
+                continue
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"{pid}.prom")
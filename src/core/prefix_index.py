@@ -0,0 +1,117 @@
+import heapq
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable, List, Tuple
+
+# Approximate per-entry overhead on top of the key string: list slot + array slot
+ENTRY_OVERHEAD_BYTES = 16
+
+# Entries are sorted in chunks of this size and merged. A single sort of every entry holds
+# the GIL for seconds, chunks keep the event loop responsive while a worker thread builds.
+SORT_CHUNK_SIZE = 10000
+
+class IndexBudgetExceeded(Exception):
+    pass
+
+
+class PrefixIndex:
+    '''
+    In-process prefix index for typeahead lookups.
+    Keys are kept in one sorted list with their ids in a parallel array, so a lookup
+    is a binary search followed by a short scan over the matching range. Keys must be
+    normalized by the caller. The index refuses to grow past `max_bytes`.
+    '''
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._keys: List[str] = []
+        self._ids = array("q")
+        self._bytes = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    # Replace the whole index with the given (key, id) pairs.
+    # Keys and ids are kept in flat lists and sorted as positions rather than as (key, id)
+    # tuples, which would leave the garbage collector a million objects to scan.
+    def build(self, entries: Iterable[Tuple[str, int]]):
+        keys: List[str] = []
+        ids = array("q")
+        total = 0
+        for key, item_id in entries:
+            total += sys.getsizeof(key) + ENTRY_OVERHEAD_BYTES
+            if total > self.max_bytes:
+                raise IndexBudgetExceeded(
+                    f"Prefix index exceeds its memory budget of {self.max_bytes} bytes"
+                )
+            keys.append(key)
+            ids.append(item_id)
+
+        chunks = [
+            sorted(range(start, min(start + SORT_CHUNK_SIZE, len(keys))), key=keys.__getitem__)
+            for start in range(0, len(keys), SORT_CHUNK_SIZE)
+        ]
+        sorted_keys: List[str] = []
+        sorted_ids = array("q")
+        for position in heapq.merge(*chunks, key=keys.__getitem__):
+            sorted_keys.append(keys[position])
+            sorted_ids.append(ids[position])
+        self._keys = sorted_keys
+        self._ids = sorted_ids
+        self._bytes = total
+
+    # Keys the item is already stored under are skipped
+    def add(self, item_id: int, keys: Iterable[str]):
+        for key in set(keys):
+            if self._contains(key, item_id):
+                continue
+            size = sys.getsizeof(key) + ENTRY_OVERHEAD_BYTES
+            if self._bytes + size > self.max_bytes:
+                raise IndexBudgetExceeded(
+                    f"Prefix index exceeds its memory budget of {self.max_bytes} bytes"
+                )
+            position = bisect_right(self._keys, key)
+            self._keys.insert(position, key)
+            self._ids.insert(position, item_id)
+            self._bytes += size
+
+    def _contains(self, key: str, item_id: int) -> bool:
+        position = bisect_left(self._keys, key)
+        while position < len(self._keys) and self._keys[position] == key:
+            if self._ids[position] == item_id:
+                return True
+            position += 1
+        return False
+
+    def remove(self, item_id: int, keys: Iterable[str]):
+        for key in set(keys):
+            position = bisect_left(self._keys, key)
+            while position < len(self._keys) and self._keys[position] == key:
+                if self._ids[position] == item_id:
+                    del self._keys[position]
+                    del self._ids[position]
+                    self._bytes -= sys.getsizeof(key) + ENTRY_OVERHEAD_BYTES
+                    break
+                position += 1
+
+    # Ids whose keys start with `prefix`, in key order and without duplicates
+    def search(self, prefix: str, limit: int, offset: int = 0) -> List[int]:
+        results: List[int] = []
+        seen = set()
+        position = bisect_left(self._keys, prefix)
+        while position < len(self._keys) and self._keys[position].startswith(prefix):
+            item_id = self._ids[position]
+            position += 1
+            if item_id in seen:
+                continue
+            seen.add(item_id)
+            if len(seen) > offset:
+                results.append(item_id)
+                if len(results) >= limit:
+                    break
+        return results
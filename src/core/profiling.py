@@ -0,0 +1,304 @@
+import asyncio
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from auth.models import UserInfo
+from auth.service import AuthService
+from core.config import settings
+
+'''
+Sampling profiler for finding where a worker spends its time: on demand for one
+request an admin flags, or continuously at a low rate. Stacks are stored as
+folded-stack text files (one "frame;frame;frame count" line per distinct stack)
+that flamegraph.pl, speedscope or inferno turn into a flame graph.
+'''
+
+# Query parameter asking for a request profile, the header is X-Profile: 1
+PROFILE_QUERY = re.compile(rb"(?:^|&)profile=(?:1|true)(?:&|$)")
+
+# Names of stored profiles, the download endpoint only serves names like these
+PROFILE_NAME = re.compile(r"^[\w-]+\.folded$")
+
+
+# Leaf of the stacks of a profiled request while it waits, on I/O, a lock or other requests
+AWAITING = "[await]"
+
+
+class StackSampler:
+    '''
+    Samples the Python stack of one thread from a background thread every `interval`
+    seconds and counts identical stacks. The sampled thread runs untouched between
+    samples, a sample costs the sampler a few microseconds holding the GIL. A busy
+    event loop only hands the GIL over every sys.getswitchinterval() (5 ms by
+    default), which bounds the sample rate of CPU-bound code.
+    With `task`, samples follow that task on `loop` instead: its stack from the task's
+    coroutine down while it runs, the chain of awaits it is suspended in otherwise,
+    so one request's profile shows its wall-clock time and leaves out the other
+    requests sharing the event loop.
+    '''
+
+    def __init__(
+        self,
+        thread_id: int,
+        interval: float,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        task: Optional[asyncio.Task] = None,
+    ):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.loop = loop
+        self.task = task
+        self._stacks: Counter = Counter()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stopped.set()
+        self._thread.join()
+        return self.take()
+
+    # Hand over the stacks counted so far and start counting afresh
+    def take(self) -> Counter:
+        with self._lock:
+            stacks, self._stacks = self._stacks, Counter()
+        return stacks
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            if self.task is None:
+                stack = thread_stack(self.thread_id)
+            elif asyncio.current_task(self.loop) is self.task:
+                stack = thread_stack(self.thread_id, self.task.get_coro())
+            else:
+                stack = awaiting_stack(self.task.get_coro())
+            if stack:
+                with self._lock:
+                    self._stacks[stack] += 1
+
+
+# Code objects of the thread's stack, innermost first, ending at the frame of `root` if given
+def thread_stack(thread_id: int, root=None) -> tuple:
+    frame = sys._current_frames().get(thread_id)
+    root_code = getattr(root, "cr_code", None)
+    stack = []
+    while frame is not None:
+        stack.append(frame.f_code)
+        if frame.f_code is root_code:
+            break
+        frame = frame.f_back
+    return tuple(stack)
+
+
+# Code objects of the coroutines a suspended coroutine is awaiting in, innermost first
+def awaiting_stack(coro) -> tuple:
+    stack = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "ag_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        stack.append(frame.f_code)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "ag_await", None) or getattr(coro, "gi_yieldfrom", None)
+    stack.append(AWAITING)
+    return tuple(reversed(stack))
+
+
+# File path relative to the import path it was loaded from, e.g. "operations/list_queries.py"
+def short_path(filename: str) -> str:
+    for root in sorted((path for path in sys.path if path), key=len, reverse=True):
+        if filename.startswith(root + os.sep):
+            return filename[len(root) + 1:]
+    return filename
+
+
+def frame_label(code) -> str:
+    return f"{code.co_qualname} ({short_path(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+
+
+# Stacks in the folded format flamegraph.pl and speedscope read: "root;...;leaf count" per line
+def folded(stacks: Counter) -> str:
+    labels = {}
+    lines = []
+    for stack, count in stacks.most_common():
+        names = []
+        for code in reversed(stack):
+            label = labels.get(code)
+            if label is None:
+                label = labels[code] = code if code == AWAITING else frame_label(code)
+            names.append(label)
+        lines.append(f"{';'.join(names)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+class ProfileStore:
+    '''
+    Directory of folded-stack profiles shared by the workers of a host, keeping the
+    newest `keep` files.
+    '''
+
+    def __init__(self, directory: str, keep: int):
+        self.directory = directory
+        self.keep = keep
+        self._sequence = itertools.count(1)
+
+    # Unique name for a new profile, `label` is sanitized to letters, digits and underscores
+    def new_name(self, kind: str, label: str = "") -> str:
+        parts = [kind, time.strftime("%Y%m%dT%H%M%S"), str(os.getpid()), str(next(self._sequence))]
+        label = re.sub(r"\W+", "_", label).strip("_")
+        if label:
+            parts.append(label[:80])
+        return "-".join(parts) + ".folded"
+
+    def save(self, name: str, stacks: Counter):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, name), "w") as file:
+            file.write(folded(stacks))
+        for old_name in self.names()[self.keep:]:
+            try:
+                os.remove(os.path.join(self.directory, old_name))
+            except FileNotFoundError:
+                # Another worker pruned it first
+                pass
+
+    # Stored profile names, newest first
+    def names(self) -> list[str]:
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if PROFILE_NAME.match(entry.name)]
+        except FileNotFoundError:
+            return []
+        entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        return [entry.name for entry in entries]
+
+    def path(self, name: str) -> Optional[str]:
+        if not PROFILE_NAME.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+
+def profile_requested(scope) -> bool:
+    if PROFILE_QUERY.search(scope.get("query_string", b"")):
+        return True
+    return any(key == b"x-profile" and value in (b"1", b"true") for key, value in scope["headers"])
+
+
+# Principal of the request if it is an admin's. Saved on the request state, so get_principal
+# does not verify the token a second time.
+async def admin_principal(scope) -> Optional[UserInfo]:
+    authorization = next((value for key, value in scope["headers"] if key == b"authorization"), b"")
+    scheme, _, token = authorization.decode("latin-1").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        user_info = await run_in_threadpool(AuthService.verify_token, token)
+    except HTTPException:
+        return None
+    if not user_info:
+        return None
+    scope.setdefault("state", {})["principal"] = user_info
+    return user_info if user_info.has_role("admin") else None
+
+
+class ProfilingMiddleware:
+    '''
+    Profiles one request when an admin asks for it with an `X-Profile: 1` header or a
+    `profile=1` query parameter. The stacks are stored in PROFILE_DIR, and the
+    response's X-Profile header names the profile to download from
+    /api/v1/profiles/{name}. Requests without the flag only pay for looking for it.
+    The flag is ignored for anyone but an admin, and while this worker is already
+    profiling a request.
+    '''
+
+    def __init__(self, app, store: ProfileStore, interval: float):
+        self.app = app
+        self.store = store
+        self.interval = interval
+        self._busy = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._busy or not profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+        if await admin_principal(scope) is None or self._busy:
+            await self.app(scope, receive, send)
+            return
+
+        self._busy = True
+        name = None
+
+        # Named once routing has run, so the route template is known
+        def profile_name() -> str:
+            nonlocal name
+            if name is None:
+                route = getattr(scope.get("route"), "path", scope["path"])
+                name = self.store.new_name("request", f"{scope['method']} {route}")
+            return name
+
+        async def send_with_profile_name(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile", profile_name().encode())]}
+            await send(message)
+
+        sampler = StackSampler(threading.get_ident(), self.interval, asyncio.get_running_loop(), asyncio.current_task())
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_name)
+        finally:
+            stacks = sampler.stop()
+            self._busy = False
+            await run_in_threadpool(self.store.save, profile_name(), stacks)
+
+
+class RollingSampler:
+    '''
+    Samples the event loop thread continuously at a low rate and stores the stacks
+    of every `window` seconds as a profile, to see where a worker spends its time
+    without knowing which request to profile. Idle time shows up as the loop
+    waiting in its selector.
+    '''
+
+    def __init__(self, store: ProfileStore, interval: float, window: float):
+        self.store = store
+        self.interval = interval
+        self.window = window
+        self.enabled = interval > 0
+        self._sampler: Optional[StackSampler] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # Start sampling the calling thread, call from the event loop
+    def start(self):
+        self._sampler = StackSampler(threading.get_ident(), self.interval)
+        self._sampler.start()
+        self._task = asyncio.create_task(self._store_windows())
+
+    def stop(self):
+        self._task.cancel()
+        self._sampler.stop()
+
+    async def _store_windows(self):
+        while True:
+            await asyncio.sleep(self.window)
+            stacks = self._sampler.take()
+            if stacks:
+                await run_in_threadpool(self.store.save, self.store.new_name("rolling"), stacks)
+
+
+profile_store = ProfileStore(settings.get_config()["profile_dir"], settings.get_config()["profile_keep"])
+
+rolling_sampler = RollingSampler(
+    profile_store,
+    settings.get_config()["profile_sampler_interval"],
+    settings.get_config()["profile_sampler_window"],
+)
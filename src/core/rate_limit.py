@@ -0,0 +1,122 @@
+import math
+import time
+from typing import Optional, Protocol, TypedDict
+
+from fastapi import HTTPException, Request, status
+
+# Upper bound on the number of keys the in-memory backend tracks before sweeping
+MAX_TRACKED_KEYS = 100000
+
+
+class RateLimitBackend(Protocol):
+    '''
+    Storage for rate limit counters. `hit` records one attempt for `key` if it is
+    still under `limit` in the sliding `window`, and returns 0, otherwise it records
+    nothing and returns the number of seconds until an attempt would be allowed.
+    A shared backend (e.g. Redis) lets every worker enforce the same limits.
+    '''
+
+    async def hit(self, key: str, limit: int, window: float) -> float:
+        ...
+
+
+class InMemoryRateLimitBackend:
+    '''
+    Per-process sliding window counters.
+    Each key keeps the attempt counts of the current and previous fixed windows,
+    the previous count is weighted by how much of it still overlaps the sliding
+    window, which approximates a sliding log in constant memory per key.
+    '''
+
+    def __init__(self, max_keys: int = MAX_TRACKED_KEYS):
+        self.max_keys = max_keys
+        # key -> [window index, count in current window, count in previous window]
+        self._counters: dict[str, list] = {}
+
+    async def hit(self, key: str, limit: int, window: float) -> float:
+        now = time.monotonic()
+        # Windows are numbered, comparing float window starts breaks for windows like 0.1 s
+        index = int(now // window)
+        window_start = index * window
+        counter = self._counters.get(key)
+        if counter is None:
+            if len(self._counters) >= self.max_keys:
+                self._sweep(index)
+            counter = self._counters[key] = [index, 0, 0]
+        elif counter[0] != index:
+            # Roll the windows forward, anything older than the previous window is dropped
+            previous = counter[1] if index - counter[0] == 1 else 0
+            counter[0], counter[1], counter[2] = index, 0, previous
+
+        overlap = 1 - (now - window_start) / window
+        if counter[1] + counter[2] * overlap >= limit:
+            if counter[1] >= limit:
+                return window_start + window - now
+            # Wait until enough of the previous window has slid out
+            return max(0.001, (1 - (limit - counter[1]) / counter[2]) * window - (now - window_start))
+        counter[1] += 1
+        return 0.0
+
+    def _sweep(self, index: int):
+        for key in [key for key, counter in self._counters.items() if index - counter[0] >= 2]:
+            del self._counters[key]
+        # Still full of live keys, drop the oldest ones
+        while len(self._counters) >= self.max_keys:
+            del self._counters[next(iter(self._counters))]
+
+
+class RateLimiterStats(TypedDict):
+    allowed: int
+    rejected: int
+
+
+class SlidingWindowLimiter:
+    '''
+    Limits attempts per client IP and per account (username or email) over a
+    sliding window. Call `check` before doing any database or Keycloak work, it
+    raises a 429 with a Retry-After header once either key is over its limit.
+    The client IP is `request.client`, which uvicorn takes from X-Forwarded-For
+    for requests from FORWARDED_ALLOW_IPS. The in-memory backend counts per worker,
+    so with N workers a client gets up to N times the limits.
+    '''
+
+    def __init__(self, name: str, ip_limit: int, account_limit: int, window: float, backend: RateLimitBackend):
+        self.name = name
+        self.ip_limit = ip_limit
+        self.account_limit = account_limit
+        self.window = window
+        self.backend = backend
+        self._allowed = 0
+        self._rejected = 0
+        rate_limiters[name] = self
+
+    async def check(self, request: Request, account: Optional[str] = None):
+        if self.window <= 0:
+            return
+        retry_after = 0.0
+        client_ip = request.client.host if request.client else "unknown"
+        if self.ip_limit > 0:
+            retry_after = await self.backend.hit(f"{self.name}:ip:{client_ip}", self.ip_limit, self.window)
+        if not retry_after and account and self.account_limit > 0:
+            retry_after = await self.backend.hit(
+                f"{self.name}:account:{account.strip().lower()}", self.account_limit, self.window
+            )
+
+        if retry_after:
+            self._rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts, try again later",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+        self._allowed += 1
+
+    def stats(self) -> RateLimiterStats:
+        return {"allowed": self._allowed, "rejected": self._rejected}
+
+
+# Every limiter created in the process, by name
+rate_limiters: dict[str, SlidingWindowLimiter] = {}
+
+# Backend shared by the limiters, swap it for a shared store to enforce limits across workers
+rate_limit_backend: RateLimitBackend = InMemoryRateLimitBackend()
@@ -0,0 +1,261 @@
+import asyncio
+import functools
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Optional, TypedDict
+
+from fastapi import HTTPException, status
+from core.metrics import dependency_call_seconds
+
+logger = logging.getLogger("resilience")
+logger.setLevel(logging.WARNING)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class DependencyUnavailable(HTTPException):
+    '''
+    Raised instead of calling a dependency that is failing, saturated or too slow.
+    It is an HTTPException so routes answer 503 without extra handling.
+    '''
+
+    def __init__(self, name: str, reason: str, retry_after: Optional[float] = None):
+        headers = {"Retry-After": str(max(1, int(retry_after)))} if retry_after else None
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"{name} is unavailable: {reason}",
+            headers=headers,
+        )
+        self.name = name
+        self.reason = reason
+
+
+class DependencyStats(TypedDict):
+    state: str
+    in_flight: int
+    calls: int
+    failures: int
+    timeouts: int
+    rejected: int
+    transitions: dict[str, int]
+
+
+class CircuitBreaker:
+    '''
+    Counts consecutive failures of a dependency. After `failure_threshold` of them the
+    circuit opens and calls fail fast for `reset_timeout` seconds, then a single trial
+    call is let through (half-open) and its outcome closes or re-opens the circuit.
+    '''
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.transitions = {CLOSED: 0, OPEN: 0, HALF_OPEN: 0}
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    # Seconds until an open circuit lets a trial call through
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        if self.state == OPEN:
+            if self.retry_after() > 0:
+                return False
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+        return True
+
+    def record_success(self):
+        self._failures = 0
+        self._trial_in_flight = False
+        if self.state != CLOSED:
+            self._transition(CLOSED)
+
+    def record_failure(self):
+        self._failures += 1
+        self._trial_in_flight = False
+        if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            if self.state != OPEN:
+                self._transition(OPEN)
+
+    # A call that ended without telling us anything about the dependency's health
+    def record_ignored(self):
+        self._trial_in_flight = False
+
+    def _transition(self, state: str):
+        logger.warning(f"Circuit for {self.name} moved from {self.state} to {state}")
+        self.state = state
+        self.transitions[state] += 1
+
+
+class Dependency:
+    '''
+    Resilience wrapper for one external dependency (Keycloak, SMTP, ...).
+    Every call goes through a circuit breaker, a bulkhead that rejects calls once
+    `max_concurrency` are in flight instead of queueing them, and a timeout.
+    Blocking clients run in the event loop's thread pool, a call that timed out keeps
+    its bulkhead slot until the thread returns, so a hanging dependency can never
+    hold more than `max_concurrency` threads. Coroutines that timed out likewise keep
+    their slot until their cancellation has finished.
+    Code that is already off the event loop uses `call_sync`, so the counters and the
+    breaker are shared between threads and only change under `_lock`.
+    `is_failure` decides which exceptions count against the breaker, errors caused
+    by the request itself (bad credentials, unknown user) should not open it.
+    '''
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float,
+        max_concurrency: int,
+        failure_threshold: int,
+        reset_timeout: float,
+        is_failure: Callable[[BaseException], bool] = lambda e: True,
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self.is_failure = is_failure
+        self._in_flight = 0
+        self._calls = 0
+        self._failures = 0
+        self._timeouts = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+        dependencies[name] = self
+
+    # Run a blocking function in a worker thread
+    async def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        self._acquire()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(None, functools.partial(fn, *args, **kwargs))
+        future.add_done_callback(self._release)
+        return await self._wait(asyncio.shield(future))
+
+    # Await a coroutine function. A call that times out is cancelled without waiting for its
+    # cleanup (fastapi-mail sends QUIT to a server that may never answer), it keeps its slot until then
+    async def call_async(self, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        self._acquire()
+        task = asyncio.ensure_future(fn(*args, **kwargs))
+        task.add_done_callback(self._release)
+        try:
+            return await self._wait(asyncio.shield(task))
+        finally:
+            task.cancel()
+
+    # Run a blocking function in the calling thread, for code that is already off the event loop.
+    # A running thread cannot be abandoned, so `fn` must bound itself with the same timeout
+    # (KeycloakOpenID's `timeout`, per attempt: it retries once), a call that fails after
+    # `timeout` seconds counts as a timeout.
+    def call_sync(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        self._acquire()
+        started = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            if time.perf_counter() - started >= self.timeout:
+                self._record_timeout()
+                self._observe(started, "timeout")
+                raise DependencyUnavailable(self.name, f"no response within {self.timeout:g}s") from e
+            self._record_error(e)
+            self._observe(started, "error")
+            raise
+        finally:
+            self._release()
+        self._record_success()
+        self._observe(started, "ok")
+        return result
+
+    def stats(self) -> DependencyStats:
+        with self._lock:
+            return {
+                "state": self.breaker.state,
+                "in_flight": self._in_flight,
+                "calls": self._calls,
+                "failures": self._failures,
+                "timeouts": self._timeouts,
+                "rejected": self._rejected,
+                "transitions": dict(self.breaker.transitions),
+            }
+
+    def _acquire(self):
+        with self._lock:
+            if self._in_flight >= self.max_concurrency:
+                self._reject("too many concurrent calls")
+            if not self.breaker.allow():
+                self._reject("circuit open", self.breaker.retry_after())
+            self._in_flight += 1
+            self._calls += 1
+
+    def _release(self, future: Optional[asyncio.Future] = None):
+        with self._lock:
+            self._in_flight -= 1
+        # Threads that outlived their caller's timeout may still fail, nobody awaits them anymore
+        if future is not None and not future.cancelled():
+            future.exception()
+
+    async def _wait(self, awaitable: Awaitable[Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(awaitable, self.timeout)
+        except asyncio.TimeoutError:
+            self._record_timeout()
+            self._observe(started, "timeout")
+            raise DependencyUnavailable(self.name, f"no response within {self.timeout:g}s")
+        except asyncio.CancelledError:
+            with self._lock:
+                self.breaker.record_ignored()
+            self._observe(started, "cancelled")
+            raise
+        except BaseException as e:
+            self._record_error(e)
+            self._observe(started, "error")
+            raise
+        self._record_success()
+        self._observe(started, "ok")
+        return result
+
+    # Latency of one call for /metrics, rejected calls never reach the dependency and are only counted
+    def _observe(self, started: float, outcome: str):
+        dependency_call_seconds.observe(time.perf_counter() - started, self.name, outcome)
+
+    def _record_success(self):
+        with self._lock:
+            self.breaker.record_success()
+
+    def _record_timeout(self):
+        with self._lock:
+            self._timeouts += 1
+            self._failures += 1
+            self.breaker.record_failure()
+
+    def _record_error(self, e: BaseException):
+        failure = self.is_failure(e)
+        with self._lock:
+            if failure:
+                self._failures += 1
+                self.breaker.record_failure()
+            else:
+                # The dependency answered, it just said no
+                self.breaker.record_success()
+
+    # Called with _lock held
+    def _reject(self, reason: str, retry_after: Optional[float] = None):
+        self._rejected += 1
+        raise DependencyUnavailable(self.name, reason, retry_after)
+
+
+# Every Dependency created in the process, by name
+dependencies: dict[str, Dependency] = {}
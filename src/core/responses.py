@@ -0,0 +1,37 @@
+from functools import lru_cache
+from typing import Any, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def schema_adapter(annotation: Any) -> TypeAdapter:
+    return TypeAdapter(annotation)
+
+
+class SchemaResponse(Response):
+    '''
+    JSON response for handlers that already hold their response schemas.
+    FastAPI validates a returned value against `response_model` again before
+    serializing it. Returning this response instead serializes the schemas straight
+    to JSON bytes with pydantic, skipping that second validation pass. Keep
+    `response_model` on the route for the OpenAPI docs, and pass the same type as
+    `annotation` so list items are serialized with the declared schema.
+    '''
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        content: Any,
+        annotation: Any = None,
+        status_code: int = 200,
+        headers: Optional[dict[str, str]] = None,
+        exclude_none: bool = False,
+    ):
+        adapter = schema_adapter(annotation if annotation is not None else type(content))
+        super().__init__(
+            content=adapter.dump_json(content, by_alias=True, exclude_none=exclude_none),
+            status_code=status_code,
+            headers=headers,
+        )
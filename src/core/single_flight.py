@@ -0,0 +1,82 @@
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, TypedDict
+
+# Maximum number of distinct keys tracked in the per-key statistics
+MAX_TRACKED_KEYS = 512
+
+
+class SingleFlightStats(TypedDict):
+    calls: int
+    executions: int
+    shared: int
+
+
+class SingleFlight:
+    '''
+    Coalesces identical concurrent reads ("single-flight").
+    The first caller for a key runs the query, every caller that arrives while it
+    is in flight awaits the same result instead of issuing its own query.
+    Results are shared between requests, so callers must only coalesce functions
+    that return response schemas or other values that are safe to share, never
+    ORM objects bound to the leader's session.
+    '''
+
+    def __init__(self):
+        self._in_flight: dict[Hashable, asyncio.Future] = {}
+        self._stats: OrderedDict[str, SingleFlightStats] = OrderedDict()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        stats = self._key_stats(key)
+        stats["calls"] += 1
+
+        while True:
+            future = self._in_flight.get(key)
+            if future is None:
+                break
+            stats["shared"] += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The leader's request went away before finishing, retry as a new leader
+                # unless it is this request that is being cancelled
+                if future.cancelled() and not asyncio.current_task().cancelling():
+                    continue
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        stats["executions"] += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when no one else was waiting on it
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._in_flight[key]
+
+    def stats(self) -> dict[str, SingleFlightStats]:
+        return {key: dict(stats) for key, stats in self._stats.items()}
+
+    def _key_stats(self, key: Hashable) -> SingleFlightStats:
+        name = ":".join(str(part) for part in key) if isinstance(key, tuple) else str(key)
+        stats = self._stats.get(name)
+        if stats is None:
+            if len(self._stats) >= MAX_TRACKED_KEYS:
+                self._stats.popitem(last=False)
+            stats = self._stats[name] = {"calls": 0, "executions": 0, "shared": 0}
+        else:
+            self._stats.move_to_end(name)
+        return stats
+
+
+# Shared single-flight group for read operations
+read_flight = SingleFlight()
@@ -0,0 +1,43 @@
+from typing import Any, Callable, Sequence
+
+from sqlalchemy import event
+
+# Dialect methods that send a statement to the DBAPI cursor
+EXECUTE_METHODS = ("do_execute", "do_execute_no_params", "do_executemany")
+
+# Statement kinds hooks label statements with, anything else is "OTHER"
+STATEMENT_KINDS = frozenset(("SELECT", "INSERT", "UPDATE", "DELETE"))
+
+# Takes an execute method and returns one with the same signature that runs it
+StatementWrapper = Callable[[Callable[..., Any]], Callable[..., Any]]
+
+
+def statement_kind(statement: str) -> str:
+    kind = statement.lstrip()[:6].upper()
+    return kind if kind in STATEMENT_KINDS else "OTHER"
+
+
+def hook_statement_execution(engine: Any, wrappers: Sequence[StatementWrapper]):
+    '''
+    Run every statement the engine executes through `wrappers`, the first one outermost.
+    Uses the dialect's do_execute events, SQLAlchemy stops at the first listener that
+    executes the statement, so all wrappers share one listener per method. Any
+    connection event listener (before_cursor_execute, ...) would instead move every
+    statement onto SQLAlchemy's much slower event dispatching path.
+    '''
+    if not wrappers:
+        return
+    sync_engine = getattr(engine, "sync_engine", engine)
+    for name in EXECUTE_METHODS:
+        execute = getattr(sync_engine.dialect, name)
+        for wrapper in reversed(wrappers):
+            execute = wrapper(execute)
+        event.listen(sync_engine, name, executed(execute))
+
+
+def executed(execute: Callable[..., Any]) -> Callable[..., bool]:
+    def run(*args) -> bool:
+        execute(*args)
+        # Tells SQLAlchemy the statement has been executed
+        return True
+    return run
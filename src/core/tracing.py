@@ -0,0 +1,104 @@
+import functools
+import inspect
+import os
+from typing import Any, Callable
+
+from opentelemetry import trace
+from opentelemetry.trace import SpanKind
+from core.config import settings
+from core.statement_hooks import statement_kind
+
+'''
+OpenTelemetry tracing for requests, SQL statements, Keycloak and SMTP calls.
+Spans go through the global tracer provider, which is a no-op until
+configure_tracing() installs the SDK provider, so traced code costs next to
+nothing with TRACING_ENABLED off. Request spans come from FastAPI's built-in
+telemetry, which starts as soon as a provider is installed: one server span per
+request named after its route template, continuing an incoming `traceparent`,
+with child spans for dependencies (token verification), the endpoint and
+serialization. The spans here hang off those.
+'''
+
+tracer = trace.get_tracer("barbershop-api")
+
+# Scrapes and probes would bury the request traces
+UNTRACED_PATHS = frozenset(("/metrics", "/healthz", "/livez", "/readyz"))
+
+
+# FastAPI telemetry `exclude` hook
+def is_untraced(scope) -> bool:
+    return scope.get("path") in UNTRACED_PATHS
+
+
+# Install the SDK tracer provider with the configured sampler and exporter
+def configure_tracing():
+    from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    config = settings.get_config()
+    if config["tracing_exporter"] == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        # Sends to OTEL_EXPORTER_OTLP_TRACES_ENDPOINT, by default a collector on localhost:4318
+        exporter = OTLPSpanExporter()
+    elif config["tracing_exporter"] == "file":
+        # One JSON span per line
+        exporter = ConsoleSpanExporter(
+            out=open(config["tracing_file"], "a"),
+            formatter=lambda span: span.to_json(indent=None) + os.linesep,
+        )
+    else:
+        raise ValueError(f"Unknown TRACING_EXPORTER: {config['tracing_exporter']}")
+
+    provider = TracerProvider(
+        resource=Resource.create({SERVICE_NAME: os.getenv("OTEL_SERVICE_NAME", "barbershop-api")}),
+        # Follow the caller's decision when the request carries a sampled traceparent header
+        sampler=ParentBased(TraceIdRatioBased(config["tracing_sample_ratio"])),
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+
+
+# Export the spans still queued, called on shutdown
+def shutdown_tracing():
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "shutdown"):
+        provider.shutdown()
+
+
+# Decorator running a function, sync or async, in a span named `name`.
+# Leaves the function untouched when tracing is off, even a no-op span costs a few microseconds.
+def traced(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    def decorate(fn: Callable[..., Any]) -> Callable[..., Any]:
+        if not settings.get_config()["tracing_enabled"]:
+            return fn
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def run_traced_async(*args, **kwargs):
+                with tracer.start_as_current_span(name):
+                    return await fn(*args, **kwargs)
+            return run_traced_async
+
+        @functools.wraps(fn)
+        def run_traced(*args, **kwargs):
+            with tracer.start_as_current_span(name):
+                return fn(*args, **kwargs)
+        return run_traced
+    return decorate
+
+
+# Statement wrapper for core/statement_hooks.py, one client span per statement of a sampled trace.
+# Statements of requests that were not sampled skip creating a span that would not be recorded.
+def traced_execution(execute: Callable[..., Any]) -> Callable[..., Any]:
+    def run_traced(cursor, statement, *args):
+        if not trace.get_current_span().is_recording():
+            execute(cursor, statement, *args)
+            return
+        # The SQL text only, parameters are bound separately and never recorded
+        with tracer.start_as_current_span(
+            statement_kind(statement), kind=SpanKind.CLIENT, attributes={"db.query.text": statement}
+        ):
+            execute(cursor, statement, *args)
+    return run_traced
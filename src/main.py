@@ -1,13 +1,12 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 import uvicorn
-from fastapi import FastAPI, Depends, Form
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from core.db import async_session_manager
 from core.config import settings
 from routers.user_router import user_router
-from auth.controller import AuthController
 from routers.barber_router import barber_router
 from routers.service_router import service_router
 from routers.schedule_router import schedule_router
@@ -16,21 +15,58 @@ from routers.appointment_router import appointment_router
 from routers.email_router import email_router
 from routers.thread_router import thread_router
 from routers.message_router import message_router
+from routers.export_router import export_router
+from routers.metrics_router import metrics_router, worker_metrics
+from routers.profile_router import profile_router
+from routers.health_router import health_router
+from core.metrics import MetricsMiddleware
+from core.profiling import ProfilingMiddleware, profile_store, rolling_sampler
+from core.tracing import configure_tracing, is_untraced, shutdown_tracing
+from operations.user_operations import user_typeahead_index
+from auth.service import keycloak_http
 
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Build the optional in-process typeahead index for user search
+    rebuild_task = None
+    if user_typeahead_index.enabled:
+        async with async_session_manager.session() as session:
+            await user_typeahead_index.build(session)
+        if user_typeahead_index.rebuild_interval > 0:
+            rebuild_task = asyncio.create_task(
+                user_typeahead_index.rebuild_periodically(async_session_manager.session)
+            )
+    # Continuous low-rate sampling of the event loop, off unless PROFILE_SAMPLER_INTERVAL is set
+    if rolling_sampler.enabled:
+        rolling_sampler.start()
+    # Share this worker's metrics with the others, so any of them can answer a scrape for all
+    metrics_shared = settings.get_config()["metrics_enabled"] and worker_metrics.enabled
+    if metrics_shared:
+        worker_metrics.start()
+
     yield
+
+    if rebuild_task is not None:
+        rebuild_task.cancel()
+    if rolling_sampler.enabled:
+        rolling_sampler.stop()
+    if metrics_shared:
+        worker_metrics.stop()
+    await keycloak_http.aclose()
+    if settings.get_config()["tracing_enabled"]:
+        shutdown_tracing()
     if async_session_manager._engine is not None:
         # Close the DB connection
         await async_session_manager.close()
 
 
-app = FastAPI(lifespan=lifespan)
+if settings.get_config()["tracing_enabled"]:
+    configure_tracing()
 
-# Initialize the HTTPBearer scheme for authentication
-bearer_scheme = HTTPBearer()
+# FastAPI traces every request once a tracer provider is installed
+app = FastAPI(lifespan=lifespan, telemetry={"exclude": is_untraced})
 
 origins = [
     "http://18.220.221.175:5173",  # Frontend origin
@@ -46,8 +82,17 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+# Admin-requested profiles of single requests
+if settings.get_config()["profiling_enabled"]:
+    app.add_middleware(ProfilingMiddleware, store=profile_store, interval=settings.get_config()["profile_interval"])
+
+# Outermost, so request timings include the other middleware
+if settings.get_config()["metrics_enabled"]:
+    app.add_middleware(MetricsMiddleware)
+
 
 # Connect routers
+app.include_router(health_router)
 app.include_router(auth_router)
 app.include_router(email_router)
 app.include_router(user_router)
@@ -57,15 +102,17 @@ app.include_router(schedule_router)
 app.include_router(appointment_router)
 app.include_router(thread_router)
 app.include_router(message_router)
+app.include_router(export_router)
+# Stored profiles come from request profiling or the rolling sampler, both off by default
+if settings.get_config()["profiling_enabled"] or rolling_sampler.enabled:
+    app.include_router(profile_router)
+if settings.get_config()["metrics_enabled"]:
+    app.include_router(metrics_router)
 
 # Define the root endpoint
 @app.get("/")
 async def root():
     return {"Barbershop App"}
 
-@app.get("/healthz")
-async def root():
-    return {"healthy": True}
-
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -2,6 +2,7 @@ from pydantic import BaseModel
 from typing import Optional
 from .time_slot_schema import TimeSlotChildResponse, TimeSlotCreate, TimeSlotUpdate
 from .user.barber_schema import BarberResponse
+from .user.user_schema import UserBase
 import datetime
 
 '''
@@ -33,4 +34,63 @@ class ScheduleResponse(ScheduleCreate):
     barber: BarberResponse
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+'''
+Compact calendar (grid) representation of schedules. Barber details are sent
+once in a dictionary keyed by barber_id and each day carries its slots as
+[slot_id, start_time, end_time, state] rows, see SlotState for the codes.
+'''
+
+class ScheduleGridBarber(BaseModel):
+    firstName: str
+    lastName: str
+
+class ScheduleGridDay(BaseModel):
+    schedule_id: int
+    barber_id: int
+    date: datetime.date
+    is_working: bool
+    slots: list[tuple[int, str, str, int]]
+
+class ScheduleGridResponse(BaseModel):
+    start_date: datetime.date
+    end_date: datetime.date
+    slot_states: dict[str, int]
+    barbers: dict[int, ScheduleGridBarber]
+    days: list[ScheduleGridDay]
+
+
+'''
+Multi-barber calendar (front desk day/week view). Every barber's schedules,
+slots and the appointments occupying those slots for a date range.
+'''
+
+class CalendarTimeSlot(TimeSlotChildResponse):
+    appointment_id: Optional[int] = None
+
+class CalendarSchedule(BaseModel):
+    schedule_id: int
+    date: datetime.date
+    is_working: bool
+    time_slots: list[CalendarTimeSlot]
+
+class CalendarAppointment(BaseModel):
+    appointment_id: int
+    appointment_date: Optional[datetime.date] = None
+    user_id: int
+    client_name: str
+    status: str
+    slot_ids: list[int]
+    service_ids: list[int]
+
+class CalendarBarber(BaseModel):
+    barber_id: int
+    user: UserBase
+    schedules: list[CalendarSchedule]
+    appointments: list[CalendarAppointment]
+
+class CalendarResponse(BaseModel):
+    start_date: datetime.date
+    end_date: datetime.date
+    barbers: list[CalendarBarber]
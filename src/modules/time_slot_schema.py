@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import time
+from enum import IntEnum
 from typing import Optional
 
 '''
@@ -41,4 +42,18 @@ class TimeSlotResponse(TimeSlotCreate):
     is_booked: bool
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Compact slot state codes used by the schedule grid (calendar) endpoint
+class SlotState(IntEnum):
+    unavailable = 0
+    available = 1
+    booked = 2
+
+    @classmethod
+    def from_flags(cls, is_available: bool, is_booked: bool) -> "SlotState":
+        if is_booked:
+            return cls.booked
+        if is_available:
+            return cls.available
+        return cls.unavailable
@@ -10,4 +10,8 @@ class BarberResponse(BaseModel):
     user: UserBase
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Barber listed for a specific schedule date, with the number of open slots that day
+class BarberAvailabilityResponse(BarberResponse):
+    free_slots: Optional[int] = None
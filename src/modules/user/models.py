@@ -1,4 +1,3 @@
-from decimal import Decimal
 from sqlalchemy.orm import (
     DeclarativeBase,
     Mapped,
@@ -7,7 +6,6 @@ from sqlalchemy.orm import (
 )
 
 from sqlalchemy import (
-    DECIMAL,
     String,
     Boolean,
     ForeignKey,
@@ -18,6 +16,7 @@ from sqlalchemy import (
     Enum,
     Text,
     Date,
+    Index,
     UniqueConstraint
 )
 
@@ -31,6 +30,7 @@ from ..schedule_schema import ScheduleResponse, TimeSlotChildResponse
 from .service_schema import ServiceResponse
 from ..appointment_schema import AppointmentResponse
 
+# Relationships load lazily, operations load what they read with the profiles in operations/load_profiles.py
 class Base(DeclarativeBase):
     pass
 
@@ -47,13 +47,26 @@ class User(Base):
     __tablename__ = "user"
     
     user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    kc_id: Mapped[str] = mapped_column(String(50), primary_key=False)
+    kc_id: Mapped[str] = mapped_column(String(50), primary_key=False, index=True)
     firstName: Mapped[str] = mapped_column(String(50), nullable=False)
     lastName: Mapped[str] = mapped_column(String(50), nullable=False)
     email: Mapped[str] = mapped_column(String(50), nullable=False, unique=True)
     password: Mapped[str] = mapped_column(String(50), nullable=False)
     phoneNumber: Mapped[str] = mapped_column(String(10), nullable=False, unique=True)
     is_admin: Mapped[bool] = mapped_column(Boolean, default=False)
+
+    # n-gram FULLTEXT index backing the client search (names, email and phone number)
+    __table_args__ = (
+        Index(
+            "ft_user_search",
+            "firstName",
+            "lastName",
+            "email",
+            "phoneNumber",
+            mysql_prefix="FULLTEXT",
+            mysql_with_parser="ngram",
+        ),
+    )
     
     '''
     User class relationships
@@ -93,7 +106,7 @@ class Barber(Base):
     '''
 
     # Barber is linked to a single user (as specified by 'uselist = false' in User table above. One-to-One)
-    user: Mapped["User"] = relationship(back_populates="barber", lazy="selectin")
+    user: Mapped["User"] = relationship(back_populates="barber")
 
     # Barber can have multiple Appointments (One-to-Many)
     appointments: Mapped[list["Appointment"]] = relationship(back_populates="barber")
@@ -122,22 +135,25 @@ class Appointment(Base):
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("user.user_id", ondelete="CASCADE"), nullable=False)
     barber_id: Mapped[int] = mapped_column(Integer, ForeignKey("barber.barber_id", ondelete="CASCADE"), nullable=False)
     status: Mapped[AppointmentStatus] = mapped_column(Enum(AppointmentStatus), nullable=False)
+
+    # Index for calendar queries over appointments in a date range
+    __table_args__ = (Index("ix_appointment_date_barber_id", "appointment_date", "barber_id"),)
     
     '''
     Appointment class relationships
     '''
 
     # Each appointment is linked to one User (who booked it) - (Many-to-One)
-    user: Mapped["User"] = relationship(back_populates="appointments", lazy="selectin")
+    user: Mapped["User"] = relationship(back_populates="appointments")
 
     # Each appointment is assigned to one Barber (Many-to-One)
-    barber: Mapped["Barber"] = relationship(back_populates="appointments", lazy="selectin")
+    barber: Mapped["Barber"] = relationship(back_populates="appointments")
 
     # An Appointment can have multiple AppointmentService records ()
-    appointment_services: Mapped[list["AppointmentService"]] = relationship(back_populates="appointment", lazy="selectin")
+    appointment_services: Mapped[list["AppointmentService"]] = relationship(back_populates="appointment")
 
      # Relationship to Appointment_TimeSlot (creates Many-to-Many with TimeSlot)
-    appointment_time_slots: Mapped[list["Appointment_TimeSlot"]] = relationship("Appointment_TimeSlot", back_populates="appointment", lazy="selectin")
+    appointment_time_slots: Mapped[list["Appointment_TimeSlot"]] = relationship("Appointment_TimeSlot", back_populates="appointment")
 
     def to_response_schema(self) -> AppointmentResponse:
         return AppointmentResponse(
@@ -194,7 +210,7 @@ class AppointmentService(Base):
     '''
 
     # Each AppointmentService is linked to one Appointment
-    service: Mapped["Service"] = relationship(back_populates="appointment_services", lazy="selectin")
+    service: Mapped["Service"] = relationship(back_populates="appointment_services")
 
     # Each AppointmentService is linked to one Service
     appointment: Mapped["Appointment"] = relationship(back_populates="appointment_services")
@@ -209,16 +225,20 @@ class Schedule(Base):
     is_working: Mapped[bool] = mapped_column(Boolean, default=True)
 
     # Unique constraint: A barber can have only one schedule per date
-    __table_args__ = (UniqueConstraint("barber_id", "date", name="uq_barber_date"),)
+    # Date-first index serves calendar queries over a date range for every barber
+    __table_args__ = (
+        UniqueConstraint("barber_id", "date", name="uq_barber_date"),
+        Index("ix_schedule_date_barber_id", "date", "barber_id"),
+    )
     
     '''
     Schedule class relationships
     '''
     # Each schedule is assigned to a single Barber (Many-to-One)
-    barber: Mapped["Barber"] = relationship(back_populates="schedules", lazy="selectin")
+    barber: Mapped["Barber"] = relationship(back_populates="schedules")
 
     # Each schedule links to multiple time slots (One-to-Many)
-    time_slots: Mapped[list["TimeSlot"]] = relationship("TimeSlot", back_populates="schedule", cascade="all, delete, delete-orphan", lazy="selectin")
+    time_slots: Mapped[list["TimeSlot"]] = relationship("TimeSlot", back_populates="schedule", cascade="all, delete, delete-orphan")
 
     def to_response_schema(self) -> ScheduleResponse:
         return ScheduleResponse(
@@ -248,10 +268,10 @@ class TimeSlot(Base):
     TimeSlot class relationships
     '''
     #Multiple time slots link to one schedule (Many-to-One)
-    schedule: Mapped["Schedule"] = relationship("Schedule", back_populates="time_slots", lazy="selectin")
+    schedule: Mapped["Schedule"] = relationship("Schedule", back_populates="time_slots")
 
     #Relationship to Appointment_TimeSlot (creates Many-to-Many with appointment)
-    appointment_time_slots: Mapped[list["Appointment_TimeSlot"]] = relationship("Appointment_TimeSlot", back_populates="time_slot", cascade="all, delete, delete-orphan", lazy="selectin")
+    appointment_time_slots: Mapped[list["Appointment_TimeSlot"]] = relationship("Appointment_TimeSlot", back_populates="time_slot", cascade="all, delete, delete-orphan")
     
     def to_response_schema(self) -> TimeSlotChildResponse:
         return TimeSlotChildResponse(
@@ -272,7 +292,7 @@ class Appointment_TimeSlot(Base):
     Appointment_TimeSlot class relationships
     '''
     # Each Appointment_TimeSlot is linked to one TimeSlot
-    time_slot: Mapped["TimeSlot"] = relationship(back_populates="appointment_time_slots", lazy="selectin")
+    time_slot: Mapped["TimeSlot"] = relationship(back_populates="appointment_time_slots")
 
     # Each Appointment_TimeSlot is linked to one TimeSlot
     appointment: Mapped["Appointment"] = relationship(back_populates="appointment_time_slots")
@@ -309,9 +329,20 @@ class Message(Base):
     hasActiveMessage: Mapped[bool] = mapped_column(Boolean, default=True)
     text: Mapped[str] = mapped_column(Text, nullable=False)
     timeStamp: Mapped[DateTime] = mapped_column(DateTime, default=func.current_timestamp())
+
+    # Fetch the database-generated timeStamp while inserting, so a new message needs no refresh
+    __mapper_args__ = {"eager_defaults": True}
     
     # Each message belongs to one thread (Many-To-One)
     thread: Mapped["Thread"] = relationship(back_populates="messages")
 
     # Each message belongs to one user
     sender: Mapped["User"] = relationship(foreign_keys=[sender_id])
+
+# Version counters for in-process caches. Writers bump the counter in the same
+# transaction as their change so every worker can detect a stale cache.
+class CacheVersion(Base):
+    __tablename__ = "cache_version"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
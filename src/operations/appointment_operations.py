@@ -2,7 +2,6 @@ from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import selectinload
 from modules.user.models import (
     Appointment,
     User,
@@ -10,13 +9,14 @@ from modules.user.models import (
     TimeSlot,
     Appointment_TimeSlot,
     AppointmentService,
-    Service,
 )
 from typing import List, Optional
 from fastapi import HTTPException
 from modules.appointment_schema import AppointmentCreate, AppointmentResponse
 import logging
 from operations.email_operations import email_operations
+from operations.list_queries import list_appointments
+from operations.load_profiles import APPOINTMENT_RESPONSE, TIME_SLOT_WITH_SCHEDULE
 
 logger = logging.getLogger("appointment_operations")
 logger.setLevel(logging.ERROR)
@@ -60,11 +60,14 @@ class AppointmentOperations:
 
             # check if slot_id(s) exists in the time_slot table
             appointment_date: str
+            time_slot_result = await self.db.execute(
+                select(TimeSlot)
+                .options(*TIME_SLOT_WITH_SCHEDULE)
+                .filter(TimeSlot.slot_id.in_(appointment_data.time_slot))
+            )
+            time_slots = {time_slot.slot_id: time_slot for time_slot in time_slot_result.scalars().all()}
             for slot_id in appointment_data.time_slot:
-                time_slot_result = await self.db.execute(
-                    select(TimeSlot).filter(TimeSlot.slot_id == slot_id)
-                )
-                time_slot = time_slot_result.scalars().first()
+                time_slot = time_slots.get(slot_id)
 
                 if not time_slot:
                     raise HTTPException(
@@ -74,23 +77,21 @@ class AppointmentOperations:
 
                 appointment_date = time_slot.schedule.date
 
-            # create new appointment if both exist
+            # create new appointment if both exist, along with its appointment_time_slot
+            # and appointment_service rows, all inserted in a single commit
             new_appointment = Appointment(
                 user_id=appointment_data.user_id,
                 appointment_date=appointment_date,
                 barber_id=appointment_data.barber_id,
                 status=appointment_data.status,
+                appointment_time_slots=[
+                    Appointment_TimeSlot(slot_id=slot_id) for slot_id in appointment_data.time_slot
+                ],
+                appointment_services=[
+                    AppointmentService(service_id=service_id) for service_id in appointment_data.service_id
+                ],
             )
             self.db.add(new_appointment)
-            await self.db.commit()
-            await self.db.refresh(new_appointment)
-
-            # Update the appointment_time_slot table with the newly associated appointment_id and slot_id(s)
-            for slot_id in appointment_data.time_slot:
-                new_appointment_time_slot = Appointment_TimeSlot(
-                    appointment_id=new_appointment.appointment_id, slot_id=slot_id
-                )
-                self.db.add(new_appointment_time_slot)
 
             # Update the is_available field in TimeSlot table for the selected slot_id(s)
             await self.db.execute(
@@ -98,60 +99,28 @@ class AppointmentOperations:
                 .where(TimeSlot.slot_id.in_(appointment_data.time_slot))
                 .values(is_booked=True)
             )
-
-            # Update the service table with the newly associated appointment_id and service_id(s)
-            for service_id in appointment_data.service_id:
-                new_appointment_service = AppointmentService(
-                    service_id=service_id, appointment_id=new_appointment.appointment_id
-                )
-                self.db.add(new_appointment_service)
             await self.db.commit()
 
-            await self.db.refresh(new_appointment)
-
-            # Refresh appointment again to ensure the session is aware of its latest state
-            result = await self.db.execute(
-                select(Appointment).filter(
-                    Appointment.appointment_id == new_appointment.appointment_id
-                ).options(
-                    selectinload(Appointment.appointment_time_slots),
-                    selectinload(Appointment.appointment_services),
-                    selectinload(Appointment.user),
-                    selectinload(Appointment.barber),
-                )
-            )
-            appt = result.scalars().first()
+            # Reload the appointment with everything its response and the emails need
+            appt = await self._load_appointment(new_appointment.appointment_id)
 
             if not appt:
                 return None
             
              # Send out booking confirmation emails
             try:
-                # Retrieve all necessary information from DB for crafting custom emails based on specific appointment
-                booking_user_result = await self.db.execute(select(User).filter(User.user_id == appt.user_id))
-                booking_user = booking_user_result.scalars().first()
-
-                barber_result = await self.db.execute(select(Barber).filter(Barber.barber_id == appt.barber_id))
-                barber = barber_result.scalars().first()
-
-                barber_information_result = await self.db.execute(select(User).filter(User.user_id == barber.user_id))
-                barber_information = barber_information_result.scalars().first()
-
-                service_information_result = await self.db.execute(select(Service).filter(Service.service_id == appointment_data.service_id))
-                service_information = service_information_result.scalars().first()
-                
-                slots = []
-                for slot_id in appointment_data.time_slot:
-                    time_slot_result = await self.db.execute(select(TimeSlot).filter(TimeSlot.slot_id == slot_id))
-                    time_slot = time_slot_result.scalars().first()
-                    if time_slot:
-                        slots.append(time_slot)
+                # Details for crafting custom emails, all loaded with the appointment above
+                booking_user = appt.user
+                barber_information = appt.barber.user
+                service_information = appt.appointment_services[0].service
+                slots = [link.time_slot for link in appt.appointment_time_slots]
 
                 first_slot = min(slots, key=lambda slot: slot.start_time) if slots else None
 
                 if first_slot:
                     appointment_time = first_slot.start_time.strftime('%I:%M %p')
-                    appointment_date = first_slot.schedule.date.strftime('%B %d, %Y')
+                    # Every slot of the appointment is on its schedule's date
+                    appointment_date = appt.appointment_date.strftime('%B %d, %Y')
 
                 # Send email to the client
                 await email_operations.send_email(
@@ -201,14 +170,13 @@ class AppointmentOperations:
             # Calculate offset for SQL query
             offset = (page - 1) * limit
 
-            result = await self.db.execute(
-                select(Appointment).limit(limit).offset(offset)
+            appointments = await list_appointments(
+                self.db, select().order_by(Appointment.appointment_id).limit(limit).offset(offset)
             )
-            appointments = result.scalars().all()
 
             if not appointments:
                 return None
-            return [app.to_response_schema() for app in appointments]
+            return appointments
 
         except SQLAlchemyError as e:
             logger.error(e)
@@ -222,10 +190,7 @@ class AppointmentOperations:
         self, appointment_id: int
     ) -> Optional[AppointmentResponse]:
         # try:
-        result = await self.db.execute(
-            select(Appointment).filter(Appointment.appointment_id == appointment_id)
-        )
-        appt = result.scalars().first()
+        appt = await self._load_appointment(appointment_id)
 
         if not appt:
             return None
@@ -288,34 +253,10 @@ class AppointmentOperations:
 
             # Commit all changes
             await self.db.commit()
-            await self.db.refresh(appointment)
-
-            # Retrieve the updated data for the response
-            time_slot_result = await self.db.execute(
-                select(Appointment_TimeSlot).where(
-                    Appointment_TimeSlot.appointment_id == appointment_id
-                )
-            )
-            time_slot_links = time_slot_result.scalars().all()
-            time_slot_ids = [link.slot_id for link in time_slot_links]
-
-            service_result = await self.db.execute(
-                select(AppointmentService).where(
-                    AppointmentService.appointment_id == appointment_id
-                )
-            )
-            service_links = service_result.scalars().all()
-            service_ids = [link.service_id for link in service_links]
 
             # Return with updated data
-            return AppointmentResponse(
-                appointment_id=appointment.appointment_id,
-                user_id=appointment.user_id,
-                barber_id=appointment.barber_id,
-                status=appointment.status,
-                time_slot=time_slot_ids,
-                service_id=service_ids,
-            )
+            updated_appointment = await self._load_appointment(appointment_id)
+            return updated_appointment.to_response_schema()
 
         except SQLAlchemyError as e:
             logger.error(e)
@@ -324,6 +265,16 @@ class AppointmentOperations:
                 detail="An unexpected error occurred while updating the desired appointment",
             )
 
+    # Load an appointment with everything AppointmentResponse needs, replacing any stale copy in the session
+    async def _load_appointment(self, appointment_id: int) -> Optional[Appointment]:
+        result = await self.db.execute(
+            select(Appointment)
+            .options(*APPOINTMENT_RESPONSE)
+            .filter(Appointment.appointment_id == appointment_id)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().first()
+
     # Delete an appointment
     async def delete_appointment(self, appointment_id: int) -> bool:
         try:
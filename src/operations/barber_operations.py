@@ -1,11 +1,18 @@
+import datetime
 from typing import List
 
 from fastapi import HTTPException
+from sqlalchemy import and_, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.exc import SQLAlchemyError
-from modules.user.models import Barber, Schedule, User
-from modules.user.barber_schema import BarberCreate
+from sqlalchemy.orm.attributes import set_committed_value
+from modules.user.models import Barber, Schedule, TimeSlot, User
+from modules.user.barber_schema import BarberCreate, BarberResponse, BarberAvailabilityResponse
+from core.resilience import DependencyUnavailable
+from core.single_flight import read_flight
+from operations.list_queries import BarberUser, barber_response, list_barbers, with_barber
+from operations.load_profiles import BARBER_RESPONSE
 
 from auth.service import AuthService
 import logging
@@ -47,13 +54,17 @@ class BarberOperations:
         
         
             barber = Barber(user_id=user.user_id)
+            # Attach the user loaded above for the response, without reloading it or its barber backref
+            set_committed_value(barber, "user", user_object)
             self.db.add(barber)
             await self.db.commit()
-            await self.db.refresh(barber)
 
             # Add barber role to Keycloak user
             try:
-                AuthService.add_role_to_user(user_object.kc_id, "barber")
+                await AuthService.add_role_to_user(user_object.kc_id, "barber")
+            except DependencyUnavailable:
+                await self.db.rollback()
+                raise
             except Exception as e:
                 logger.error(f"Error adding role to Keycloak user: {str(e)}")
                 await self.db.rollback()
@@ -72,14 +83,20 @@ class BarberOperations:
                 detail="An unexpected error occurred"
             )
     
-    # Retrieve all barbers
-    async def get_all_barbers(self, page: int, limit: int) -> List[Barber]:
+    # Retrieve all barbers, concurrent identical requests share a single query
+    async def get_all_barbers(self, page: int, limit: int) -> List[BarberResponse]:
+        return await read_flight.do(
+            ("barbers", page, limit), lambda: self._get_all_barbers(page, limit)
+        )
+
+    async def _get_all_barbers(self, page: int, limit: int) -> List[BarberResponse]:
         try: 
             # Calculate offset for SQL query
             offset = (page - 1) * limit
 
-            result = await self.db.execute(select(Barber).limit(limit).offset(offset))
-            return result.scalars().all()
+            return await list_barbers(
+                self.db, select().order_by(Barber.barber_id).limit(limit).offset(offset)
+            )
         except SQLAlchemyError as e:
             logger.error(e)
             raise HTTPException(
@@ -90,7 +107,9 @@ class BarberOperations:
     # Retrieve a specific barber by their Barber ID
     async def get_barber_by_id(self, barber_id: int):
         try:
-            result = await self.db.execute(select(Barber).filter(Barber.barber_id == barber_id))
+            result = await self.db.execute(
+                select(Barber).options(*BARBER_RESPONSE).filter(Barber.barber_id == barber_id)
+            )
             first_result = result.scalars().first()
             if not first_result:
                 raise HTTPException(status_code = 400, detail="No barber found with provided ID")
@@ -103,21 +122,50 @@ class BarberOperations:
                 detail="An unexpected error occurred"
             )
         
-    async def list_barbers_by_schedule_date(self, schedule_date: str, page: int = None, limit: int = None) -> List[Barber]:
-        # Get a Schedule object by date
-        schedules = await self.db.execute(select(Schedule).filter(Schedule.date == schedule_date))
-        schedules = schedules.scalars().all()
-        if not schedules:
-            return []
-
-        # Get all barbers by joining the Schedule table on the barber_id
-        result = await self.db.execute(
-            select(Barber).join(Schedule).filter(Schedule.schedule_id.in_([schedule.schedule_id for schedule in schedules])
-            ).distinct(Barber.barber_id)
+    # Retrieve barbers working on a given date, paginated in the database, along with
+    # their count of free (available and not yet booked) slots that day.
+    # Concurrent identical requests share a single query.
+    async def list_barbers_by_schedule_date(self, schedule_date: datetime.date, page: int, limit: int) -> List[BarberAvailabilityResponse]:
+        return await read_flight.do(
+            ("barbers_by_date", schedule_date.isoformat(), page, limit),
+            lambda: self._list_barbers_by_schedule_date(schedule_date, page, limit),
         )
-        barbers = result.scalars().all()
-        if page and limit:
+
+    async def _list_barbers_by_schedule_date(self, schedule_date: datetime.date, page: int, limit: int) -> List[BarberAvailabilityResponse]:
+        try:
+            # Calculate offset for SQL query
             offset = (page - 1) * limit
-            barbers = barbers[offset:offset + limit]
-        return barbers
 
+            # A barber has at most one schedule per date (uq_barber_date), so the inner join
+            # on schedule cannot duplicate barbers and the slot count can be grouped per barber
+            result = await self.db.execute(
+                with_barber(select(func.count(TimeSlot.slot_id).label("free_slots")).select_from(Barber))
+                .join(
+                    Schedule,
+                    and_(Schedule.barber_id == Barber.barber_id, Schedule.date == schedule_date),
+                )
+                .outerjoin(
+                    TimeSlot,
+                    and_(
+                        TimeSlot.schedule_id == Schedule.schedule_id,
+                        TimeSlot.is_available.is_(True),
+                        TimeSlot.is_booked.is_(False),
+                    ),
+                )
+                .group_by(Barber.barber_id, BarberUser.user_id)
+                .order_by(Barber.barber_id)
+                .limit(limit)
+                .offset(offset)
+            )
+            return [
+                BarberAvailabilityResponse.model_construct(
+                    **dict(barber_response(row)), free_slots=row.free_slots
+                )
+                for row in result.all()
+            ]
+        except SQLAlchemyError as e:
+            logger.error(e)
+            raise HTTPException(
+                status_code=500,
+                detail="An unexpected error occurred"
+            )
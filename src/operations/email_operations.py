@@ -1,11 +1,21 @@
 from fastapi import HTTPException
 from fastapi_mail import FastMail, MessageSchema
 from core.config import settings
+from core.resilience import Dependency, DependencyUnavailable
+from core.tracing import traced
 import logging
 
 logger = logging.getLogger("email_operations")
 logger.setLevel(logging.ERROR)
 
+smtp_dependency = Dependency(
+    "SMTP",
+    timeout=settings.get_config()["smtp_timeout"],
+    max_concurrency=settings.get_config()["smtp_max_concurrency"],
+    failure_threshold=settings.get_config()["circuit_failure_threshold"],
+    reset_timeout=settings.get_config()["circuit_reset_timeout"],
+)
+
 class EmailOperations:
     def __init__(self):
         try:
@@ -19,6 +29,7 @@ class EmailOperations:
                 detail="Failed to initialize email configuration"
             ) 
 
+    @traced("EmailOperations.send_email")
     async def send_email(self, email: str, subject: str, body: str):
         try:
             # Create the email message schema
@@ -29,7 +40,9 @@ class EmailOperations:
                 subtype="html"
             )
             # Send the email
-            await self.fast_mail.send_message(message)
+            await smtp_dependency.call_async(self.fast_mail.send_message, message)
+        except DependencyUnavailable:
+            raise
         except Exception as e:
             logger.error(e)
             raise HTTPException(
@@ -0,0 +1,129 @@
+import csv
+import datetime
+import enum
+import io
+import json
+import logging
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import Select, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from core.db import AsyncDatabaseSessionManager, async_session_manager
+from modules.user.models import Appointment, Message, User
+
+logger = logging.getLogger("export_operations")
+logger.setLevel(logging.ERROR)
+
+# Rows fetched from the server-side cursor (and written to the response) per batch
+EXPORT_BATCH_SIZE = 1000
+
+
+class ExportFormat(str, enum.Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+
+# Plain value for a column, dates as ISO 8601 and enums as their value
+def export_value(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+class ExportOperations:
+    '''
+    Full-table exports streamed as NDJSON or CSV.
+    Each export holds its own connection for as long as the response is streaming,
+    independent of the request's session, and reads rows as plain tuples through a
+    server-side cursor in batches of EXPORT_BATCH_SIZE, so memory use stays the same
+    however many rows are exported.
+    '''
+
+    def __init__(self, session_manager: AsyncDatabaseSessionManager = async_session_manager):
+        self.session_manager = session_manager
+
+    # Every user, without their password
+    def users_query(self) -> Select:
+        return select(
+            User.user_id,
+            User.kc_id,
+            User.firstName,
+            User.lastName,
+            User.email,
+            User.phoneNumber,
+            User.is_admin,
+        ).order_by(User.user_id)
+
+    # Appointments, optionally limited to an appointment_date range (inclusive)
+    def appointments_query(
+        self, start_date: Optional[datetime.date] = None, end_date: Optional[datetime.date] = None
+    ) -> Select:
+        query = select(
+            Appointment.appointment_id,
+            Appointment.appointment_date,
+            Appointment.user_id,
+            Appointment.barber_id,
+            Appointment.status,
+        ).order_by(Appointment.appointment_id)
+        if start_date:
+            query = query.filter(Appointment.appointment_date >= start_date)
+        if end_date:
+            query = query.filter(Appointment.appointment_date <= end_date)
+        return query
+
+    # Messages, optionally limited to a timeStamp range (inclusive)
+    def messages_query(
+        self, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None
+    ) -> Select:
+        query = select(
+            Message.message_id,
+            Message.thread_id,
+            Message.sender_id,
+            Message.hasActiveMessage,
+            Message.text,
+            Message.timeStamp,
+        ).order_by(Message.message_id)
+        if start:
+            query = query.filter(Message.timeStamp >= start)
+        if end:
+            query = query.filter(Message.timeStamp <= end)
+        return query
+
+    # Encoded chunks of the query's rows, one chunk per batch
+    async def stream(self, query: Select, export_format: ExportFormat) -> AsyncIterator[bytes]:
+        try:
+            async with self.session_manager.connect() as connection:
+                result = await connection.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+                columns = list(result.keys())
+
+                if export_format == ExportFormat.csv:
+                    yield self._csv_chunk([columns])
+                async for rows in result.partitions():
+                    if export_format == ExportFormat.csv:
+                        yield self._csv_chunk([export_value(value) for value in row] for row in rows)
+                    else:
+                        yield self._ndjson_chunk(columns, rows)
+        except SQLAlchemyError as e:
+            # The status line is already sent, the client sees a truncated export
+            logger.error(f"Export stopped early: {e}")
+            raise
+
+    def _csv_chunk(self, rows) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode()
+
+    def _ndjson_chunk(self, columns: list[str], rows) -> bytes:
+        return "".join(
+            json.dumps({column: export_value(value) for column, value in zip(columns, row)}) + "\n"
+            for row in rows
+        ).encode()
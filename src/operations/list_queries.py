@@ -0,0 +1,195 @@
+from collections import defaultdict
+from decimal import Decimal
+from typing import Iterable
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from modules.user.models import (
+    Appointment,
+    Appointment_TimeSlot,
+    AppointmentService,
+    Barber,
+    Schedule,
+    Service,
+    TimeSlot,
+    User,
+)
+from modules.appointment_schema import AppointmentResponse, AppointmentStatus
+from modules.schedule_schema import ScheduleResponse
+from modules.time_slot_schema import TimeSlotChildResponse
+from modules.user.barber_schema import BarberResponse
+from modules.user.service_schema import ServiceResponse
+from modules.user.user_schema import UserResponse
+
+'''
+Core read path for the high-volume list endpoints.
+Selects only the columns a response needs as plain rows, so no ORM entities,
+identity map entries or `lazy="selectin"` relationship loads are created, and
+builds the response schemas with `model_construct`. The values come straight from
+typed columns, so the schemas are not validated again. Nested collections are
+fetched with one extra query per level and grouped by parent id.
+'''
+
+BarberUser = aliased(User, name="barber_user")
+
+USER_COLUMNS = (User.user_id, User.firstName, User.lastName, User.email, User.phoneNumber, User.is_admin)
+BARBER_COLUMNS = (
+    Barber.barber_id,
+    BarberUser.user_id.label("barber_user_id"),
+    BarberUser.firstName.label("barber_firstName"),
+    BarberUser.lastName.label("barber_lastName"),
+    BarberUser.email.label("barber_email"),
+    BarberUser.phoneNumber.label("barber_phoneNumber"),
+    BarberUser.is_admin.label("barber_is_admin"),
+)
+TIME_SLOT_COLUMNS = (TimeSlot.slot_id, TimeSlot.start_time, TimeSlot.end_time, TimeSlot.is_available, TimeSlot.is_booked)
+SERVICE_COLUMNS = (
+    Service.service_id,
+    Service.name,
+    Service.duration,
+    Service.price,
+    Service.category,
+    Service.description,
+    Service.popularity_score,
+)
+
+
+# Barber columns joined through the barber_user alias, add to a query that already selects from Barber
+def with_barber(query: Select) -> Select:
+    return query.add_columns(*BARBER_COLUMNS).join(BarberUser, BarberUser.user_id == Barber.user_id)
+
+
+def user_response(row, prefix: str = "") -> UserResponse:
+    mapping = row._mapping
+    return UserResponse.model_construct(
+        user_id=mapping[prefix + "user_id"],
+        firstName=mapping[prefix + "firstName"],
+        lastName=mapping[prefix + "lastName"],
+        email=mapping[prefix + "email"],
+        phoneNumber=mapping[prefix + "phoneNumber"],
+        is_admin=mapping[prefix + "is_admin"],
+    )
+
+
+# Barber of a row selected through with_barber
+def barber_response(row) -> BarberResponse:
+    return BarberResponse.model_construct(barber_id=row.barber_id, user=user_response(row, "barber_"))
+
+
+def time_slot_response(row) -> TimeSlotChildResponse:
+    return TimeSlotChildResponse.model_construct(
+        slot_id=row.slot_id,
+        start_time=row.start_time,
+        end_time=row.end_time,
+        is_available=row.is_available,
+        is_booked=row.is_booked,
+    )
+
+
+def service_response(row) -> ServiceResponse:
+    return ServiceResponse.model_construct(
+        service_id=row.service_id,
+        name=row.name,
+        duration=row.duration,
+        # The same Decimal that validating the column value into the schema produces
+        price=Decimal(str(row.price)),
+        category=row.category,
+        description=row.description,
+        popularity_score=row.popularity_score,
+    )
+
+
+# Group (parent_id, child) pairs into lists per parent id
+def group_by_parent(pairs: Iterable[tuple]) -> defaultdict:
+    grouped = defaultdict(list)
+    for parent_id, child in pairs:
+        grouped[parent_id].append(child)
+    return grouped
+
+
+async def list_barbers(db: AsyncSession, query: Select) -> list[BarberResponse]:
+    result = await db.execute(with_barber(query))
+    return [barber_response(row) for row in result.all()]
+
+
+async def list_services(db: AsyncSession, query: Select) -> list[ServiceResponse]:
+    result = await db.execute(query.add_columns(*SERVICE_COLUMNS))
+    return [service_response(row) for row in result.all()]
+
+
+# Schedules of a query selecting from Schedule, with their slots and barber
+async def list_schedules(db: AsyncSession, query: Select) -> list[ScheduleResponse]:
+    result = await db.execute(
+        with_barber(
+            query.add_columns(Schedule.schedule_id, Schedule.barber_id, Schedule.date, Schedule.is_working)
+            .join(Barber, Barber.barber_id == Schedule.barber_id)
+        )
+    )
+    rows = result.all()
+    if not rows:
+        return []
+
+    slot_result = await db.execute(
+        select(TimeSlot.schedule_id, *TIME_SLOT_COLUMNS)
+        .filter(TimeSlot.schedule_id.in_([row.schedule_id for row in rows]))
+        .order_by(TimeSlot.slot_id)
+    )
+    slots = group_by_parent((row.schedule_id, time_slot_response(row)) for row in slot_result.all())
+
+    return [
+        ScheduleResponse.model_construct(
+            schedule_id=row.schedule_id,
+            barber_id=row.barber_id,
+            date=row.date,
+            is_working=row.is_working,
+            time_slots=slots[row.schedule_id],
+            barber=barber_response(row),
+        )
+        for row in rows
+    ]
+
+
+# Appointments of a query selecting from Appointment, with their user, barber, slots and services
+async def list_appointments(db: AsyncSession, query: Select) -> list[AppointmentResponse]:
+    result = await db.execute(
+        with_barber(
+            query.add_columns(Appointment.appointment_id, Appointment.appointment_date, Appointment.status, *USER_COLUMNS)
+            .join(User, User.user_id == Appointment.user_id)
+            .join(Barber, Barber.barber_id == Appointment.barber_id)
+        )
+    )
+    rows = result.all()
+    if not rows:
+        return []
+    appointment_ids = [row.appointment_id for row in rows]
+
+    slot_result = await db.execute(
+        select(Appointment_TimeSlot.appointment_id, *TIME_SLOT_COLUMNS)
+        .join(TimeSlot, TimeSlot.slot_id == Appointment_TimeSlot.slot_id)
+        .filter(Appointment_TimeSlot.appointment_id.in_(appointment_ids))
+        # Ordering on the link table lets it drive the join instead of a scan over every time slot
+        .order_by(Appointment_TimeSlot.slot_id)
+    )
+    slots = group_by_parent((row.appointment_id, time_slot_response(row)) for row in slot_result.all())
+
+    service_result = await db.execute(
+        select(AppointmentService.appointment_id, *SERVICE_COLUMNS)
+        .join(Service, Service.service_id == AppointmentService.service_id)
+        .filter(AppointmentService.appointment_id.in_(appointment_ids))
+        .order_by(Service.service_id)
+    )
+    services = group_by_parent((row.appointment_id, service_response(row)) for row in service_result.all())
+
+    return [
+        AppointmentResponse.model_construct(
+            appointment_id=row.appointment_id,
+            appointment_date=row.appointment_date.strftime("%Y-%m-%d") if row.appointment_date else None,
+            user=user_response(row),
+            barber=barber_response(row),
+            status=AppointmentStatus(row.status.value),
+            time_slots=slots[row.appointment_id],
+            services=services[row.appointment_id],
+        )
+        for row in rows
+    ]
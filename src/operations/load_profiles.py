@@ -0,0 +1,42 @@
+from sqlalchemy.orm import joinedload, selectinload
+from modules.user.models import (
+    Appointment,
+    Appointment_TimeSlot,
+    AppointmentService,
+    Barber,
+    Schedule,
+    TimeSlot,
+)
+
+'''
+Named relationship load profiles.
+Relationships are lazy by default and a lazy load outside of an AsyncSession call
+fails, so every operation that reads a relationship applies the profile for
+exactly what it reads: `select(Model).options(*PROFILE)`. Many-to-one links are
+joined into the main query, collections are loaded with one extra IN query.
+'''
+
+# Barber and the user details BarberResponse needs
+BARBER_RESPONSE = (joinedload(Barber.user, innerjoin=True),)
+
+# Schedule with its slots and barber, everything ScheduleResponse needs
+SCHEDULE_RESPONSE = (
+    selectinload(Schedule.time_slots),
+    joinedload(Schedule.barber, innerjoin=True).joinedload(Barber.user, innerjoin=True),
+)
+
+# Schedule with the slots and slot bookings its delete cascades through
+SCHEDULE_DELETE = (
+    selectinload(Schedule.time_slots).selectinload(TimeSlot.appointment_time_slots),
+)
+
+# Time slot and the schedule it belongs to, for validating a booking
+TIME_SLOT_WITH_SCHEDULE = (joinedload(TimeSlot.schedule, innerjoin=True),)
+
+# Appointment with its client, barber, slots and services, everything AppointmentResponse needs
+APPOINTMENT_RESPONSE = (
+    joinedload(Appointment.user, innerjoin=True),
+    joinedload(Appointment.barber, innerjoin=True).joinedload(Barber.user, innerjoin=True),
+    selectinload(Appointment.appointment_time_slots).joinedload(Appointment_TimeSlot.time_slot, innerjoin=True),
+    selectinload(Appointment.appointment_services).joinedload(AppointmentService.service, innerjoin=True),
+)
@@ -38,7 +38,6 @@ class MessageOperations:
 
             self.db.add(new_message)
             await self.db.commit()
-            await self.db.refresh(new_message)
 
             # Return created message details
             return new_message
@@ -67,7 +66,6 @@ class MessageOperations:
             message_result.hasActiveMessage = message_update.hasActiveMessage
 
             await self.db.commit()
-            await self.db.refresh(message_result)
 
             return message_result
 
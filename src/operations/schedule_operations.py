@@ -3,12 +3,36 @@ import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.exc import SQLAlchemyError
-from modules.user.models import Schedule, TimeSlot
-from modules.schedule_schema import ScheduleCreate, ScheduleUpdate
-from modules.time_slot_schema import TimeSlotUpdate
+from sqlalchemy.orm import aliased
+from modules.user.models import (
+    Appointment,
+    Appointment_TimeSlot,
+    AppointmentService,
+    Barber,
+    Schedule,
+    TimeSlot,
+    User,
+)
+from modules.schedule_schema import (
+    ScheduleCreate,
+    ScheduleResponse,
+    ScheduleUpdate,
+    ScheduleGridBarber,
+    ScheduleGridDay,
+    ScheduleGridResponse,
+    CalendarAppointment,
+    CalendarBarber,
+    CalendarResponse,
+    CalendarSchedule,
+    CalendarTimeSlot,
+)
+from modules.user.user_schema import UserBase
+from core.single_flight import read_flight
+from operations.list_queries import list_schedules
+from operations.load_profiles import SCHEDULE_DELETE, SCHEDULE_RESPONSE
+from modules.time_slot_schema import TimeSlotUpdate, SlotState
 from typing import List, Optional
 from fastapi import HTTPException
-from datetime import time
 import logging
 
 
@@ -27,25 +51,22 @@ class ScheduleOperations:
     async def create_schedule(self, schedule_data: ScheduleCreate) -> Schedule:
         try:
             new_schedule = Schedule(**schedule_data.model_dump(exclude={"time_slots"}))
-            self.db.add(new_schedule)
-            await self.db.commit()
-            await self.db.refresh(new_schedule)
 
             # Create time slots for the schedule, each 30 minutes
             # starting from 9:00 AM to 5:00 PM
-            for time_slot in schedule_data.time_slots:
-                self.db.add(
-                    TimeSlot(
-                        schedule_id=new_schedule.schedule_id,
-                        start_time=time_slot.start_time,
-                        end_time=time_slot.end_time,
-                        is_available=time_slot.is_available,
-                    )
+            # The schedule and its slots are inserted together in a single commit
+            new_schedule.time_slots = [
+                TimeSlot(
+                    start_time=time_slot.start_time,
+                    end_time=time_slot.end_time,
+                    is_available=time_slot.is_available,
                 )
+                for time_slot in schedule_data.time_slots
+            ]
+            self.db.add(new_schedule)
             await self.db.commit()
-            await self.db.refresh(new_schedule)
 
-            return new_schedule
+            return await self._load_schedule(new_schedule.schedule_id)
         except SQLAlchemyError as e:
             logger.error(e)
             await self.db.rollback()
@@ -54,18 +75,23 @@ class ScheduleOperations:
                 detail="An unexpected error occurred during schedule block creation",
             )
 
-    # Get all schedule blocks
-    async def get_all_schedules(self, page: int, limit: int, schedule_date: datetime.date = None, barber_id: int = None) -> List[Schedule]:
+    # Get all schedule blocks, concurrent identical requests share a single query
+    async def get_all_schedules(self, page: int, limit: int, schedule_date: datetime.date = None, barber_id: int = None) -> List[ScheduleResponse]:
+        return await read_flight.do(
+            ("schedules", page, limit, schedule_date, barber_id),
+            lambda: self._get_all_schedules(page, limit, schedule_date, barber_id),
+        )
+
+    async def _get_all_schedules(self, page: int, limit: int, schedule_date: datetime.date = None, barber_id: int = None) -> List[ScheduleResponse]:
         try:
             # Calculate offset for SQL query
             offset = (page - 1) * limit
-            select_query = select(Schedule).limit(limit).offset(offset)
+            select_query = select().order_by(Schedule.schedule_id).limit(limit).offset(offset)
             if schedule_date:
                 select_query = select_query.filter(Schedule.date == schedule_date)
             if barber_id:
                 select_query = select_query.filter(Schedule.barber_id == barber_id)
-            result = await self.db.execute(select_query)
-            return result.scalars().all()
+            return await list_schedules(self.db, select_query)
         except SQLAlchemyError as e:
             logger.error(e)
             raise HTTPException(
@@ -73,11 +99,252 @@ class ScheduleOperations:
                 detail="An unexpected error occurred while fetching schedule blocks",
             )
 
+    # Single query over schedule/time_slots (joined to the barber's user) for a date range,
+    # only selecting the columns the calendar views need
+    def _schedule_rows_query(
+        self, start_date: datetime.date, end_date: datetime.date, barber_id: int = None
+    ):
+        select_query = (
+            select(
+                Schedule.schedule_id,
+                Schedule.barber_id,
+                Schedule.date,
+                Schedule.is_working,
+                User.firstName,
+                User.lastName,
+                User.email,
+                User.phoneNumber,
+                User.is_admin,
+                TimeSlot.slot_id,
+                TimeSlot.start_time,
+                TimeSlot.end_time,
+                TimeSlot.is_available,
+                TimeSlot.is_booked,
+            )
+            .join(Barber, Barber.barber_id == Schedule.barber_id)
+            .join(User, User.user_id == Barber.user_id)
+            .outerjoin(TimeSlot, TimeSlot.schedule_id == Schedule.schedule_id)
+            .filter(Schedule.date.between(start_date, end_date))
+            .order_by(Schedule.date, Schedule.barber_id, TimeSlot.start_time)
+        )
+        if barber_id:
+            select_query = select_query.filter(Schedule.barber_id == barber_id)
+        return select_query
+
+    # Get a compact calendar grid of schedules and their slots for a date range,
+    # concurrent identical requests share a single query
+    async def get_schedule_grid(
+        self, start_date: datetime.date, end_date: datetime.date, barber_id: int = None
+    ) -> ScheduleGridResponse:
+        return await read_flight.do(
+            ("schedule_grid", start_date, end_date, barber_id),
+            lambda: self._get_schedule_grid(start_date, end_date, barber_id),
+        )
+
+    async def _get_schedule_grid(
+        self, start_date: datetime.date, end_date: datetime.date, barber_id: int = None
+    ) -> ScheduleGridResponse:
+        try:
+            result = await self.db.execute(
+                self._schedule_rows_query(start_date, end_date, barber_id)
+            )
+
+            barbers: dict[int, ScheduleGridBarber] = {}
+            days: dict[int, ScheduleGridDay] = {}
+            for row in result.all():
+                if row.barber_id not in barbers:
+                    barbers[row.barber_id] = ScheduleGridBarber(
+                        firstName=row.firstName, lastName=row.lastName
+                    )
+                day = days.get(row.schedule_id)
+                if day is None:
+                    day = days[row.schedule_id] = ScheduleGridDay(
+                        schedule_id=row.schedule_id,
+                        barber_id=row.barber_id,
+                        date=row.date,
+                        is_working=row.is_working,
+                        slots=[],
+                    )
+                # Schedules without any time slots still show up as an empty day
+                if row.slot_id is not None:
+                    day.slots.append((
+                        row.slot_id,
+                        row.start_time.strftime("%H:%M"),
+                        row.end_time.strftime("%H:%M"),
+                        SlotState.from_flags(row.is_available, row.is_booked).value,
+                    ))
+
+            return ScheduleGridResponse(
+                start_date=start_date,
+                end_date=end_date,
+                slot_states={state.name: state.value for state in SlotState},
+                barbers=barbers,
+                days=list(days.values()),
+            )
+        except SQLAlchemyError as e:
+            logger.error(e)
+            raise HTTPException(
+                status_code=500,
+                detail="An unexpected error occurred while fetching the schedule grid",
+            )
+
+    # Get every barber's schedules, slots and the appointments occupying them for a date range.
+    # Built from a fixed three queries regardless of how many barbers or days are requested,
+    # concurrent identical requests share a single set of queries.
+    async def get_calendar(
+        self, start_date: datetime.date, end_date: datetime.date
+    ) -> CalendarResponse:
+        return await read_flight.do(
+            ("calendar", start_date, end_date),
+            lambda: self._get_calendar(start_date, end_date),
+        )
+
+    async def _get_calendar(
+        self, start_date: datetime.date, end_date: datetime.date
+    ) -> CalendarResponse:
+        try:
+            schedule_rows = (
+                await self.db.execute(self._schedule_rows_query(start_date, end_date))
+            ).all()
+
+            # Appointments in the range with their client, their barber and the slots they occupy
+            barber_user = aliased(User)
+            appointment_rows = (
+                await self.db.execute(
+                    select(
+                        Appointment.appointment_id,
+                        Appointment.appointment_date,
+                        Appointment.user_id,
+                        Appointment.barber_id,
+                        Appointment.status,
+                        User.firstName,
+                        User.lastName,
+                        Appointment_TimeSlot.slot_id,
+                        barber_user.firstName.label("barber_firstName"),
+                        barber_user.lastName.label("barber_lastName"),
+                        barber_user.email.label("barber_email"),
+                        barber_user.phoneNumber.label("barber_phoneNumber"),
+                        barber_user.is_admin.label("barber_is_admin"),
+                    )
+                    .join(User, User.user_id == Appointment.user_id)
+                    .join(Barber, Barber.barber_id == Appointment.barber_id)
+                    .join(barber_user, barber_user.user_id == Barber.user_id)
+                    .outerjoin(
+                        Appointment_TimeSlot,
+                        Appointment_TimeSlot.appointment_id == Appointment.appointment_id,
+                    )
+                    .filter(Appointment.appointment_date.between(start_date, end_date))
+                    .order_by(Appointment.appointment_id)
+                )
+            ).all()
+
+            # Services booked for those appointments
+            service_rows = (
+                await self.db.execute(
+                    select(AppointmentService.appointment_id, AppointmentService.service_id)
+                    .join(
+                        Appointment,
+                        Appointment.appointment_id == AppointmentService.appointment_id,
+                    )
+                    .filter(Appointment.appointment_date.between(start_date, end_date))
+                )
+            ).all()
+
+            barbers: dict[int, CalendarBarber] = {}
+            schedules: dict[int, CalendarSchedule] = {}
+            for row in schedule_rows:
+                barber = barbers.get(row.barber_id)
+                if barber is None:
+                    barber = barbers[row.barber_id] = CalendarBarber(
+                        barber_id=row.barber_id,
+                        user=UserBase(
+                            firstName=row.firstName,
+                            lastName=row.lastName,
+                            email=row.email,
+                            phoneNumber=row.phoneNumber,
+                            is_admin=row.is_admin,
+                        ),
+                        schedules=[],
+                        appointments=[],
+                    )
+                schedule = schedules.get(row.schedule_id)
+                if schedule is None:
+                    schedule = schedules[row.schedule_id] = CalendarSchedule(
+                        schedule_id=row.schedule_id,
+                        date=row.date,
+                        is_working=row.is_working,
+                        time_slots=[],
+                    )
+                    barber.schedules.append(schedule)
+                if row.slot_id is not None:
+                    schedule.time_slots.append(CalendarTimeSlot(
+                        slot_id=row.slot_id,
+                        start_time=row.start_time,
+                        end_time=row.end_time,
+                        is_available=row.is_available,
+                        is_booked=row.is_booked,
+                    ))
+
+            appointment_services: dict[int, list[int]] = {}
+            for row in service_rows:
+                appointment_services.setdefault(row.appointment_id, []).append(row.service_id)
+
+            appointments: dict[int, CalendarAppointment] = {}
+            slot_appointments: dict[int, int] = {}
+            for row in appointment_rows:
+                appointment = appointments.get(row.appointment_id)
+                if appointment is None:
+                    appointment = appointments[row.appointment_id] = CalendarAppointment(
+                        appointment_id=row.appointment_id,
+                        appointment_date=row.appointment_date,
+                        user_id=row.user_id,
+                        client_name=f"{row.firstName} {row.lastName}",
+                        status=row.status.value,
+                        slot_ids=[],
+                        service_ids=appointment_services.get(row.appointment_id, []),
+                    )
+                    # Appointments are grouped under their barber, who may have no schedule in the range
+                    barber = barbers.get(row.barber_id)
+                    if barber is None:
+                        barber = barbers[row.barber_id] = CalendarBarber(
+                            barber_id=row.barber_id,
+                            user=UserBase(
+                                firstName=row.barber_firstName,
+                                lastName=row.barber_lastName,
+                                email=row.barber_email,
+                                phoneNumber=row.barber_phoneNumber,
+                                is_admin=row.barber_is_admin,
+                            ),
+                            schedules=[],
+                            appointments=[],
+                        )
+                    barber.appointments.append(appointment)
+                if row.slot_id is not None:
+                    appointment.slot_ids.append(row.slot_id)
+                    slot_appointments[row.slot_id] = row.appointment_id
+
+            for schedule in schedules.values():
+                for time_slot in schedule.time_slots:
+                    time_slot.appointment_id = slot_appointments.get(time_slot.slot_id)
+
+            return CalendarResponse(
+                start_date=start_date,
+                end_date=end_date,
+                barbers=list(barbers.values()),
+            )
+        except SQLAlchemyError as e:
+            logger.error(e)
+            raise HTTPException(
+                status_code=500,
+                detail="An unexpected error occurred while fetching the calendar",
+            )
+
     # Get a specific schedule block by its id
     async def get_schedule_by_id(self, schedule_id: int) -> Optional[Schedule]:
         try:
             result = await self.db.execute(
                 select(Schedule)
+                .options(*SCHEDULE_RESPONSE)
                 .join(TimeSlot)
                 .filter(Schedule.schedule_id == schedule_id)
             )
@@ -89,6 +356,16 @@ class ScheduleOperations:
                 detail="An unexpected error occurred while fetching the schedule block",
             )
 
+    # Reload a schedule written in this session with everything its response needs
+    async def _load_schedule(self, schedule_id: int) -> Schedule:
+        result = await self.db.execute(
+            select(Schedule)
+            .options(*SCHEDULE_RESPONSE)
+            .filter(Schedule.schedule_id == schedule_id)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().one()
+
     # Update an existing schedule block
     async def update_schedule(
         self, schedule_id: int, schedule_data: ScheduleUpdate
@@ -131,8 +408,7 @@ class ScheduleOperations:
                     setattr(schedule, key, value)
 
             await self.db.commit()
-            await self.db.refresh(schedule)
-            return schedule
+            return await self._load_schedule(schedule_id)
         except SQLAlchemyError as e:
             logger.error(e)
             await self.db.rollback()
@@ -145,7 +421,9 @@ class ScheduleOperations:
     async def delete_schedule(self, schedule_id: int) -> bool:
         try:
             result = await self.db.execute(
-                select(Schedule).filter(Schedule.schedule_id == schedule_id)
+                select(Schedule)
+                .options(*SCHEDULE_DELETE)
+                .filter(Schedule.schedule_id == schedule_id)
             )
             schedule = result.scalars().first()
             if not schedule:
@@ -1,15 +1,92 @@
-from typing import List
-from sqlalchemy import select
+import asyncio
+import hashlib
+import time
+from typing import List, NamedTuple, Optional
+from pydantic import TypeAdapter
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
-from modules.user.models import Service
+from modules.user.models import CacheVersion, Service
 from modules.user.service_schema import ServiceBase, ServiceResponse, ServiceUpdate
+from core.config import settings
+from operations.list_queries import list_services
 from fastapi import HTTPException
 import logging
 
 logger = logging.getLogger("service_operations")
 logger.setLevel(logging.ERROR)
 
+# Name of the service catalog row in the cache_version table
+SERVICE_CATALOG_CACHE = "service_catalog"
+
+# Upper bound on the number of distinct (page, limit) pages kept per catalog version
+MAX_CACHED_PAGES = 256
+
+service_list_adapter = TypeAdapter(List[ServiceResponse])
+
+
+class CatalogPage(NamedTuple):
+    body: bytes
+    etag: str
+
+
+'''
+Versioned in-process cache of the service catalog.
+Pages are stored as pre-serialized JSON with a strong ETag. The catalog version
+is kept in the cache_version table and bumped by every service write, so each
+worker re-checks it at most every `check_interval` seconds and rebuilds when
+another worker has changed the menu.
+'''
+class ServiceCatalog:
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self._version: Optional[int] = None
+        self._services: List[ServiceResponse] = []
+        self._pages: dict[tuple[int, int], CatalogPage] = {}
+        self._checked_at: float = 0.0
+        self._lock = asyncio.Lock()
+
+    # Drop the local copy so the next read reloads it
+    def invalidate(self):
+        self._version = None
+        self._checked_at = 0.0
+
+    async def get_page(self, db: AsyncSession, page: int, limit: int) -> CatalogPage:
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            async with self._lock:
+                # Another request may have refreshed the catalog while we waited for the lock
+                if time.monotonic() - self._checked_at >= self.check_interval:
+                    await self._refresh(db)
+
+        key = (page, limit)
+        catalog_page = self._pages.get(key)
+        if catalog_page is None:
+            offset = (page - 1) * limit
+            body = service_list_adapter.dump_json(self._services[offset:offset + limit])
+            catalog_page = CatalogPage(body=body, etag=f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+            if len(self._pages) >= MAX_CACHED_PAGES:
+                self._pages.clear()
+            self._pages[key] = catalog_page
+        return catalog_page
+
+    async def _refresh(self, db: AsyncSession):
+        # Read the version before the rows, so a concurrent write can only make us rebuild twice
+        result = await db.execute(
+            select(CacheVersion.version).filter(CacheVersion.name == SERVICE_CATALOG_CACHE)
+        )
+        version = result.scalar() or 0
+
+        if version != self._version:
+            self._services = await list_services(db, select().order_by(Service.service_id))
+            self._pages = {}
+            self._version = version
+        self._checked_at = time.monotonic()
+
+
+service_catalog = ServiceCatalog(settings.get_config()["service_catalog_check_interval"])
+
+
 '''
 Contains CRUD operations relating to services
 '''
@@ -22,8 +99,9 @@ class ServiceOperations:
         try:
             new_service = Service(**service.model_dump())
             self.db.add(new_service)
+            await self.bump_catalog_version()
             await self.db.commit()
-            await self.db.refresh(new_service)
+            service_catalog.invalidate()
             return new_service
 
         except SQLAlchemyError as e:
@@ -33,13 +111,10 @@ class ServiceOperations:
                 detail="An unexpected error occurred"
             )
         
-    async def get_all_services(self, page: int, limit: int) -> List[ServiceResponse]:
+    # Get a page of the service catalog as pre-serialized JSON from the in-process cache
+    async def get_catalog_page(self, page: int, limit: int) -> CatalogPage:
         try:
-            # Calculate offset for pagination
-            offset = (page - 1) * limit
-
-            services = await self.db.execute(select(Service).limit(limit).offset(offset))
-            return services.scalars().all()
+            return await service_catalog.get_page(self.db, page, limit)
         except SQLAlchemyError as e:
             logger.error(e)
             raise HTTPException(
@@ -62,8 +137,9 @@ class ServiceOperations:
             for key, value in service_details.model_dump(exclude_unset=True).items():
                 setattr(service_to_update, key, value)
 
+            await self.bump_catalog_version()
             await self.db.commit()
-            await self.db.refresh(service_to_update)
+            service_catalog.invalidate()
 
             return service_to_update
 
@@ -83,7 +159,9 @@ class ServiceOperations:
                 return False
 
             await self.db.delete(service_to_delete)
+            await self.bump_catalog_version()
             await self.db.commit()
+            service_catalog.invalidate()
             return True
         
         except SQLAlchemyError as e:
@@ -93,9 +171,12 @@ class ServiceOperations:
                 detail="An unexpected error occurred"
             )
 
-
-        
-        
-
-    
-
+    # Bump the catalog version in the current transaction so every worker drops its cached menu
+    async def bump_catalog_version(self):
+        result = await self.db.execute(
+            update(CacheVersion)
+            .where(CacheVersion.name == SERVICE_CATALOG_CACHE)
+            .values(version=CacheVersion.version + 1)
+        )
+        if result.rowcount == 0:
+            self.db.add(CacheVersion(name=SERVICE_CATALOG_CACHE, version=1))
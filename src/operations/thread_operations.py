@@ -1,6 +1,6 @@
 from typing import List
 from fastapi import HTTPException
-from sqlalchemy import or_, select, desc
+from sqlalchemy import select, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 from modules.thread_schema import ThreadCreate, ThreadResponse
 from sqlalchemy.exc import SQLAlchemyError
@@ -48,15 +48,11 @@ class ThreadOperations:
             )
             self.db.add(new_thread)
             await self.db.commit()
-            await self.db.refresh(new_thread)
-
-            await self.db.refresh(existing_user_one_result)
-            await self.db.refresh(existing_user_two_result)
 
             return ThreadResponse(
                 thread_id=new_thread.thread_id,
-                receivingUser=new_thread.receiving_user.user_id,
-                sendingUser=new_thread.sending_user.user_id
+                receivingUser=new_thread.receivingUser,
+                sendingUser=new_thread.sendingUser
             )
         
         except SQLAlchemyError as e:
@@ -3,16 +3,191 @@ from sqlalchemy.future import select
 from sqlalchemy.exc import SQLAlchemyError
 from modules.user.models import User
 from modules.user.user_schema import UserCreate, UserUpdate, UserPasswordUpdate, UserResponse
-from typing import List, Optional
+from typing import Any, Callable, List, NamedTuple, Optional
 from fastapi import HTTPException
-from sqlalchemy import or_
+from sqlalchemy import case, or_
+from sqlalchemy.dialects.mysql import match
 
 from auth.service import AuthService
+from core.cache import TTLCache
+from core.config import settings
+from core.prefix_index import PrefixIndex, IndexBudgetExceeded
+from core.resilience import DependencyUnavailable
+import asyncio
 import logging
+import re
+import time
 
 logger = logging.getLogger("user_operations")
 logger.setLevel(logging.ERROR)
 
+# Short-lived cache of Keycloak subject (kc_id) -> local user, used to resolve /users/me
+principal_cache = TTLCache(settings.get_config()["principal_cache_ttl"])
+
+# Characters with a special meaning in FULLTEXT boolean mode, stripped from search terms
+SEARCH_OPERATORS = re.compile(r'[+\-<>()~*"@]')
+
+# LIKE wildcards that need escaping in prefix matches
+LIKE_WILDCARDS = re.compile(r"[/%_]")
+
+# The server's ngram_token_size, the n-gram index holds no shorter token
+NGRAM_TOKEN_SIZE = 2
+
+# Search terms made only of these characters are treated as phone numbers
+PHONE_TERM = re.compile(r"[\d\s()+\-.]+")
+NON_DIGITS = re.compile(r"\D")
+
+
+# User columns the typeahead index is built from
+class SearchRow(NamedTuple):
+    user_id: int
+    firstName: str
+    lastName: str
+    email: str
+    phoneNumber: str
+
+
+'''
+Optional in-process typeahead index for client lookup.
+Maps normalized "first last" names, last names, emails and phone numbers to user_id.
+Built at startup from one streaming query, kept current by the create/update/delete
+hooks in UserOperations and rebuilt every `rebuild_interval` seconds so changes made
+through other workers are picked up. Falls back to the FULLTEXT search while it is
+not ready or when it would exceed its memory budget.
+Keys are generated and sorted in a worker thread, so a rebuild does not stall the
+event loop. Writes made while a build runs are logged and replayed on the new index
+before it is swapped in.
+'''
+class UserTypeaheadIndex:
+
+    def __init__(self, enabled: bool, max_bytes: int, rebuild_interval: float):
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.rebuild_interval = rebuild_interval
+        self.ready = False
+        self.built_at: Optional[float] = None
+        self._index = PrefixIndex(max_bytes)
+        # Changes to replay on the index being built, None while no build runs
+        self._pending: Optional[list[Callable[[PrefixIndex], Any]]] = None
+
+    @property
+    def size_bytes(self) -> int:
+        return self._index.size_bytes if self.ready else 0
+
+    @staticmethod
+    def keys_for(user) -> list[str]:
+        first_name = " ".join(user.firstName.casefold().split())
+        last_name = " ".join(user.lastName.casefold().split())
+        return [
+            f"{first_name} {last_name}",
+            last_name,
+            user.email.casefold(),
+            NON_DIGITS.sub("", user.phoneNumber),
+        ]
+
+    @staticmethod
+    def normalize_term(term: str) -> str:
+        if PHONE_TERM.fullmatch(term):
+            return NON_DIGITS.sub("", term)
+        return " ".join(term.casefold().split())
+
+    # Build a fresh index from one streaming query and swap it in
+    async def build(self, db: AsyncSession):
+        self._pending = []
+        try:
+            result = await db.stream(
+                select(User.user_id, User.firstName, User.lastName, User.email, User.phoneNumber)
+                .execution_options(yield_per=5000)
+            )
+            # One list per column rather than a row object per user, which every garbage
+            # collection on the event loop would have to scan
+            columns = ([], [], [], [], [])
+            async for partition in result.partitions():
+                for column, values in zip(columns, zip(*partition)):
+                    column.extend(values)
+
+            index = await asyncio.to_thread(self._build_index, columns)
+            # Back on the event loop, no write can land between the replay and the swap
+            for change in self._pending:
+                change(index)
+        except IndexBudgetExceeded as e:
+            logger.error(f"User typeahead index disabled: {e}")
+            self.ready = False
+            return
+        finally:
+            self._pending = None
+        self._index = index
+        self.ready = True
+        self.built_at = time.monotonic()
+
+    def _build_index(self, columns: tuple) -> PrefixIndex:
+        index = PrefixIndex(self.max_bytes)
+        index.build(
+            (key, row.user_id) for row in map(SearchRow._make, zip(*columns)) for key in self.keys_for(row)
+        )
+        return index
+
+    # Seconds since the index was last built, None if it never was
+    def age(self) -> Optional[float]:
+        if self.built_at is None:
+            return None
+        return time.monotonic() - self.built_at
+
+    async def rebuild_periodically(self, session_factory):
+        while True:
+            await asyncio.sleep(self.rebuild_interval)
+            try:
+                async with session_factory() as db:
+                    await self.build(db)
+            except Exception as e:
+                logger.error(f"Error rebuilding user typeahead index: {e}")
+
+    # Changes are idempotent, a replayed write the new index already holds changes nothing
+    def add(self, user):
+        keys = self.keys_for(user)
+        self._apply(lambda index: index.add(user.user_id, keys))
+
+    def replace(self, user_id: int, old_keys: list[str], user):
+        keys = self.keys_for(user)
+        self._apply(lambda index: (
+            index.remove(user_id, old_keys),
+            index.add(user_id, keys),
+        ))
+
+    def remove(self, user_id: int, old_keys: list[str]):
+        self._apply(lambda index: index.remove(user_id, old_keys))
+
+    # Candidate user IDs for a search term, None if the index cannot answer
+    def search(self, term: str, limit: int, offset: int) -> Optional[list[int]]:
+        if not self.ready:
+            return None
+        prefix = self.normalize_term(term)
+        if not prefix:
+            return []
+        return self._index.search(prefix, limit, offset)
+
+    def matches(self, user, term: str) -> bool:
+        prefix = self.normalize_term(term)
+        return any(key.startswith(prefix) for key in self.keys_for(user))
+
+    def _apply(self, change: Callable[[PrefixIndex], Any]):
+        if self._pending is not None:
+            self._pending.append(change)
+        if not self.ready:
+            return
+        try:
+            change(self._index)
+        except IndexBudgetExceeded as e:
+            logger.error(f"User typeahead index disabled: {e}")
+            self.ready = False
+
+
+user_typeahead_index = UserTypeaheadIndex(
+    settings.get_config()["user_typeahead_index"],
+    settings.get_config()["user_typeahead_max_mb"] * 1024 * 1024,
+    settings.get_config()["user_typeahead_rebuild_interval"],
+)
+
 '''
 CRUD operations for interacting with users database table
 '''
@@ -53,10 +228,12 @@ class UserOperations:
             # Creates a new user
             new_user = User(**user_data.model_dump())
             try:
-                kc_id = AuthService.register_kc_user(new_user)
+                kc_id = await AuthService.register_kc_user(new_user)
                 if not kc_id:
                     raise HTTPException(status_code=400, detail="Keycloak user creation has failed")
                 new_user.kc_id = kc_id
+            except DependencyUnavailable:
+                raise
             except Exception as e:
                 raise HTTPException(
                     status_code=400,
@@ -64,7 +241,7 @@ class UserOperations:
                 )
             self.db.add(new_user)
             await self.db.commit()
-            await self.db.refresh(new_user)
+            user_typeahead_index.add(new_user)
             
             return new_user
         # If another error is returned that was somehow not caught above, return generic error message.
@@ -123,18 +300,50 @@ class UserOperations:
                 detail="An unexpected error occured"
             )
 
-    # Get users matching search criteria
+    # Resolve the local user for an authenticated Keycloak subject, served from the principal cache
+    async def get_current_user_response(self, kc_id: str) -> UserResponse:
+        user_response = principal_cache.get(kc_id)
+        if user_response is None:
+            user = await self.get_user_by_kc_id(kc_id)
+            user_response = user.to_response_schema()
+            principal_cache.set(kc_id, user_response)
+        return user_response
+
+    # Get users matching search criteria.
+    # Uses the n-gram FULLTEXT index over names, email and phone number, every word of the
+    # search term must appear in one of those columns. Words shorter than an n-gram ("John S")
+    # cannot match the index and must instead start one of the columns.
+    # Prefix matches rank first, then by relevance.
     async def search_users_by_username(self, term: str, page: int, limit: int) -> List[UserResponse]:
         offset = (page - 1) * limit
+
+        # Answer from the in-process typeahead index when it is enabled and built
+        if user_typeahead_index.ready:
+            return await self._search_typeahead(term, limit, offset)
+
+        words = SEARCH_OPERATORS.sub(" ", term).split()
+        if not words:
+            return []
+        filters = [self._prefix_filter(word) for word in words if len(word) < NGRAM_TOKEN_SIZE]
+        # Rank typeahead-style prefix matches of the first word above other matches
+        order_by = [case((self._prefix_filter(words[0]), 1), else_=0).desc()]
+
+        indexed_words = [word for word in words if len(word) >= NGRAM_TOKEN_SIZE]
+        if indexed_words:
+            # Each word as a required phrase, which n-gram matching treats as a substring search
+            against = " ".join(f'+"{word}"' for word in indexed_words)
+            relevance = match(
+                User.firstName, User.lastName, User.email, User.phoneNumber, against=against
+            ).in_boolean_mode()
+            filters.append(relevance)
+            order_by.append(relevance.desc())
+        order_by.append(User.user_id)
+
         try:
             stmt = (
                 select(User)
-                .filter(
-                    or_(
-                        User.firstName.ilike(f"%{term}%"),
-                        User.lastName.ilike(f"%{term}%")
-                    )
-                )
+                .filter(*filters)
+                .order_by(*order_by)
                 .limit(limit)
                 .offset(offset)
             )
@@ -144,7 +353,55 @@ class UserOperations:
             # Convert ORM models to Pydantic schemas
             return [UserResponse.from_orm(u) for u in users]
         except SQLAlchemyError as e:
-            # Optional: log error e
+            logger.error(e)
+            raise HTTPException(
+                status_code=500,
+                detail="An error occurred searching for users"
+            )
+
+    # Any of the searched columns starting with `word`
+    @staticmethod
+    def _prefix_filter(word: str):
+        prefix = LIKE_WILDCARDS.sub(r"/\g<0>", word) + "%"
+        return or_(
+            User.firstName.like(prefix, escape="/"),
+            User.lastName.like(prefix, escape="/"),
+            User.email.like(prefix, escape="/"),
+            User.phoneNumber.like(prefix, escape="/"),
+        )
+
+    # Page through typeahead candidates in index order. Entries that went stale on this worker
+    # are dropped before the offset is counted, so pages stay full and do not overlap.
+    async def _search_typeahead(self, term: str, limit: int, offset: int) -> List[UserResponse]:
+        results: List[UserResponse] = []
+        skipped = 0
+        position = 0
+        batch = offset + limit
+        try:
+            while len(results) < limit:
+                user_ids = user_typeahead_index.search(term, batch, position) or []
+                if not user_ids:
+                    break
+                position += len(user_ids)
+                result = await self.db.execute(select(User).filter(User.user_id.in_(user_ids)))
+                users = {user.user_id: user for user in result.scalars().all()}
+                for user_id in user_ids:
+                    user = users.get(user_id)
+                    if user is None or not user_typeahead_index.matches(user, term):
+                        continue
+                    if skipped < offset:
+                        skipped += 1
+                        continue
+                    results.append(UserResponse.from_orm(user))
+                    if len(results) == limit:
+                        break
+                if len(user_ids) < batch:
+                    break
+                # Stale entries left the page short, continue in page-sized batches
+                batch = limit
+            return results
+        except SQLAlchemyError as e:
+            logger.error(e)
             raise HTTPException(
                 status_code=500,
                 detail="An error occurred searching for users"
@@ -174,12 +431,16 @@ class UserOperations:
             if not user:
                 return None
 
+            old_search_keys = UserTypeaheadIndex.keys_for(user)
             for key, value in user_data.model_dump(exclude_unset=True).items():
                 setattr(user, key, value)
 
             # Update Keycloak user data# Update user in Keycloak
             try:
-                AuthService.update_kc_user(user)
+                await AuthService.update_kc_user(user)
+            except DependencyUnavailable:
+                await self.db.rollback()
+                raise
             except Exception as e:
                 logger.error(e)
                 # Rollback database changes if Keycloak update fails
@@ -191,7 +452,8 @@ class UserOperations:
             
             # Update database user data
             await self.db.commit()
-            await self.db.refresh(user)
+            principal_cache.delete(user.kc_id)
+            user_typeahead_index.replace(user.user_id, old_search_keys, user)
 
             return user
     
@@ -213,11 +475,14 @@ class UserOperations:
                 return False
             
             # Delete user from Keycloak server
-            AuthService.delete_kc_user(user.email)
+            await AuthService.delete_kc_user(user)
 
             # Delete user from database
+            old_search_keys = UserTypeaheadIndex.keys_for(user)
             await self.db.delete(user)
             await self.db.commit()
+            principal_cache.delete(user.kc_id)
+            user_typeahead_index.remove(user_id, old_search_keys)
             return True
         
         # Handle generic exceptions, wrong ID provided error already handled in router
@@ -240,7 +505,9 @@ class UserOperations:
             
             # Check if the old password is correct
             try:
-                AuthService.authenticate_user(user.email, password_data.old_password)
+                await AuthService.authenticate_user(user.email, password_data.old_password)
+            except DependencyUnavailable:
+                raise
             except Exception as e:
                 logger.error(e)
                 raise HTTPException(status_code=400, detail="Old password is incorrect")
@@ -251,7 +518,9 @@ class UserOperations:
 
             # Update the user's password in Keycloak
             try:
-                AuthService.update_kc_user_password(user.kc_id, password_data.new_password)
+                await AuthService.update_kc_user_password(user.kc_id, password_data.new_password)
+            except DependencyUnavailable:
+                raise
             except Exception as e:
                 logger.error(e)
                 # Rollback database changes if Keycloak update fails
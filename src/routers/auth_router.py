@@ -1,15 +1,29 @@
-from fastapi import APIRouter, Form
+from fastapi import APIRouter, Form, Request
 from auth.controller import AuthController
 from auth.models import TokenResponse
+from core.config import settings
+from core.rate_limit import SlidingWindowLimiter, rate_limit_backend
+from modules.user.error_response_schema import ErrorResponse
 
 auth_router = APIRouter(
     prefix="/api/v1/auth",
     tags=["auth"],
 )
 
+# Login attempts per client IP and per username
+login_limiter = SlidingWindowLimiter(
+    "login",
+    ip_limit=settings.get_config()["login_rate_limit_per_ip"],
+    account_limit=settings.get_config()["login_rate_limit_per_account"],
+    window=settings.get_config()["rate_limit_window"],
+    backend=rate_limit_backend,
+)
+
 # Define the login endpoint
-@auth_router.post("/login", response_model=TokenResponse)
-async def login(username: str = Form(...), password: str = Form(...)):
+@auth_router.post("/login", response_model=TokenResponse, responses={
+    429: {"model": ErrorResponse}
+})
+async def login(request: Request, username: str = Form(...), password: str = Form(...)):
     """
     Login endpoint to authenticate the user and return an access token.
 
@@ -18,6 +32,23 @@ async def login(username: str = Form(...), password: str = Form(...)):
         password (str): The password of the user.
 
     Returns:
-        TokenResponse: Contains the access token upon successful authentication.
+        TokenResponse: Contains the access and refresh tokens upon successful authentication.
+    """
+    # Reject bursts before they reach Keycloak
+    await login_limiter.check(request, username)
+
+    return await AuthController.login(username, password)
+
+# Define the token refresh endpoint
+@auth_router.post("/refresh", response_model=TokenResponse)
+async def refresh(refresh_token: str = Form(...)):
+    """
+    Refresh endpoint to renew an access token without re-submitting credentials.
+
+    Args:
+        refresh_token (str): The refresh token returned by login or a previous refresh.
+
+    Returns:
+        TokenResponse: Contains the new access and refresh tokens.
     """
-    return AuthController.login(username, password)
+    return await AuthController.refresh(refresh_token)
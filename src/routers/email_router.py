@@ -1,12 +1,9 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException
+from fastapi import APIRouter, HTTPException
 from operations.email_operations import email_operations
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from core.dependencies import CurrentUserDep
 from modules.user.email_schema import EmailSchema
 from modules.user.error_response_schema import ErrorResponse
 
-# Initialize the HTTPBearer scheme for authentication
-bearer_scheme = HTTPBearer()
-
 email_router = APIRouter(
     prefix="/api/v1/email",
     tags=["email"],
@@ -17,12 +14,13 @@ email_router = APIRouter(
 @email_router.post("/send",
     responses={
         200: {"description": "Email has been sent successfully."},
-        500: {"model": ErrorResponse, "description": "An error occurred while sending the email."}
+        500: {"model": ErrorResponse, "description": "An error occurred while sending the email."},
+        503: {"model": ErrorResponse, "description": "The mail server is unavailable, retry after the Retry-After header's seconds."}
     }
 )
 async def send_email(
-    email_data: EmailSchema,  
-    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)
+    user_info: CurrentUserDep,
+    email_data: EmailSchema,
 ):
     try:
         # Send the email
@@ -35,6 +33,9 @@ async def send_email(
         # Successful response
         return {"message": "Email has been sent successfully."}
 
+    except HTTPException:
+        # EmailOperations raises 500, or 503 with Retry-After while SMTP is unavailable
+        raise
     except Exception as e:
         # Handle any unexpected exceptions
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
\ No newline at end of file
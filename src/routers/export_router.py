@@ -0,0 +1,71 @@
+import datetime
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from core.dependencies import AdminUserDep
+from operations.export_operations import ExportOperations, ExportFormat, EXPORT_MEDIA_TYPES
+from modules.user.error_response_schema import ErrorResponse
+
+'''
+Endpoints for streaming whole tables to administrators as NDJSON or CSV
+'''
+
+export_router = APIRouter(
+    prefix="/api/v1/exports",
+    tags=["exports"],
+)
+
+EXPORT_RESPONSES = {
+    200: {"content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()}},
+    400: {"model": ErrorResponse},
+    403: {"model": ErrorResponse},
+}
+
+
+def export_response(export_ops: ExportOperations, query: Select, name: str, export_format: ExportFormat) -> StreamingResponse:
+    return StreamingResponse(
+        export_ops.stream(query, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format.value}"'},
+    )
+
+
+def check_range(start, end):
+    if start and end and end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+
+
+# GET endpoint to export every user
+@export_router.get("/users", response_class=StreamingResponse, responses=EXPORT_RESPONSES)
+async def export_users(
+    user_info: AdminUserDep,
+    format: ExportFormat = Query(ExportFormat.ndjson, description="ndjson or csv"),
+):
+    export_ops = ExportOperations()
+    return export_response(export_ops, export_ops.users_query(), "users", format)
+
+# GET endpoint to export appointments, optionally within an appointment_date range
+@export_router.get("/appointments", response_class=StreamingResponse, responses=EXPORT_RESPONSES)
+async def export_appointments(
+    user_info: AdminUserDep,
+    format: ExportFormat = Query(ExportFormat.ndjson, description="ndjson or csv"),
+    start: Optional[datetime.date] = Query(None, description="First appointment_date to include"),
+    end: Optional[datetime.date] = Query(None, description="Last appointment_date to include"),
+):
+    check_range(start, end)
+    export_ops = ExportOperations()
+    return export_response(export_ops, export_ops.appointments_query(start, end), "appointments", format)
+
+# GET endpoint to export messages, optionally within a timeStamp range
+@export_router.get("/messages", response_class=StreamingResponse, responses=EXPORT_RESPONSES)
+async def export_messages(
+    user_info: AdminUserDep,
+    format: ExportFormat = Query(ExportFormat.ndjson, description="ndjson or csv"),
+    start: Optional[datetime.datetime] = Query(None, description="Earliest message timeStamp to include"),
+    end: Optional[datetime.datetime] = Query(None, description="Latest message timeStamp to include"),
+):
+    check_range(start, end)
+    export_ops = ExportOperations()
+    return export_response(export_ops, export_ops.messages_query(start, end), "messages", format)
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+from core.health import readiness
+
+'''
+Probe endpoints for the load balancer and the container runtime
+'''
+
+health_router = APIRouter(
+    tags=["health"],
+)
+
+
+# Liveness: the worker answers, restart it if it does not
+@health_router.get("/livez")
+async def livez():
+    return {"alive": True}
+
+# Kept for probes configured before /livez existed
+@health_router.get("/healthz", include_in_schema=False)
+async def healthz():
+    return {"healthy": True}
+
+# Readiness: 503 with the failing checks while the worker should get no traffic
+@health_router.get("/readyz")
+async def readyz():
+    report = await readiness()
+    return JSONResponse(
+        report,
+        status_code=status.HTTP_200_OK if report["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Response
+from core.config import settings
+from core.metrics import CONTENT_TYPE, WorkerMetrics, registry
+
+metrics_router = APIRouter(
+    tags=["metrics"],
+)
+
+# Merges the samples of every worker of the host when METRICS_DIR is set
+worker_metrics = WorkerMetrics(settings.get_config()["metrics_dir"], settings.get_config()["metrics_write_interval"])
+
+
+# Prometheus scrape endpoint, left out of the OpenAPI schema
+@metrics_router.get("/metrics", include_in_schema=False)
+async def get_metrics() -> Response:
+    if worker_metrics.enabled:
+        return Response(content=worker_metrics.render(), media_type=CONTENT_TYPE)
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
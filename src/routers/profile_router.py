@@ -0,0 +1,32 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from core.dependencies import AdminUserDep
+from core.profiling import profile_store
+from modules.user.error_response_schema import ErrorResponse
+
+'''
+Endpoints for administrators to download the profiles stored by core/profiling.py
+'''
+
+profile_router = APIRouter(
+    prefix="/api/v1/profiles",
+    tags=["profiles"],
+)
+
+
+# GET endpoint to list the stored profiles of this host, newest first
+@profile_router.get("", response_model=list[str], responses={403: {"model": ErrorResponse}})
+async def list_profiles(user_info: AdminUserDep) -> list[str]:
+    return profile_store.names()
+
+# GET endpoint to download a profile as folded stacks, ready for flamegraph.pl or speedscope
+@profile_router.get(
+    "/{name}",
+    response_class=FileResponse,
+    responses={200: {"content": {"text/plain": {}}}, 403: {"model": ErrorResponse}, 404: {"model": ErrorResponse}},
+)
+async def get_profile(user_info: AdminUserDep, name: str):
+    path = profile_store.path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain")
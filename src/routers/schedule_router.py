@@ -1,16 +1,12 @@
 import datetime
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, HTTPException, Query
 from typing import List
-from core.db import get_db_session
-from core.dependencies import DBSessionDep
+from core.dependencies import DBSessionDep, CurrentUserDep, BarberUserDep
+from core.responses import SchemaResponse
 from operations.schedule_operations import ScheduleOperations
-from modules.schedule_schema import ScheduleResponse, ScheduleCreate, ScheduleUpdate, TimeSlotChildResponse
-from auth.controller import AuthController
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-import logging
+from modules.schedule_schema import ScheduleResponse, ScheduleCreate, ScheduleUpdate, ScheduleGridResponse, CalendarResponse
 from modules.user.error_response_schema import ErrorResponse
 
 '''
@@ -21,15 +17,15 @@ schedule_router = APIRouter(
     prefix="/api/v1/schedules",
     tags=["schedules"],
 )
-# Initialize the HTTPBearer scheme for authentication
-bearer_scheme = HTTPBearer()
+
+# Maximum number of days a single calendar grid request may cover
+MAX_GRID_DAYS = 31
 
 # POST endpoint to create a new schedule block in the database
 @schedule_router.post("", response_model=ScheduleResponse, responses = {
     500: {"model": ErrorResponse}
 })
-async def create_schedule(schedule: ScheduleCreate, db_session: DBSessionDep, credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
-    AuthController.protected_endpoint(credentials, required_role="barber")
+async def create_schedule(user_info: BarberUserDep, schedule: ScheduleCreate, db_session: DBSessionDep):
     # try:
     schedule_ops = ScheduleOperations(db_session)
     created_schedule = await schedule_ops.create_schedule(schedule)
@@ -46,19 +42,62 @@ async def create_schedule(schedule: ScheduleCreate, db_session: DBSessionDep, cr
     500: {"model": ErrorResponse}
 })
 async def get_schedules(
+    user_info: CurrentUserDep,
     db_session: DBSessionDep, 
-    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
     page : int = Query(1, ge=1),
     limit: int = Query(10, le=100),
     # Optional query parameters
     schedule_date: Optional[datetime.date] = Query(None, description="Date to filter barbers by schedule"),
     barber_id: Optional[int] = Query(None, description="Barber ID to filter schedules by"),
 ):
-    AuthController.protected_endpoint(credentials)
+    schedule_ops = ScheduleOperations(db_session)
+    schedules = await schedule_ops.get_all_schedules(page, limit, schedule_date, barber_id)
+    return SchemaResponse(schedules, List[ScheduleResponse])
+
+# GET endpoint to retrieve a compact calendar grid of every barber's schedule over a date range
+# Barber details are returned once and each day's slots are encoded as compact rows
+@schedule_router.get("/grid", response_model=ScheduleGridResponse, responses = {
+    400: {"model": ErrorResponse},
+    500: {"model": ErrorResponse}
+})
+async def get_schedule_grid(
+    user_info: CurrentUserDep,
+    db_session: DBSessionDep,
+    start_date: datetime.date = Query(..., description="First day of the calendar view"),
+    end_date: Optional[datetime.date] = Query(None, description="Last day of the calendar view (defaults to a week from start_date)"),
+    barber_id: Optional[int] = Query(None, description="Barber ID to filter the grid by"),
+):
+    if end_date is None:
+        end_date = start_date + datetime.timedelta(days=6)
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if (end_date - start_date).days >= MAX_GRID_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range cannot exceed {MAX_GRID_DAYS} days")
+
+    schedule_ops = ScheduleOperations(db_session)
+    return SchemaResponse(await schedule_ops.get_schedule_grid(start_date, end_date, barber_id))
+
+# GET endpoint to retrieve every barber's schedule, slots and booked appointments for a date range
+# in a single request (front desk day/week view)
+@schedule_router.get("/calendar", response_model=CalendarResponse, responses = {
+    400: {"model": ErrorResponse},
+    500: {"model": ErrorResponse}
+})
+async def get_calendar(
+    user_info: CurrentUserDep,
+    db_session: DBSessionDep,
+    start_date: datetime.date = Query(..., description="First day of the calendar view"),
+    end_date: Optional[datetime.date] = Query(None, description="Last day of the calendar view (defaults to start_date)"),
+):
+    if end_date is None:
+        end_date = start_date
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if (end_date - start_date).days >= MAX_GRID_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range cannot exceed {MAX_GRID_DAYS} days")
 
     schedule_ops = ScheduleOperations(db_session)
-    results = await schedule_ops.get_all_schedules(page, limit, schedule_date, barber_id)
-    return [schedule.to_response_schema() for schedule in results]
+    return SchemaResponse(await schedule_ops.get_calendar(start_date, end_date))
 
 # GET endpoint to retrieve a specific schedule block from the database by the schedule_id
 @schedule_router.get("/{schedule_id}", response_model=ScheduleResponse, responses = {
@@ -79,7 +118,7 @@ async def get_schedule(schedule_id: int, db_session: DBSessionDep):
     404: {"model": ErrorResponse},
     500: {"model": ErrorResponse}
 })
-async def update_schedule(schedule_id: int, schedule: ScheduleUpdate, db_session: DBSessionDep, credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
+async def update_schedule(user_info: BarberUserDep, schedule_id: int, schedule: ScheduleUpdate, db_session: DBSessionDep):
     
     schedule_ops = ScheduleOperations(db_session)
     updated_schedule = await schedule_ops.update_schedule(schedule_id, schedule)
@@ -92,7 +131,7 @@ async def update_schedule(schedule_id: int, schedule: ScheduleUpdate, db_session
     404: {"model": ErrorResponse},
     500: {"model": ErrorResponse}
 })
-async def delete_schedule(schedule_id: int, db_session: DBSessionDep, credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
+async def delete_schedule(user_info: BarberUserDep, schedule_id: int, db_session: DBSessionDep):
     
     schedule_ops = ScheduleOperations(db_session)
     success = await schedule_ops.delete_schedule(schedule_id)
@@ -1,28 +1,26 @@
-from typing import List
-from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Header, Response
 
-from core.dependencies import DBSessionDep
+from core.dependencies import DBSessionDep, BarberUserDep
 from modules.user.service_schema import ServiceBase, ServiceResponse, ServiceUpdate
 from operations.service_operations import ServiceOperations
 from modules.user.error_response_schema import ErrorResponse
-from auth.controller import AuthController
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 service_router = APIRouter(
     prefix="/api/v1/services",
     tags=["services"],
 )
-# Initialize the HTTPBearer scheme for authentication
-bearer_scheme = HTTPBearer()
+
+# Check an If-None-Match header value against the current ETag
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
 
 # POST endpoint to create a service
 @service_router.post("", response_model=ServiceResponse, responses = {
     500: {"model": ErrorResponse}
 })
-async def create_service(service: ServiceBase, db_session: DBSessionDep, credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
-    # Checks for barber role
-    AuthController.protected_endpoint(credentials, required_role="barber")
-    
+async def create_service(user_info: BarberUserDep, service: ServiceBase, db_session: DBSessionDep):
     service_ops = ServiceOperations(db_session)
     response = await service_ops.create_service(service)
 
@@ -30,28 +28,33 @@ async def create_service(service: ServiceBase, db_session: DBSessionDep, credent
 
 
 # GET endpoint to get all available services
+# Served from the in-process catalog cache as pre-serialized JSON, supports conditional
+# requests through ETag / If-None-Match
 @service_router.get("", response_model=List[ServiceResponse], responses = {
+    304: {"description": "Service catalog has not changed"},
     500: {"model": ErrorResponse}
 })
 async def get_all_services(
     db_session: DBSessionDep,
     page: int = Query(1, ge=1),
-    limit: int = Query(10, le=100)
+    limit: int = Query(10, le=100),
+    if_none_match: Optional[str] = Header(None)
 ):
     service_ops = ServiceOperations(db_session)
-    response = await service_ops.get_all_services(page, limit)
-    
-    return response
+    catalog_page = await service_ops.get_catalog_page(page, limit)
+
+    headers = {"ETag": catalog_page.etag, "Cache-Control": "no-cache"}
+    if if_none_match and etag_matches(if_none_match, catalog_page.etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=catalog_page.body, media_type="application/json", headers=headers)
 
 # PUT endpoint to update a service
 @service_router.put("/{service_id}", response_model=ServiceResponse, responses = {
     400: {"model": ErrorResponse},
     500: {"model": ErrorResponse}
 })
-async def update_service(db_session: DBSessionDep, service_id: int, service_details: ServiceUpdate, credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
-    # Checks for barber role
-    AuthController.protected_endpoint(credentials, required_role="barber")
-    
+async def update_service(user_info: BarberUserDep, db_session: DBSessionDep, service_id: int, service_details: ServiceUpdate):
     service_ops = ServiceOperations(db_session)
     response = await service_ops.update_service(service_id, service_details)
 
@@ -62,11 +65,7 @@ async def update_service(db_session: DBSessionDep, service_id: int, service_deta
     400: {"model": ErrorResponse},
     500: {"model": ErrorResponse}
 })
-async def delete_service(db_session: DBSessionDep, service_id: int, credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
-    # Checks for barber role
-    AuthController.protected_endpoint(credentials, required_role="barber")
-    
-    
+async def delete_service(user_info: BarberUserDep, db_session: DBSessionDep, service_id: int):
     service_ops = ServiceOperations(db_session)
     response = await service_ops.delete_service(service_id)
 
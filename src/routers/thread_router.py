@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Query
 from modules.thread_schema import ThreadCreate, ThreadResponse
 from modules.user.error_response_schema import ErrorResponse
 from core.dependencies import DBSessionDep
+from core.responses import SchemaResponse
 from operations.thread_operations import ThreadOperations
 from typing import List
 
@@ -33,7 +34,7 @@ async def get_threads_by_user_id(
     db_session: DBSessionDep,
     page: int = Query(1, ge=1),
     limit: int = Query(10, le=100)
-) -> List[ThreadResponse]:
+):
     thread_ops = ThreadOperations(db_session)
     response = await thread_ops.get_threads_by_user_id(logged_user_id, other_user_id, page, limit)
     if not response:
@@ -41,7 +42,7 @@ async def get_threads_by_user_id(
             status_code=404,
             detail=f"No threads found between users with IDs: {logged_user_id} and {other_user_id}"
         )
-    return response
+    return SchemaResponse(response, List[ThreadResponse])
 
 # GET endpoint to retrieve ALL threads for a particular user, where the user is both 'sendingUser'
 # and 'receivingUser' (for displaying all of a user's conversations)
@@ -55,7 +56,7 @@ async def get_all_threads_by_user_id(
     db_session: DBSessionDep,
     page: int = Query(1, ge=1),
     limit: int = Query(10, le=100)
-) -> List[ThreadResponse]:
+):
     
     thread_ops = ThreadOperations(db_session)
     response = await thread_ops.get_all_threads_by_user_id(user_id, page, limit)
@@ -64,4 +65,4 @@ async def get_all_threads_by_user_id(
             status_code=404,
             detail=f"No threads found for user with ID: {user_id}"
         )
-    return response
\ No newline at end of file
+    return SchemaResponse(response, List[ThreadResponse])
\ No newline at end of file
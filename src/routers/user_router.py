@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from typing import List
-from core.dependencies import DBSessionDep
+from core.config import settings
+from core.dependencies import DBSessionDep, CurrentUserDep, BarberUserDep, AdminUserDep
+from core.rate_limit import SlidingWindowLimiter, rate_limit_backend
+from core.responses import SchemaResponse
 from operations.user_operations import UserOperations
 from modules.user.user_schema import UserResponse, UserCreate, UserUpdate, UserPasswordUpdate
-from auth.controller import AuthController
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from modules.user.error_response_schema import ErrorResponse
 
 
@@ -16,15 +17,26 @@ user_router = APIRouter(
     prefix="/api/v1/users",
     tags=["users"],
 )
-# Initialize the HTTPBearer scheme for authentication
-bearer_scheme = HTTPBearer()
+
+# Registration attempts per client IP and per email
+registration_limiter = SlidingWindowLimiter(
+    "registration",
+    ip_limit=settings.get_config()["registration_rate_limit_per_ip"],
+    account_limit=settings.get_config()["registration_rate_limit_per_account"],
+    window=settings.get_config()["rate_limit_window"],
+    backend=rate_limit_backend,
+)
 
 # POST endpoint to create a new user in the database
 @user_router.post("", response_model=UserResponse, responses = {
     400: {"model": ErrorResponse},
+    429: {"model": ErrorResponse},
     500: {"model": ErrorResponse}
 })
-async def create_user(user: UserCreate, db_session: DBSessionDep):
+async def create_user(request: Request, user: UserCreate, db_session: DBSessionDep):
+    # Reject bursts before any database or Keycloak work
+    await registration_limiter.check(request, user.email)
+
     # Creates a user in DB
     user_ops = UserOperations(db_session)
     created_user = await user_ops.create_user(user)
@@ -38,13 +50,11 @@ async def create_user(user: UserCreate, db_session: DBSessionDep):
     500: {"model": ErrorResponse}
 })
 async def get_users(
+    user_info: BarberUserDep,
     db_session: DBSessionDep, 
-    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
     page: int = Query(1, ge=1),
     limit: int = Query(10, le=100)
 ):
-    AuthController.protected_endpoint(credentials, required_role="barber")
-    
     user_ops = UserOperations(db_session)
     return await user_ops.get_all_users(page, limit)
 
@@ -52,20 +62,12 @@ async def get_users(
     400: {"model": ErrorResponse},
     500: {"model": ErrorResponse}
 })
-async def get_current_user(db_session: DBSessionDep, credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
+async def get_current_user(user_info: CurrentUserDep, db_session: DBSessionDep):
     # Get the current user from the token
-    user_info = AuthController.protected_endpoint(credentials)
-    if not user_info:
-        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-    
     user_ops = UserOperations(db_session)
-    user = await user_ops.get_user_by_kc_id(user_info.id)
-    
-    return user.to_response_schema()
+    return await user_ops.get_current_user_response(user_info.id)
 
 # Get endpoint to search for users
-bearer = HTTPBearer()
-
 @user_router.get(
     "/search",
     response_model=List[UserResponse],
@@ -73,18 +75,17 @@ bearer = HTTPBearer()
     summary="Search users by username (auth required)"
 )
 async def search_users(
+    user_info: CurrentUserDep,
     db_session: DBSessionDep,
-    q: str = Query(..., min_length=2, description="Search term for username"),
+    q: str = Query(..., min_length=2, description="Search term matched against name, email and phone number"),
     page: int = Query(1, ge=1),
     limit: int = Query(10, le=100),
-    credentials: HTTPAuthorizationCredentials = Depends(bearer),
 ):
-    # Only require a valid token (no special role):
-    AuthController.protected_endpoint(credentials)
-
+    # Only requires a valid token (no special role)
     user_ops = UserOperations(db_session)
     try:
-        return await user_ops.search_users_by_username(q, page, limit)
+        users = await user_ops.search_users_by_username(q, page, limit)
+        return SchemaResponse(users, List[UserResponse])
     except HTTPException:
         # Let UserOperations raise 400/500 as appropriate
         raise
@@ -97,8 +98,7 @@ async def search_users(
      400: {"model": ErrorResponse},
      500: {"model": ErrorResponse}
 })
-async def get_user(user_id: int, db_session: DBSessionDep, credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
-    AuthController.protected_endpoint(credentials)
+async def get_user(user_info: CurrentUserDep, user_id: int, db_session: DBSessionDep):
     user_ops = UserOperations(db_session)
     user = await user_ops.get_user_by_id(user_id)
     if not user:
@@ -110,8 +110,7 @@ async def get_user(user_id: int, db_session: DBSessionDep, credentials: HTTPAuth
     400: {"model": ErrorResponse},
     500: {"model": ErrorResponse}
 })
-async def update_user(user_id: int, user: UserUpdate, db_session: DBSessionDep, credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
-    AuthController.protected_endpoint(credentials)
+async def update_user(user_info: CurrentUserDep, user_id: int, user: UserUpdate, db_session: DBSessionDep):
     user_ops = UserOperations(db_session)
     updated_user = await user_ops.update_user(user_id, user)
     if not updated_user:
@@ -125,12 +124,11 @@ async def update_user(user_id: int, user: UserUpdate, db_session: DBSessionDep,
     500: {"model": ErrorResponse}
 }, operation_id="updateUserPassword")
 async def update_user_password(
+    user_info: CurrentUserDep,
     user_id: int,
     password_data: UserPasswordUpdate,
-    db_session: DBSessionDep,
-    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)
+    db_session: DBSessionDep
 ):
-    AuthController.protected_endpoint(credentials)
     user_ops = UserOperations(db_session)
     success = await user_ops.update_user_password(user_id, password_data)
     if not success:
@@ -143,8 +141,7 @@ async def update_user_password(
     404: {"model": ErrorResponse},
     500: {"model": ErrorResponse}
 })
-async def delete_user(user_id: int, db_session: DBSessionDep, credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
-    AuthController.protected_endpoint(credentials, required_role="admin")
+async def delete_user(user_info: AdminUserDep, user_id: int, db_session: DBSessionDep):
     user_ops = UserOperations(db_session)
     success = await user_ops.delete_user(user_id)
     if not success: